@@ -2,13 +2,13 @@ import streamlit as st
 import pandas as pd
 import datetime
 from datetime import timedelta, date
-import json
 import os
 from typing import Dict, List
 import math
 import hashlib
 
 import io
+from json_journal import get_json_store
 from style import get_custom_css, get_sidebar_css, get_stats_card_html, get_section_header_html, get_info_box_html, get_form_container_start, get_form_container_end, get_form_section_start, get_form_section_end, get_form_section_title
 
 # Configuração para PostgreSQL local na EC2
@@ -155,15 +155,13 @@ def load_data() -> Dict:
         except Exception as e:
             print(f"Erro ao carregar dados do banco: {e}")
     
-    # Fallback para JSON se banco não disponível
-    if os.path.exists(DATA_FILE):
-        try:
-            with open(DATA_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                data = migrate_data(data)
-                return data
-        except:
-            return init_empty_data()
+    # Fallback para JSON se banco não disponível (snapshot + journal, em cache por mtime)
+    try:
+        data = get_json_store(DATA_FILE, migrate_data).load()
+        if data is not None:
+            return data
+    except Exception as e:
+        print(f"Erro ao carregar dados do JSON: {e}")
     return init_empty_data()
 
 def init_empty_data() -> Dict:
@@ -207,9 +205,8 @@ def save_data(data: Dict):
         except Exception as e:
             print(f"Erro ao salvar no banco: {e}")
     
-    # Fallback para JSON
-    with open(DATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+    # Fallback para JSON: grava só as mudanças no journal (compactado periodicamente)
+    get_json_store(DATA_FILE, migrate_data).save(data)
 
 def ensure_upload_dir(data: Dict):
     """Garante que a pasta de upload exista."""
@@ -305,14 +302,54 @@ def get_next_pending_approval(aprovacoes: List[Dict]) -> Dict:
     return {}
 
 def add_notification(data: Dict, perfil: str, numero: int, mensagem: str):
-    """Adiciona uma notificação interna para o perfil informado."""
+    """Registra um evento de notificação para o perfil informado.
+    
+    Cada evento é apenas um INSERT; o cliente pediu para não exibir notificações
+    individuais, então os eventos aparecem agregados no digest da sidebar
+    (notification_digest.py). Sem banco, o evento é descartado.
+    """
     try:
-        # Notificações desabilitadas conforme solicitação do cliente
-        pass
+        if USE_DATABASE:
+            get_local_database().add_notification_event(perfil, numero, mensagem)
     except Exception:
         # Falha silenciosa para não interromper o fluxo
         pass
 
+def show_notification_digest(usuario: Dict):
+    """Mostra na sidebar o último digest de notificações do perfil/usuário (uma leitura indexada)"""
+    try:
+        from notification_digest import normalizar_perfil, refresh_if_stale, PERFIL_SOLICITANTE
+        db = get_local_database()
+        if not db.db_available:
+            return
+        # Sem cron configurado, a própria sidebar gera o digest quando o último estiver vencido
+        refresh_if_stale(db)
+        
+        perfil = normalizar_perfil(usuario.get("perfil"))
+        destinatarios = [usuario.get("nome"), usuario.get("username")] if perfil == PERFIL_SOLICITANTE else None
+        digest = db.get_latest_digest(perfil, destinatarios)
+        if not digest:
+            return
+        
+        with st.sidebar.expander(f"🔔 Resumo ({digest.get('eventos', 0)} novidade(s))", expanded=False):
+            col1, col2 = st.columns(2)
+            with col1:
+                rotulo = "Em andamento" if perfil == PERFIL_SOLICITANTE else "Aguardando você"
+                st.metric(rotulo, digest.get("aguardando", 0))
+            with col2:
+                st.metric("SLA vencido", digest.get("sla_vencido", 0))
+            por_etapa = digest.get("por_etapa") or {}
+            for etapa in ETAPAS_PROCESSO:
+                if por_etapa.get(etapa):
+                    st.markdown(f"- **{etapa}:** {por_etapa[etapa]}")
+            try:
+                atualizado = datetime.datetime.fromisoformat(digest["periodo_fim"]).strftime('%d/%m/%Y %H:%M')
+            except (KeyError, ValueError):
+                atualizado = digest.get("periodo_fim", "")
+            st.caption(f"Atualizado em {atualizado}")
+    except Exception as e:
+        print(f"Erro ao exibir digest de notificações: {e}")
+
 # ===== Autenticação simples (local) =====
 SALT = "ziran_local_salt_v1"
 
@@ -582,8 +619,11 @@ def initialize_persistent_keys():
                     del st.session_state["_user_backup"]
             st.rerun()
     
-    # Notificações removidas conforme solicitação do cliente
-    # (Cliente mencionou que com muitas solicitações ficaria muita informação)
+    # Notificações individuais removidas conforme solicitação do cliente
+    # (Cliente mencionou que com muitas solicitações ficaria muita informação);
+    # a sidebar mostra apenas o resumo periódico
+    if USE_DATABASE:
+        show_notification_digest(usuario)
 
     # Navegação por perfil usando módulos
     st.sidebar.markdown("### 🔧 Navegação")
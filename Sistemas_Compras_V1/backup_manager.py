@@ -0,0 +1,483 @@
+#!/usr/bin/env python3
+"""
+Backup online do banco SQLite do Sistema de Compras
+Copia o banco em lotes de páginas via API de backup do SQLite (sem bloquear escritores),
+comprime a cópia em streaming (zstd quando disponível, gzip caso contrário) e
+mantém apenas as últimas gerações.
+
+Também restaura snapshots comprimidos e backups JSON legados em um banco de staging,
+verifica a integridade e troca o arquivo do banco de forma atômica.
+
+Uso via CLI/cron:
+    python3 backup_manager.py [--db sistema_compras.db] [--dir backups] [--keep 7] [--compressao gzip|zstd]
+    python3 backup_manager.py --restaurar backups/sistema_compras_20250101_020000.db.gz
+"""
+
+import argparse
+import datetime
+import gzip
+import json
+import os
+import shutil
+import sqlite3
+import time
+from typing import Callable, Dict, List, Optional
+
+# zstd é opcional; sem o pacote 'zstandard' o backup usa gzip
+try:
+    import zstandard
+    ZSTD_DISPONIVEL = True
+except ImportError:
+    zstandard = None
+    ZSTD_DISPONIVEL = False
+
+BACKUP_DIR_PADRAO = "backups"
+BACKUP_PREFIXO = "sistema_compras_"
+GERACOES_PADRAO = 7
+PAGINAS_POR_PASSO = 256
+PAUSA_ENTRE_PASSOS = 0.005
+CHUNK_COMPRESSAO = 1024 * 1024
+
+EXTENSOES = {
+    "zstd": ".db.zst",
+    "gzip": ".db.gz",
+}
+
+# Restauração
+LOTE_INSERCAO = 5000
+CAMPOS_JSON = ['anexos_requisicao', 'cotacoes', 'aprovacoes', 'historico_etapas', 'itens']
+TABELAS_OBRIGATORIAS = {'solicitacoes', 'usuarios', 'configuracoes'}
+# Backups JSON legados não contêm estas tabelas; os dados atuais são preservados
+TABELAS_PRESERVADAS = ['usuarios', 'sessoes', 'auditoria_admin']
+# Mesmos padrões de LocalDatabaseManager.add_solicitacao para colunas NOT NULL
+PADROES_SOLICITACAO = {
+    'solicitante': '',
+    'departamento': '',
+    'descricao': '',
+    'prioridade': 'Normal',
+    'local_aplicacao': '',
+    'status': 'Solicitação',
+    'sla_dias': 3,
+}
+
+
+class BackupManager:
+    """Gerencia backups comprimidos e rotacionados do banco SQLite"""
+
+    def __init__(self, db_path: str = None, backup_dir: str = None, geracoes: int = None, compressao: str = None):
+        self.db_path = db_path or os.getenv('SQLITE_DB_PATH', 'sistema_compras.db')
+        self.backup_dir = backup_dir or os.getenv('BACKUP_DIR', BACKUP_DIR_PADRAO)
+        self.geracoes = geracoes or int(os.getenv('BACKUP_GERACOES', str(GERACOES_PADRAO)))
+        compressao = compressao or os.getenv('BACKUP_COMPRESSAO') or ("zstd" if ZSTD_DISPONIVEL else "gzip")
+        if compressao == "zstd" and not ZSTD_DISPONIVEL:
+            print("⚠️ Pacote 'zstandard' não instalado, usando gzip")
+            compressao = "gzip"
+        if compressao not in EXTENSOES:
+            raise ValueError(f"Compressão inválida: {compressao}")
+        self.compressao = compressao
+        # Última mensagem de erro para diagnóstico na UI
+        self.last_error = ""
+
+    def create_backup(self, conn: sqlite3.Connection = None,
+                      progress_callback: Optional[Callable[[float, str], None]] = None) -> str:
+        """
+        Cria um backup comprimido e retorna o caminho do arquivo gerado
+
+        Args:
+            conn: Conexão de origem; se omitida, abre uma conexão própria em db_path.
+                Passar a conexão da aplicação evita que escritas feitas por ela
+                reiniciem a cópia.
+            progress_callback: Recebe (fração 0..1, descrição da fase)
+        """
+        self.last_error = ""
+        os.makedirs(self.backup_dir, exist_ok=True)
+        timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+        destino = os.path.join(self.backup_dir, f"{BACKUP_PREFIXO}{timestamp}{EXTENSOES[self.compressao]}")
+        sequencia = 1
+        while os.path.exists(destino):
+            # Vários backups no mesmo segundo (ex.: backup de segurança da restauração)
+            destino = os.path.join(self.backup_dir, f"{BACKUP_PREFIXO}{timestamp}_{sequencia}{EXTENSOES[self.compressao]}")
+            sequencia += 1
+        snapshot_tmp = os.path.join(self.backup_dir, f".{BACKUP_PREFIXO}{timestamp}.db.tmp")
+        destino_tmp = destino + ".tmp"
+
+        def report(fracao: float, fase: str):
+            if progress_callback:
+                try:
+                    progress_callback(min(max(fracao, 0.0), 1.0), fase)
+                except Exception:
+                    pass
+
+        origem = conn
+        abriu_origem = False
+        try:
+            if origem is None:
+                origem = sqlite3.connect(self.db_path, check_same_thread=False)
+                abriu_origem = True
+
+            # 1) Cópia online em lotes de páginas (80% do progresso)
+            def on_progress(status, remaining, total):
+                if total:
+                    report(0.8 * (total - remaining) / total, f"Copiando páginas ({total - remaining}/{total})")
+
+            snapshot = sqlite3.connect(snapshot_tmp)
+            try:
+                origem.backup(snapshot, pages=PAGINAS_POR_PASSO, progress=on_progress, sleep=PAUSA_ENTRE_PASSOS)
+            finally:
+                snapshot.close()
+
+            # 2) Compressão em streaming para arquivo temporário + rename atômico (20% restantes)
+            tamanho = os.path.getsize(snapshot_tmp) or 1
+            lidos = 0
+            with open(snapshot_tmp, 'rb') as src, self._open_writer(destino_tmp) as dst:
+                while True:
+                    chunk = src.read(CHUNK_COMPRESSAO)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+                    lidos += len(chunk)
+                    report(0.8 + 0.2 * lidos / tamanho, "Comprimindo")
+            os.replace(destino_tmp, destino)
+
+            removidos = self.rotate()
+            report(1.0, "Concluído")
+            print(f"✅ Backup criado: {destino} ({len(removidos)} geração(ões) antiga(s) removida(s))")
+            return destino
+        except Exception as e:
+            self.last_error = f"Erro ao criar backup: {e}"
+            print(f"❌ {self.last_error}")
+            if os.path.exists(destino_tmp):
+                os.remove(destino_tmp)
+            raise
+        finally:
+            if abriu_origem and origem is not None:
+                origem.close()
+            if os.path.exists(snapshot_tmp):
+                os.remove(snapshot_tmp)
+
+    def restore_backup(self, backup_path: str, db=None,
+                       progress_callback: Optional[Callable[[float, str], None]] = None,
+                       backup_antes: bool = True) -> int:
+        """
+        Restaura o banco a partir de um snapshot comprimido (.db.gz/.db.zst) ou de um backup JSON legado
+
+        O conteúdo é montado em um banco de staging, verificado com PRAGMA integrity_check
+        e só então substitui o arquivo do banco via rename atômico.
+
+        Args:
+            backup_path: Arquivo de backup a restaurar
+            db: LocalDatabaseManager em uso; é fechado antes da troca e reconectado em seguida
+            progress_callback: Recebe (fração 0..1, descrição da fase)
+            backup_antes: Gera um backup de segurança do banco atual antes de restaurar
+
+        Returns:
+            int: Quantidade de solicitações no banco restaurado
+        """
+        self.last_error = ""
+        staging = self.db_path + ".restore"
+
+        def report(fracao: float, fase: str):
+            if progress_callback:
+                try:
+                    progress_callback(min(max(fracao, 0.0), 1.0), fase)
+                except Exception:
+                    pass
+
+        fechou_conexao = False
+        try:
+            if not os.path.exists(backup_path):
+                raise FileNotFoundError(f"Arquivo de backup não encontrado: {backup_path}")
+            self._remove_sqlite_files(staging)
+
+            if backup_path.lower().endswith('.json'):
+                self._load_json_backup(backup_path, staging, db, report)
+            else:
+                report(0.1, "Descomprimindo snapshot")
+                decompress_backup(backup_path, staging)
+
+            report(0.8, "Verificando integridade")
+            total = verify_database(staging)
+
+            # Backup de segurança só depois do staging pronto: a rotação pode remover o arquivo restaurado
+            if backup_antes and os.path.exists(self.db_path):
+                report(0.85, "Backup de segurança do banco atual")
+                self.create_backup(conn=db.conn if db and db.db_available else None)
+
+            # Troca atômica: fecha a conexão, descarta journal/WAL antigos e renomeia
+            report(0.9, "Substituindo banco")
+            if db is not None:
+                db.close()
+                fechou_conexao = True
+            for sufixo in ('-journal', '-wal', '-shm'):
+                if os.path.exists(self.db_path + sufixo):
+                    os.remove(self.db_path + sufixo)
+            os.replace(staging, self.db_path)
+
+            report(1.0, "Concluído")
+            print(f"✅ Banco restaurado de {backup_path} ({total} solicitações)")
+            return total
+        except Exception as e:
+            self.last_error = f"Erro ao restaurar backup: {e}"
+            print(f"❌ {self.last_error}")
+            raise
+        finally:
+            if fechou_conexao:
+                db.reconnect()
+            self._remove_sqlite_files(staging)
+
+    def _load_json_backup(self, json_path: str, staging: str, db, report: Callable[[float, str], None]):
+        """Monta banco de staging a partir de backup JSON: carga em massa e índices no final"""
+        report(0.05, "Lendo JSON")
+        with open(json_path, 'r', encoding='utf-8') as f:
+            payload = json.load(f)
+        # Aceita o formato do Admin ({"data": {...}}) e o arquivo de fallback (compras_sla_data.json)
+        data = payload.get("data", payload) if isinstance(payload, dict) else None
+        if not isinstance(data, dict) or not isinstance(data.get("solicitacoes"), list):
+            raise ValueError("Arquivo JSON não é um backup do sistema")
+
+        if db is None:
+            from database_local import get_local_database
+            db = get_local_database()
+
+        conn = sqlite3.connect(staging)
+        try:
+            # Staging é descartável: sem journal/fsync durante a carga
+            conn.execute('PRAGMA journal_mode = OFF')
+            conn.execute('PRAGMA synchronous = OFF')
+            db.create_tables(conn, with_indexes=False)
+
+            agora = datetime.datetime.now().isoformat()
+            solicitacoes = []
+            for sol in data["solicitacoes"]:
+                registro = dict(sol)
+                for campo, padrao in PADROES_SOLICITACAO.items():
+                    if registro.get(campo) is None:
+                        registro[campo] = padrao
+                registro['etapa_atual'] = registro.get('etapa_atual') or registro['status']
+                registro['carimbo_data_hora'] = registro.get('carimbo_data_hora') or agora
+                solicitacoes.append(registro)
+
+            config = data.get("configuracoes", {}) or {}
+            configuracoes = [
+                {"chave": chave, "valor": str(valor)}
+                for chave, valor in config.items() if chave != "catalogo_produtos"
+            ]
+            catalogo = [
+                dict(p, ativo=1 if p.get('ativo', True) else 0)
+                for p in config.get("catalogo_produtos", []) or []
+            ]
+
+            report(0.1, "Carregando solicitações")
+            bulk_insert(conn, 'solicitacoes', solicitacoes,
+                        lambda n: report(0.1 + 0.5 * n / max(len(solicitacoes), 1), f"Carregando solicitações ({n}/{len(solicitacoes)})"))
+            bulk_insert(conn, 'configuracoes', configuracoes)
+            bulk_insert(conn, 'catalogo_produtos', catalogo)
+            bulk_insert(conn, 'movimentacoes', data.get("movimentacoes", []) or [])
+            bulk_insert(conn, 'notificacoes', data.get("notificacoes", []) or [])
+            if data.get("usuarios"):
+                bulk_insert(conn, 'usuarios', data["usuarios"])
+            conn.commit()
+            # Colunas derivadas: rank de prioridade e tabelas aprovacoes/cotacoes
+            db.backfill_prioridade_rank(conn)
+            db.backfill_aprovacoes(conn)
+            db.backfill_cotacoes(conn)
+
+            # Tabelas ausentes no JSON são preservadas do banco atual
+            if os.path.exists(self.db_path):
+                report(0.65, "Preservando usuários, sessões e auditoria")
+                conn.execute('ATTACH DATABASE ? AS atual', (self.db_path,))
+                for tabela in TABELAS_PRESERVADAS:
+                    if tabela == 'usuarios' and data.get("usuarios"):
+                        continue
+                    copy_table(conn, 'atual', tabela)
+                conn.commit()
+                conn.execute('DETACH DATABASE atual')
+
+            report(0.7, "Criando índices")
+            db.create_indexes(conn)
+            conn.commit()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _remove_sqlite_files(path: str):
+        """Remove arquivo SQLite e seus arquivos auxiliares, se existirem"""
+        for sufixo in ('', '-journal', '-wal', '-shm'):
+            if os.path.exists(path + sufixo):
+                os.remove(path + sufixo)
+
+    def _open_writer(self, path: str):
+        """Abre arquivo de saída com o compressor configurado"""
+        if self.compressao == "zstd":
+            return zstandard.ZstdCompressor(level=10, threads=-1).stream_writer(open(path, 'wb'), closefd=True)
+        return gzip.open(path, 'wb', compresslevel=6)
+
+    def list_backups(self) -> List[Dict]:
+        """Lista backups existentes, do mais recente para o mais antigo"""
+        if not os.path.isdir(self.backup_dir):
+            return []
+        backups = []
+        for nome in os.listdir(self.backup_dir):
+            if not nome.startswith(BACKUP_PREFIXO):
+                continue
+            compressao = next((c for c, ext in EXTENSOES.items() if nome.endswith(ext)), None)
+            if not compressao:
+                continue
+            caminho = os.path.join(self.backup_dir, nome)
+            stat = os.stat(caminho)
+            backups.append({
+                "nome_arquivo": nome,
+                "caminho": caminho,
+                "compressao": compressao,
+                "tamanho_bytes": stat.st_size,
+                "data_criacao": datetime.datetime.fromtimestamp(stat.st_mtime).isoformat(),
+            })
+        # O timestamp no nome ordena lexicograficamente
+        backups.sort(key=lambda b: b["nome_arquivo"].split('.')[0], reverse=True)
+        return backups
+
+    def rotate(self) -> List[str]:
+        """Remove gerações além do limite configurado; retorna arquivos removidos"""
+        removidos = []
+        for backup in self.list_backups()[self.geracoes:]:
+            try:
+                os.remove(backup["caminho"])
+                removidos.append(backup["caminho"])
+            except OSError as e:
+                print(f"⚠️ Não foi possível remover {backup['caminho']}: {e}")
+        return removidos
+
+
+def open_backup_reader(path: str):
+    """Abre um backup comprimido para leitura em streaming"""
+    if path.endswith(EXTENSOES["zstd"]):
+        if not ZSTD_DISPONIVEL:
+            raise RuntimeError("Pacote 'zstandard' necessário para ler backups .zst")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+    if path.endswith(EXTENSOES["gzip"]):
+        return gzip.open(path, 'rb')
+    raise ValueError(f"Formato de backup não reconhecido: {path}")
+
+
+def decompress_backup(path: str, destino: str):
+    """Descomprime um backup para um arquivo SQLite em disco"""
+    with open_backup_reader(path) as src, open(destino, 'wb') as dst:
+        shutil.copyfileobj(src, dst, CHUNK_COMPRESSAO)
+
+
+def table_columns(conn: sqlite3.Connection, tabela: str, schema: str = 'main') -> List[str]:
+    """Retorna as colunas de uma tabela"""
+    return [row[1] for row in conn.execute(f'PRAGMA {schema}.table_info({tabela})')]
+
+
+def bulk_insert(conn: sqlite3.Connection, tabela: str, registros: List[Dict],
+                progress: Optional[Callable[[int], None]] = None) -> int:
+    """
+    Insere dicionários em lote com executemany (sem commit)
+
+    Apenas colunas existentes na tabela e presentes nos registros são usadas;
+    os campos JSON da solicitação (CAMPOS_JSON) são serializados.
+    """
+    if not registros:
+        return 0
+    existentes = table_columns(conn, tabela)
+    presentes = set()
+    for registro in registros:
+        presentes.update(registro.keys())
+    colunas = [c for c in existentes if c in presentes]
+    if not colunas:
+        return 0
+
+    sql = f"INSERT INTO {tabela} ({', '.join(colunas)}) VALUES ({', '.join('?' for _ in colunas)})"
+    # Só as colunas JSON conhecidas passam por serialização; as demais vão direto (map em C)
+    indices_json = [i for i, c in enumerate(colunas) if c in CAMPOS_JSON]
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+
+    def linha(registro: Dict) -> list:
+        valores = list(map(registro.get, colunas))
+        for i in indices_json:
+            v = valores[i]
+            if not isinstance(v, str):
+                valores[i] = encode(v) if v else '[]'
+        return valores
+
+    inseridos = 0
+    for inicio in range(0, len(registros), LOTE_INSERCAO):
+        lote = registros[inicio:inicio + LOTE_INSERCAO]
+        conn.executemany(sql, map(linha, lote))
+        inseridos += len(lote)
+        if progress:
+            progress(inseridos)
+    return inseridos
+
+
+def copy_table(conn: sqlite3.Connection, schema_origem: str, tabela: str) -> int:
+    """Copia uma tabela de um banco anexado para o banco principal (colunas em comum)"""
+    origem = table_columns(conn, tabela, schema_origem)
+    if not origem:
+        return 0
+    colunas = [c for c in table_columns(conn, tabela) if c in origem]
+    lista = ', '.join(colunas)
+    cursor = conn.execute(f"INSERT INTO main.{tabela} ({lista}) SELECT {lista} FROM {schema_origem}.{tabela}")
+    return cursor.rowcount
+
+
+def verify_database(path: str) -> int:
+    """Executa integrity_check e confere as tabelas obrigatórias; retorna total de solicitações"""
+    conn = sqlite3.connect(path)
+    try:
+        resultado = conn.execute('PRAGMA integrity_check').fetchone()[0]
+        if resultado != 'ok':
+            raise ValueError(f"Falha na verificação de integridade: {resultado}")
+        tabelas = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        faltando = TABELAS_OBRIGATORIAS - tabelas
+        if faltando:
+            raise ValueError(f"Backup sem tabelas obrigatórias: {', '.join(sorted(faltando))}")
+        return conn.execute('SELECT COUNT(*) FROM solicitacoes').fetchone()[0]
+    finally:
+        conn.close()
+
+
+def main():
+    """Ponto de entrada para execução via CLI/cron"""
+    parser = argparse.ArgumentParser(description="Backup online do banco SQLite do Sistema de Compras")
+    parser.add_argument("--db", help="Caminho do banco (padrão: $SQLITE_DB_PATH ou sistema_compras.db)")
+    parser.add_argument("--dir", help="Diretório de backups (padrão: $BACKUP_DIR ou backups)")
+    parser.add_argument("--keep", type=int, help="Quantidade de gerações mantidas (padrão: 7)")
+    parser.add_argument("--compressao", choices=sorted(EXTENSOES.keys()), help="Algoritmo de compressão")
+    parser.add_argument("--listar", action="store_true", help="Apenas lista os backups existentes")
+    parser.add_argument("--restaurar", metavar="ARQUIVO", help="Restaura o banco a partir de um backup (.db.gz, .db.zst ou .json)")
+    args = parser.parse_args()
+
+    manager = BackupManager(db_path=args.db, backup_dir=args.dir, geracoes=args.keep, compressao=args.compressao)
+
+    if args.listar:
+        for backup in manager.list_backups():
+            print(f"{backup['data_criacao']}  {backup['tamanho_bytes']:>12}  {backup['nome_arquivo']}")
+        return True
+
+    if args.restaurar:
+        # Com a aplicação em execução, reinicie o Streamlit ou restaure pela página do Admin
+        inicio = time.time()
+        try:
+            manager.restore_backup(args.restaurar)
+        except Exception:
+            return False
+        print(f"⏱️ Tempo total: {time.time() - inicio:.1f}s")
+        return True
+
+    if not os.path.exists(manager.db_path):
+        print(f"❌ Banco não encontrado: {manager.db_path}")
+        return False
+
+    inicio = time.time()
+    try:
+        manager.create_backup()
+    except Exception:
+        return False
+    print(f"⏱️ Tempo total: {time.time() - inicio:.1f}s")
+    return True
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main() else 1)
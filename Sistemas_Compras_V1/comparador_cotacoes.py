@@ -0,0 +1,203 @@
+"""
+Comparação vetorizada de cotações multi-item
+Monta a matriz item × fornecedor com NumPy e calcula o fornecedor mais barato por item,
+o fornecedor único mais barato e a divisão ótima com limite de fornecedores,
+considerando frete e prazo de entrega
+"""
+
+import itertools
+import math
+from typing import Dict, List
+
+import numpy as np
+
+# Acima deste número de combinações a divisão ótima usa busca gulosa
+MAX_COMBINACOES = 20000
+
+
+def _itens_cotacao(cotacao: Dict) -> List[Dict]:
+    return [i for i in cotacao.get('itens_cotacao') or [] if isinstance(i, dict) and i.get('codigo')]
+
+
+def montar_matriz(cotacoes: List[Dict], itens: List[Dict] = None) -> Dict:
+    """
+    Monta a matriz de preços unitários item × fornecedor
+
+    Cada fornecedor entra uma vez; se houver mais de uma cotação do mesmo fornecedor,
+    vale a última cadastrada. Células sem preço ficam NaN.
+
+    Args:
+        cotacoes: Cotações da solicitação (com itens_cotacao, frete e prazo_entrega)
+        itens: Itens da solicitação; define ordem e quantidades (padrão: itens cotados)
+
+    Returns:
+        Dict com codigos, descricoes, fornecedores, quantidades, precos (itens × fornecedores),
+        frete e prazo (por fornecedor)
+    """
+    por_fornecedor = {}
+    for cotacao in cotacoes:
+        if cotacao.get('fornecedor') and _itens_cotacao(cotacao):
+            por_fornecedor[cotacao['fornecedor']] = cotacao
+    fornecedores = list(por_fornecedor)
+
+    codigos, descricoes, quantidades = [], [], []
+    for item in itens or []:
+        if item.get('codigo') and item['codigo'] not in codigos:
+            codigos.append(item['codigo'])
+            descricoes.append(item.get('descricao', ''))
+            quantidades.append(float(item.get('quantidade') or 1))
+    # Itens cotados que não constam na solicitação entram no fim da matriz
+    for cotacao in por_fornecedor.values():
+        for item in _itens_cotacao(cotacao):
+            if item['codigo'] not in codigos:
+                codigos.append(item['codigo'])
+                descricoes.append(item.get('descricao', ''))
+                quantidades.append(float(item.get('quantidade') or 1))
+
+    linha_de = {codigo: i for i, codigo in enumerate(codigos)}
+    linhas, colunas, valores = [], [], []
+    for j, cotacao in enumerate(por_fornecedor.values()):
+        for item in _itens_cotacao(cotacao):
+            valor = item.get('valor_unitario')
+            if valor is None and item.get('valor_total') is not None:
+                valor = item['valor_total'] / (item.get('quantidade') or 1)
+            if valor is None:
+                continue
+            linhas.append(linha_de[item['codigo']])
+            colunas.append(j)
+            valores.append(valor)
+
+    precos = np.full((len(codigos), len(fornecedores)), np.nan)
+    precos[linhas, colunas] = valores
+
+    cotacoes_ordenadas = list(por_fornecedor.values())
+    return {
+        "codigos": codigos,
+        "descricoes": descricoes,
+        "fornecedores": fornecedores,
+        "quantidades": np.array(quantidades, dtype=float),
+        "precos": precos,
+        "frete": np.array([float(c.get('frete') or 0) for c in cotacoes_ordenadas]),
+        "prazo": np.array([float(c.get('prazo_entrega') or 0) for c in cotacoes_ordenadas])
+    }
+
+
+def mais_barato_por_item(matriz: Dict) -> Dict:
+    """
+    Fornecedor de menor custo para cada item (sem limite de fornecedores, sem frete)
+
+    Returns:
+        Dict com fornecedor (índice por item, -1 = sem cotação), custo por item e total
+    """
+    precos = matriz["precos"]
+    cotado = ~np.isnan(precos).all(axis=1)
+    fornecedor = np.full(len(precos), -1)
+    custo_item = np.full(len(precos), np.nan)
+    if cotado.any():
+        custo = np.where(np.isnan(precos), np.inf, precos * matriz["quantidades"][:, None])[cotado]
+        escolhido = custo.argmin(axis=1)
+        fornecedor[cotado] = escolhido
+        custo_item[cotado] = custo[np.arange(len(custo)), escolhido]
+    return {
+        "fornecedor": fornecedor,
+        "custo": custo_item,
+        "total": float(np.nansum(custo_item)),
+        "sem_cotacao": [matriz["codigos"][i] for i in np.flatnonzero(~cotado)]
+    }
+
+
+def _avaliar(custo: np.ndarray, frete: np.ndarray, prazo: np.ndarray, combinacoes: np.ndarray,
+             peso_frete: float, peso_prazo: float) -> np.ndarray:
+    """Pontua várias combinações de fornecedores de uma vez (shape: combinações × k)"""
+    # custo[:, combinacoes] -> itens × combinações × k; cada item vai para o mais barato da combinação
+    minimo = custo[:, combinacoes].min(axis=2)
+    itens = minimo.sum(axis=0)
+    return itens + peso_frete * frete[combinacoes].sum(axis=1) + peso_prazo * prazo[combinacoes].max(axis=1)
+
+
+def melhor_fornecedor_unico(matriz: Dict, peso_frete: float = 1.0, peso_prazo: float = 0.0) -> Dict:
+    """
+    Fornecedor único de menor custo que cota todos os itens cotados
+
+    Pontuação: soma dos itens + peso_frete × frete + peso_prazo × prazo (R$ por dia)
+    """
+    return divisao_otima(matriz, max_fornecedores=1, peso_frete=peso_frete, peso_prazo=peso_prazo)
+
+
+def divisao_otima(matriz: Dict, max_fornecedores: int = 2, peso_frete: float = 1.0,
+                  peso_prazo: float = 0.0) -> Dict:
+    """
+    Melhor divisão dos itens entre no máximo max_fornecedores fornecedores
+
+    Cada item vai para o fornecedor mais barato da combinação. Pontuação da combinação:
+    soma dos itens + peso_frete × soma dos fretes + peso_prazo × maior prazo (R$ por dia).
+    Combinações que deixam algum item cotado sem fornecedor são descartadas. Busca
+    exaustiva vetorizada por tamanho de combinação; acima de MAX_COMBINACOES, gulosa.
+
+    Returns:
+        Dict com viavel, fornecedores (índices), atribuicao (índice por item, -1 = sem cotação),
+        custo_itens, frete, prazo e pontuacao
+    """
+    precos = matriz["precos"]
+    n_fornecedores = precos.shape[1]
+    cotado = ~np.isnan(precos).all(axis=1)
+    custo = np.where(np.isnan(precos), np.inf, precos * matriz["quantidades"][:, None])[cotado]
+    frete, prazo = matriz["frete"], matriz["prazo"]
+    k_max = max(1, min(int(max_fornecedores), n_fornecedores))
+
+    melhor = None
+    if n_fornecedores and cotado.any():
+        total_combinacoes = sum(math.comb(n_fornecedores, k) for k in range(1, k_max + 1))
+        if total_combinacoes <= MAX_COMBINACOES:
+            for k in range(1, k_max + 1):
+                combinacoes = np.array(list(itertools.combinations(range(n_fornecedores), k)))
+                pontuacao = _avaliar(custo, frete, prazo, combinacoes, peso_frete, peso_prazo)
+                idx = int(np.argmin(pontuacao))
+                if np.isfinite(pontuacao[idx]) and (melhor is None or pontuacao[idx] < melhor[1]):
+                    melhor = (list(combinacoes[idx]), float(pontuacao[idx]))
+        else:
+            melhor = _divisao_gulosa(custo, frete, prazo, k_max, peso_frete, peso_prazo)
+
+    if melhor is None:
+        return {"viavel": False, "fornecedores": [], "atribuicao": np.full(len(precos), -1),
+                "custo_itens": 0.0, "frete": 0.0, "prazo": 0.0, "pontuacao": float('inf')}
+
+    selecionados = np.array(melhor[0])
+    atribuicao = np.full(len(precos), -1)
+    atribuicao[cotado] = selecionados[custo[:, selecionados].argmin(axis=1)]
+    # Fornecedores da combinação sem nenhum item atribuído não entram no resultado
+    usados = [int(f) for f in selecionados if (atribuicao == f).any()]
+    return {
+        "viavel": True,
+        "fornecedores": usados,
+        "atribuicao": atribuicao,
+        "custo_itens": float(custo[:, selecionados].min(axis=1).sum()),
+        "frete": float(frete[usados].sum()),
+        "prazo": float(prazo[usados].max()),
+        "pontuacao": melhor[1]
+    }
+
+
+def _divisao_gulosa(custo: np.ndarray, frete: np.ndarray, prazo: np.ndarray, k_max: int,
+                    peso_frete: float, peso_prazo: float):
+    """Adiciona, a cada passo, o fornecedor que mais reduz a pontuação da combinação"""
+    selecionados: List[int] = []
+    pontuacao_atual = float('inf')
+    for _ in range(k_max):
+        candidatos = [j for j in range(custo.shape[1]) if j not in selecionados]
+        if not candidatos:
+            break
+        combinacoes = np.array([selecionados + [j] for j in candidatos])
+        pontuacao = _avaliar(custo, frete, prazo, combinacoes, peso_frete, peso_prazo)
+        idx = int(np.argmin(pontuacao))
+        # Combinações ainda sem cobertura total valem inf; segue adicionando pelo menor custo de itens
+        if not np.isfinite(pontuacao[idx]):
+            cobertura = np.isfinite(custo[:, combinacoes].min(axis=2)).sum(axis=0)
+            idx = int(np.argmax(cobertura))
+        elif pontuacao[idx] >= pontuacao_atual:
+            break
+        selecionados.append(candidatos[idx])
+        pontuacao_atual = float(pontuacao[idx])
+    if not np.isfinite(pontuacao_atual):
+        return None
+    return selecionados, pontuacao_atual
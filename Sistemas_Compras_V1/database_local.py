@@ -2,65 +2,77 @@ import sqlite3
 import json
 import os
 import hashlib
-from typing import Dict, List
+import statistics
+from typing import Dict, List, Tuple
 import datetime
 
+from db_backends import criar_backend
+from sql_monitor import instrumentar
+
 # Configuração de autenticação consistente com app.py
 SALT = "ziran_local_salt_v1"
 
+# Ordem das filas de trabalho (menor = atendido primeiro); prioridade desconhecida conta como Normal
+PRIORIDADE_RANK = {"Urgente": 0, "Alta": 1, "Normal": 2, "Baixa": 3}
+PRIORIDADE_RANK_PADRAO = 2
+
+def prioridade_rank(prioridade: str) -> int:
+    """Converte prioridade textual no rank inteiro indexado em solicitacoes.prioridade_rank"""
+    return PRIORIDADE_RANK.get(prioridade, PRIORIDADE_RANK_PADRAO)
+
 class LocalDatabaseManager:
-    """Gerenciador de banco SQLite unificado para Windows e EC2"""
+    """Gerenciador de banco unificado para Windows e EC2 (SQLite ou PostgreSQL via DB_BACKEND)"""
     
     def __init__(self):
-        self.db_type = 'sqlite'
+        self.db_type = os.getenv('DB_BACKEND', 'sqlite')
         self.db_available = False
         self.conn = None
+        self.backend = None
         # Armazena a última mensagem de erro para diagnóstico na UI
         self.last_error = ""
         self.connection_info = ""
         self.db_path = "sistema_compras.db"
-        self.setup_sqlite_database()
+        self.setup_database()
     
-    def setup_sqlite_database(self):
-        """Configura conexão SQLite unificada"""
+    def setup_database(self):
+        """Conecta ao backend configurado (db_backends.criar_backend)"""
         try:
             # Permite configurar caminho do banco via variável de ambiente
             custom_db_path = os.getenv('SQLITE_DB_PATH')
             if custom_db_path:
                 self.db_path = custom_db_path
             
-            # Garante que o diretório existe
-            db_dir = os.path.dirname(os.path.abspath(self.db_path))
-            if db_dir and not os.path.exists(db_dir):
-                os.makedirs(db_dir, exist_ok=True)
-            
-            # Conecta ao SQLite
-            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
-            self.conn.row_factory = sqlite3.Row  # Equivalente ao RealDictCursor
-            
-            # Habilita foreign keys
-            self.conn.execute('PRAGMA foreign_keys = ON')
+            self.backend = criar_backend(self.db_path)
+            self.db_type = self.backend.nome
+            # Todos os comandos passam pelo monitor (sql_monitor: estatísticas e consultas lentas)
+            self.conn = instrumentar(self.backend.connect(), self.backend)
             
             # Testa a conexão
             cursor = self.conn.cursor()
             cursor.execute('SELECT 1')
             cursor.fetchone()
             
-            self.connection_info = f"SQLite: {os.path.abspath(self.db_path)}"
-            print(f"✅ SQLite conectado com sucesso: {os.path.abspath(self.db_path)}")
+            self.connection_info = self.backend.descricao()
+            print(f"✅ Banco conectado com sucesso: {self.connection_info}")
             
             self.create_tables()
             self.db_available = True
             
         except Exception as e:
-            self.last_error = f"Erro ao conectar SQLite: {e}"
+            self.last_error = f"Erro ao conectar {self.db_type}: {e}"
             self.db_available = False
-            print(f"❌ Erro ao conectar SQLite: {e}")
+            print(f"❌ Erro ao conectar {self.db_type}: {e}")
     
     
-    def create_tables(self):
-        """Cria todas as tabelas necessárias"""
-        cursor = self.conn.cursor()
+    def create_tables(self, conn: sqlite3.Connection = None, with_indexes: bool = True):
+        """Cria todas as tabelas necessárias
+        
+        Args:
+            conn: Conexão alvo (padrão: conexão principal); a restauração usa um banco de staging
+            with_indexes: False adia a criação dos índices para depois de cargas em massa
+        """
+        conn = conn or self.conn
+        cursor = conn.cursor()
         
         # Tabela de usuários
         cursor.execute('''
@@ -86,6 +98,7 @@ class LocalDatabaseManager:
             departamento TEXT NOT NULL,
             descricao TEXT NOT NULL,
             prioridade TEXT NOT NULL,
+            prioridade_rank INTEGER NOT NULL DEFAULT 2,
             local_aplicacao TEXT NOT NULL,
             status TEXT NOT NULL,
             etapa_atual TEXT NOT NULL,
@@ -128,6 +141,12 @@ class LocalDatabaseManager:
         )
         ''')
 
+        # Migração: bancos anteriores não têm a coluna prioridade_rank
+        colunas = self.backend.colunas(cursor, 'solicitacoes')
+        if 'prioridade_rank' not in colunas:
+            cursor.execute(f'ALTER TABLE solicitacoes ADD COLUMN prioridade_rank INTEGER NOT NULL DEFAULT {PRIORIDADE_RANK_PADRAO}')
+            self.backfill_prioridade_rank(conn)
+
         # Tabela de configurações
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS configuracoes (
@@ -191,6 +210,19 @@ class LocalDatabaseManager:
         )
         ''')
 
+        # Digests de notificações (agregados por notification_digest.build_digests)
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS notificacoes_digest (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            perfil TEXT NOT NULL,
+            destinatario TEXT NOT NULL DEFAULT '',
+            periodo_inicio TEXT,
+            periodo_fim TEXT NOT NULL,
+            eventos INTEGER NOT NULL DEFAULT 0,
+            conteudo TEXT NOT NULL
+        )
+        ''')
+
         # Tabela de sessões (para persistência de login)
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS sessoes (
@@ -201,15 +233,235 @@ class LocalDatabaseManager:
         )
         ''')
 
-        # Criar índices para performance
+        # Tabela de aprovações (espelho consultável do JSON solicitacoes.aprovacoes)
+        aprovacoes_existia = bool(self.backend.colunas(cursor, 'aprovacoes'))
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS aprovacoes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            numero_solicitacao INTEGER NOT NULL,
+            nivel TEXT,
+            aprovador TEXT NOT NULL,
+            nome_aprovador TEXT,
+            status TEXT NOT NULL,
+            data_aprovacao TEXT NOT NULL,
+            observacoes TEXT
+        )
+        ''')
+        if not aprovacoes_existia:
+            self.backfill_aprovacoes(conn)
+
+        # Tabela de cotações normalizada (uma linha por fornecedor e item; espelho de solicitacoes.cotacoes)
+        cotacoes_existia = bool(self.backend.colunas(cursor, 'cotacoes'))
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS cotacoes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            numero_solicitacao INTEGER NOT NULL,
+            cotacao_id TEXT,
+            fornecedor TEXT NOT NULL,
+            codigo_produto TEXT,
+            descricao TEXT,
+            quantidade REAL,
+            valor_unitario REAL NOT NULL,
+            valor_total REAL,
+            prazo_entrega INTEGER,
+            data_cotacao TEXT NOT NULL,
+            status TEXT
+        )
+        ''')
+        if not cotacoes_existia:
+            self.backfill_cotacoes(conn)
+
+        if with_indexes:
+            self.create_indexes(conn)
+
+        conn.commit()
+        print(f"✅ Todas as tabelas criadas com sucesso ({self.connection_info})")
+    
+    def create_indexes(self, conn: sqlite3.Connection = None):
+        """Cria os índices de performance (separado para permitir criação adiada)"""
+        conn = conn or self.conn
+        cursor = conn.cursor()
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_solicitacoes_numero ON solicitacoes(numero_solicitacao_estoque)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_solicitacoes_status ON solicitacoes(status)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_solicitacoes_solicitante ON solicitacoes(solicitante)')
+        # Fila por etapa em ordem de prioridade e chegada (next_work_items)
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_solicitacoes_fila ON solicitacoes(etapa_atual, prioridade_rank, carimbo_data_hora)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_usuarios_username ON usuarios(username)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_sessoes_expires ON sessoes(expires_at)')
-
-        self.conn.commit()
-        print(f"✅ Todas as tabelas criadas com sucesso ({self.connection_info})")
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_notificacoes_digest_perfil ON notificacoes_digest(perfil, destinatario, periodo_fim DESC)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_aprovacoes_aprovador_data ON aprovacoes(aprovador, data_aprovacao DESC)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_aprovacoes_solicitacao ON aprovacoes(numero_solicitacao)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_cotacoes_produto_data ON cotacoes(codigo_produto, data_cotacao)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_cotacoes_fornecedor_data ON cotacoes(fornecedor, data_cotacao)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_cotacoes_solicitacao ON cotacoes(numero_solicitacao)')
+        conn.commit()
+    
+    def backfill_prioridade_rank(self, conn: sqlite3.Connection = None) -> int:
+        """Recalcula prioridade_rank a partir do texto de prioridade (set-based)"""
+        conn = conn or self.conn
+        try:
+            casos = ' '.join(f"WHEN '{nome}' THEN {rank}" for nome, rank in PRIORIDADE_RANK.items())
+            cursor = conn.cursor()
+            cursor.execute(f'UPDATE solicitacoes SET prioridade_rank = CASE prioridade {casos} ELSE {PRIORIDADE_RANK_PADRAO} END')
+            conn.commit()
+            return cursor.rowcount
+        except Exception as e:
+            conn.rollback()
+            print(f"Erro ao calcular prioridade_rank: {e}")
+            return 0
+    
+    def backfill_aprovacoes(self, conn: sqlite3.Connection = None) -> int:
+        """Reconstrói a tabela aprovacoes a partir do JSON solicitacoes.aprovacoes (set-based via json_each)"""
+        conn = conn or self.conn
+        try:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM aprovacoes')
+            if self.db_type == 'postgresql':
+                cursor.execute(self._BACKFILL_APROVACOES_PG)
+                conn.commit()
+                return cursor.rowcount
+            cursor.execute('''
+                INSERT INTO aprovacoes (numero_solicitacao, nivel, aprovador, nome_aprovador, status, data_aprovacao, observacoes)
+                SELECT s.numero_solicitacao_estoque,
+                       json_extract(a.value, '$.nivel'),
+                       json_extract(a.value, '$.aprovador'),
+                       json_extract(a.value, '$.nome_aprovador'),
+                       COALESCE(json_extract(a.value, '$.status'), ''),
+                       COALESCE(json_extract(a.value, '$.data_aprovacao'), ''),
+                       json_extract(a.value, '$.observacoes')
+                FROM solicitacoes s, json_each(s.aprovacoes) a
+                WHERE s.aprovacoes IS NOT NULL AND json_valid(s.aprovacoes)
+                  AND json_extract(a.value, '$.aprovador') IS NOT NULL
+            ''')
+            conn.commit()
+            return cursor.rowcount
+        except Exception as e:
+            conn.rollback()
+            print(f"Erro ao popular tabela de aprovações: {e}")
+            return 0
+    
+    _BACKFILL_APROVACOES_PG = '''
+        INSERT INTO aprovacoes (numero_solicitacao, nivel, aprovador, nome_aprovador, status, data_aprovacao, observacoes)
+        SELECT s.numero_solicitacao_estoque,
+               a.value->>'nivel', a.value->>'aprovador', a.value->>'nome_aprovador',
+               COALESCE(a.value->>'status', ''), COALESCE(a.value->>'data_aprovacao', ''),
+               a.value->>'observacoes'
+        FROM solicitacoes s, jsonb_array_elements(CAST(s.aprovacoes AS JSONB)) AS a(value)
+        WHERE s.aprovacoes LIKE '[%' AND jsonb_typeof(a.value) = 'object'
+          AND a.value->>'aprovador' IS NOT NULL
+    '''
+    
+    @staticmethod
+    def _aprovacao_row(numero: int, aprovacao: Dict) -> tuple:
+        """Converte registro de aprovação (JSON) em linha da tabela aprovacoes"""
+        return (
+            numero,
+            aprovacao.get('nivel'),
+            aprovacao.get('aprovador'),
+            aprovacao.get('nome_aprovador'),
+            aprovacao.get('status', ''),
+            aprovacao.get('data_aprovacao', ''),
+            aprovacao.get('observacoes')
+        )
+    
+    def _sync_aprovacoes(self, cursor, numero: int, aprovacoes: List[Dict]):
+        """Regrava as linhas de aprovacoes de uma solicitação (mesma transação do chamador)"""
+        cursor.execute('DELETE FROM aprovacoes WHERE numero_solicitacao = ?', (numero,))
+        rows = [self._aprovacao_row(numero, a) for a in aprovacoes or [] if isinstance(a, dict) and a.get('aprovador')]
+        if rows:
+            cursor.executemany('''
+                INSERT INTO aprovacoes (numero_solicitacao, nivel, aprovador, nome_aprovador, status, data_aprovacao, observacoes)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+    
+    def backfill_cotacoes(self, conn: sqlite3.Connection = None) -> int:
+        """Reconstrói a tabela cotacoes a partir do JSON solicitacoes.cotacoes"""
+        conn = conn or self.conn
+        try:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM cotacoes')
+            cursor.execute('''
+                SELECT numero_solicitacao_estoque, cotacoes FROM solicitacoes
+                WHERE cotacoes IS NOT NULL AND cotacoes NOT IN ('', '[]', '""', '"[]"')
+            ''')
+            rows = []
+            for numero, cotacoes in cursor.fetchall():
+                rows.extend(self._cotacao_rows(numero, cotacoes))
+            # COPY no PostgreSQL, executemany no SQLite
+            self.backend.bulk_insert(cursor, 'cotacoes', self._COLUNAS_COTACAO, rows)
+            conn.commit()
+            return len(rows)
+        except Exception as e:
+            conn.rollback()
+            print(f"Erro ao popular tabela de cotações: {e}")
+            return 0
+    
+    _COLUNAS_COTACAO = ('numero_solicitacao', 'cotacao_id', 'fornecedor', 'codigo_produto', 'descricao',
+                        'quantidade', 'valor_unitario', 'valor_total', 'prazo_entrega', 'data_cotacao', 'status')
+    _INSERT_COTACAO = f'''
+        INSERT INTO cotacoes ({', '.join(_COLUNAS_COTACAO)})
+        VALUES ({', '.join('?' for _ in _COLUNAS_COTACAO)})
+    '''
+    
+    @staticmethod
+    def _data_iso(valor) -> str:
+        """Normaliza datas de cotação (dd/mm/aaaa, dd/mm/aaaa HH:MM ou ISO) para aaaa-mm-dd"""
+        if isinstance(valor, (datetime.date, datetime.datetime)):
+            return valor.strftime('%Y-%m-%d')
+        texto = str(valor or '').strip()[:10]
+        for formato in ('%d/%m/%Y', '%Y-%m-%d'):
+            try:
+                return datetime.datetime.strptime(texto, formato).strftime('%Y-%m-%d')
+            except ValueError:
+                continue
+        return texto or datetime.date.today().isoformat()
+    
+    @classmethod
+    def _cotacao_rows(cls, numero: int, cotacoes) -> List[tuple]:
+        """Converte a lista de cotações (JSON) em linhas da tabela cotacoes
+        
+        Cotações com itens_cotacao geram uma linha por item; sem detalhamento,
+        uma única linha sem código de produto com o valor total.
+        """
+        # O campo pode chegar serializado mais de uma vez (telas que gravam json.dumps)
+        while isinstance(cotacoes, str):
+            try:
+                cotacoes = json.loads(cotacoes) if cotacoes else []
+            except Exception:
+                return []
+        rows = []
+        for cot in cotacoes if isinstance(cotacoes, list) else []:
+            if not isinstance(cot, dict) or not cot.get('fornecedor'):
+                continue
+            data = cls._data_iso(cot.get('data_cotacao') or cot.get('data_cadastro'))
+            base = (numero, cot.get('id'), cot['fornecedor'])
+            itens = [i for i in cot.get('itens_cotacao') or [] if isinstance(i, dict)]
+            if itens:
+                for item in itens:
+                    quantidade = item.get('quantidade') or 1
+                    valor_unitario = item.get('valor_unitario')
+                    if valor_unitario is None and item.get('valor_total') is not None:
+                        valor_unitario = item['valor_total'] / quantidade
+                    if valor_unitario is None:
+                        continue
+                    rows.append(base + (
+                        item.get('codigo'), item.get('descricao'), quantidade, valor_unitario,
+                        item.get('valor_total', valor_unitario * quantidade),
+                        cot.get('prazo_entrega'), data, cot.get('status')
+                    ))
+            else:
+                valor = cot.get('valor_total', cot.get('valor'))
+                if valor is None:
+                    continue
+                rows.append(base + (None, None, None, valor, valor, cot.get('prazo_entrega'), data, cot.get('status')))
+        return rows
+    
+    def _sync_cotacoes(self, cursor, numero: int, cotacoes):
+        """Regrava as linhas de cotacoes de uma solicitação (mesma transação do chamador)"""
+        cursor.execute('DELETE FROM cotacoes WHERE numero_solicitacao = ?', (numero,))
+        rows = self._cotacao_rows(numero, cotacoes)
+        if rows:
+            cursor.executemany(self._INSERT_COTACAO, rows)
     
     def add_user(self, username: str, nome: str, perfil: str, departamento: str, senha_hash: str, is_hashed=False):
         """Adiciona usuário ao banco"""
@@ -331,7 +583,7 @@ class LocalDatabaseManager:
             sql = '''
             INSERT INTO solicitacoes (
                 numero_solicitacao_estoque, numero_pedido_compras, solicitante, departamento,
-                descricao, prioridade, local_aplicacao, status, etapa_atual, carimbo_data_hora,
+                descricao, prioridade, prioridade_rank, local_aplicacao, status, etapa_atual, carimbo_data_hora,
                 data_numero_pedido, data_cotacao, data_entrega, sla_dias, dias_atendimento,
                 sla_cumprido, observacoes, numero_requisicao_interno, data_requisicao_interna,
                 responsavel_suprimentos, valor_estimado, valor_final, fornecedor_recomendado,
@@ -340,7 +592,7 @@ class LocalDatabaseManager:
                 responsavel_recebimento, observacoes_entrega, observacoes_finalizacao,
                 data_finalizacao, tipo_solicitacao, justificativa, responsavel_estoque,
                 observacoes_requisicao, data_requisicao, numero_requisicao, observacoes_pedido_compras
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             '''
             
             values = (
@@ -350,6 +602,7 @@ class LocalDatabaseManager:
                 solicitacao_data.get('departamento', ''),
                 solicitacao_data.get('descricao', ''),
                 solicitacao_data.get('prioridade', 'Normal'),
+                prioridade_rank(solicitacao_data.get('prioridade', 'Normal')),
                 solicitacao_data.get('local_aplicacao', ''),
                 solicitacao_data.get('status', 'Solicitação'),
                 solicitacao_data.get('etapa_atual', solicitacao_data.get('status', 'Solicitação')),
@@ -391,6 +644,10 @@ class LocalDatabaseManager:
             )
             
             cursor.execute(sql, values)
+            if solicitacao_data.get('aprovacoes'):
+                self._sync_aprovacoes(cursor, solicitacao_data.get('numero_solicitacao_estoque'), solicitacao_data['aprovacoes'])
+            if solicitacao_data.get('cotacoes'):
+                self._sync_cotacoes(cursor, solicitacao_data.get('numero_solicitacao_estoque'), solicitacao_data['cotacoes'])
             self.conn.commit()
             return True
         except Exception as e:
@@ -407,24 +664,63 @@ class LocalDatabaseManager:
         try:
             cursor = self.conn.cursor()
             cursor.execute('SELECT * FROM solicitacoes ORDER BY numero_solicitacao_estoque DESC')
-            solicitacoes = []
-            for row in cursor.fetchall():
-                sol = dict(row)
-                # Deserializa campos JSON
-                for field in ['anexos_requisicao', 'cotacoes', 'aprovacoes', 'historico_etapas', 'itens']:
-                    try:
-                        if sol.get(field):
-                            sol[field] = json.loads(sol[field])
-                        else:
-                            sol[field] = []
-                    except:
-                        sol[field] = []
-                solicitacoes.append(sol)
-            return solicitacoes
+            return [self._row_to_solicitacao(row) for row in cursor.fetchall()]
         except Exception as e:
             print(f"Erro ao buscar solicitações: {e}")
             return []
     
+    def next_work_items(self, etapa: str, limit: int = None) -> List[Dict]:
+        """Fila de uma etapa em ordem de prioridade e chegada (range scan em idx_solicitacoes_fila)
+        
+        Args:
+            etapa: Valor de etapa_atual da fila (ex.: "Aguardando Aprovação", "Requisição")
+            limit: Máximo de itens retornados (None = fila inteira)
+        """
+        if not self.db_available or not self.conn:
+            return []
+            
+        try:
+            cursor = self.conn.cursor()
+            sql = '''
+                SELECT * FROM solicitacoes
+                WHERE etapa_atual = ?
+                ORDER BY prioridade_rank, carimbo_data_hora
+            '''
+            if limit is None:
+                cursor.execute(sql, (etapa,))
+            else:
+                cursor.execute(sql + ' LIMIT ?', (etapa, limit))
+            return [self._row_to_solicitacao(row) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"Erro ao buscar fila de trabalho: {e}")
+            return []
+    
+    def iter_solicitacoes(self, etapa: str = None, tamanho_lote: int = 500):
+        """Itera as solicitações sem carregar todas em memória (cursor do lado do servidor no PostgreSQL)"""
+        if not self.db_available or not self.conn:
+            return
+        sql = 'SELECT * FROM solicitacoes'
+        params = ()
+        if etapa:
+            sql += ' WHERE etapa_atual = ?'
+            params = (etapa,)
+        for row in self.backend.stream(self.conn, sql + ' ORDER BY numero_solicitacao_estoque', params, tamanho_lote):
+            yield self._row_to_solicitacao(row)
+    
+    @staticmethod
+    def _row_to_solicitacao(row) -> Dict:
+        """Converte linha de solicitacoes em dict, desserializando os campos JSON"""
+        sol = dict(row)
+        for field in ['anexos_requisicao', 'cotacoes', 'aprovacoes', 'historico_etapas', 'itens']:
+            try:
+                if sol.get(field):
+                    sol[field] = json.loads(sol[field])
+                else:
+                    sol[field] = []
+            except:
+                sol[field] = []
+        return sol
+    
     def update_solicitacao(self, numero_solicitacao: int, updates: Dict) -> bool:
         """Atualiza solicitação específica"""
         if not self.db_available or not self.conn:
@@ -436,6 +732,9 @@ class LocalDatabaseManager:
             set_clauses = []
             values = []
             
+            if 'prioridade' in updates:
+                updates = dict(updates, prioridade_rank=prioridade_rank(updates['prioridade']))
+            
             for field, value in updates.items():
                 if field in ['anexos_requisicao', 'cotacoes', 'aprovacoes', 'historico_etapas', 'itens']:
                     set_clauses.append(f"{field} = ?")
@@ -453,13 +752,383 @@ class LocalDatabaseManager:
             '''
             
             cursor.execute(sql, values)
+            atualizadas = cursor.rowcount
+            if 'aprovacoes' in updates and atualizadas:
+                self._sync_aprovacoes(cursor, numero_solicitacao, updates['aprovacoes'])
+            if 'cotacoes' in updates and atualizadas:
+                self._sync_cotacoes(cursor, numero_solicitacao, updates['cotacoes'])
             self.conn.commit()
-            return cursor.rowcount > 0
+            return atualizadas > 0
         except Exception as e:
             self.conn.rollback()
             print(f"Erro ao atualizar solicitação: {e}")
             return False
     
+    def move_solicitacoes_batch(self, numeros: List[int], etapa_destino: str, usuario: str,
+                                transicoes_validas: Dict[str, List[str]], updates: Dict = None,
+                                updates_por_item: Dict[int, Dict] = None, observacoes: str = "",
+                                notificacoes_por_item: Dict[int, List[Tuple[str, str]]] = None) -> List[Dict]:
+        """Move várias solicitações de etapa em uma única transação
+
+        Valida cada transição contra transicoes_validas usando a etapa lida dentro da
+        transação, grava atualizações e histórico com executemany e registra as
+        movimentações. Os eventos de notificação (notificacoes_por_item: numero ->
+        [(perfil, mensagem)]) são gravados só para os itens movidos, na mesma transação.
+        Um único commit para o lote inteiro.
+
+        Returns:
+            List[Dict]: Resultado por item ({"numero", "sucesso", "mensagem"})
+        """
+        if not self.db_available or not self.conn:
+            return [{"numero": n, "sucesso": False, "mensagem": "Banco indisponível"} for n in numeros]
+
+        updates = updates or {}
+        updates_por_item = updates_por_item or {}
+        notificacoes_por_item = notificacoes_por_item or {}
+        resultados = {n: {"numero": n, "sucesso": False, "mensagem": "Solicitação não encontrada"} for n in numeros}
+        agora = datetime.datetime.now().isoformat()
+
+        try:
+            cursor = self.conn.cursor()
+            # Reserva a escrita já na leitura para validar contra o estado atual
+            cursor.execute('BEGIN IMMEDIATE')
+
+            atuais = {}
+            for inicio in range(0, len(numeros), 500):
+                lote = numeros[inicio:inicio + 500]
+                placeholders = ', '.join('?' for _ in lote)
+                cursor.execute(f'''
+                    SELECT numero_solicitacao_estoque, etapa_atual, historico_etapas
+                    FROM solicitacoes WHERE numero_solicitacao_estoque IN ({placeholders})
+                ''', lote)
+                for row in cursor.fetchall():
+                    atuais[row[0]] = (row[1], row[2])
+
+            # Agrupa por conjunto de campos: cada grupo vira um único executemany
+            grupos: Dict[Tuple[str, ...], List[list]] = {}
+            movimentacoes = []
+            notificacoes = []
+            for numero in numeros:
+                if numero not in atuais:
+                    continue
+                etapa_origem, historico_json = atuais[numero]
+                permitidas = transicoes_validas.get(etapa_origem, [])
+                if etapa_destino not in permitidas:
+                    resultados[numero]["mensagem"] = (
+                        f"Transição inválida: '{etapa_origem}' → '{etapa_destino}' "
+                        f"(permitidas: {', '.join(permitidas) or 'nenhuma'})"
+                    )
+                    continue
+
+                historico = self._load_json_list(historico_json)
+                historico.append({
+                    "etapa": etapa_destino,
+                    "data_entrada": agora,
+                    "usuario": usuario,
+                    "observacoes": observacoes
+                })
+
+                campos = dict(updates)
+                campos.update(updates_por_item.get(numero, {}))
+                if "prioridade" in campos:
+                    campos["prioridade_rank"] = prioridade_rank(campos["prioridade"])
+                campos["status"] = etapa_destino
+                campos["etapa_atual"] = etapa_destino
+                campos["historico_etapas"] = historico
+
+                chaves = tuple(sorted(campos))
+                valores = []
+                for field in chaves:
+                    if field in ['anexos_requisicao', 'cotacoes', 'aprovacoes', 'historico_etapas', 'itens']:
+                        valores.append(json.dumps(campos[field]))
+                    else:
+                        valores.append(campos[field])
+                valores.append(numero)
+                grupos.setdefault(chaves, []).append(valores)
+
+                movimentacoes.append((numero, etapa_origem, etapa_destino, usuario, observacoes))
+                for perfil, mensagem in notificacoes_por_item.get(numero, []):
+                    notificacoes.append((perfil, numero, mensagem, agora))
+                resultados[numero] = {"numero": numero, "sucesso": True, "mensagem": f"{etapa_origem} → {etapa_destino}"}
+
+            for chaves, valores in grupos.items():
+                set_clauses = ', '.join(f"{field} = ?" for field in chaves)
+                cursor.executemany(
+                    f'UPDATE solicitacoes SET {set_clauses} WHERE numero_solicitacao_estoque = ?',
+                    valores
+                )
+
+            if movimentacoes:
+                cursor.executemany('''
+                    INSERT INTO movimentacoes (numero_solicitacao, etapa_origem, etapa_destino, usuario, observacoes)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', movimentacoes)
+
+            if notificacoes:
+                cursor.executemany(
+                    'INSERT INTO notificacoes (perfil, numero, mensagem, data) VALUES (?, ?, ?, ?)',
+                    notificacoes
+                )
+
+            self.conn.commit()
+            return [resultados[n] for n in numeros]
+        except Exception as e:
+            self.conn.rollback()
+            self.last_error = str(e)
+            print(f"Erro ao mover solicitações em lote: {e}")
+            return [{"numero": n, "sucesso": False, "mensagem": f"Erro no lote: {e}"} for n in numeros]
+
+    def apply_aprovacoes_batch(self, decisoes: List[Dict], aprovador: str, nome_aprovador: str,
+                               ip_address: str = None) -> List[Dict]:
+        """Registra várias decisões de aprovação em uma única transação
+
+        Cada decisão é um dict {"numero", "decisao" ("Aprovar"/"Reprovar"), "observacoes"}.
+        Aprovadas seguem para "Compra feita" (passando por "Aprovado" no histórico) e
+        reprovadas para "Reprovado", como no fluxo individual. Registros de aprovação,
+        mudanças de status, movimentações, auditoria e os eventos de notificação para
+        Solicitante e Suprimentos são gravados com executemany e um único commit.
+
+        Returns:
+            List[Dict]: Resultado por item ({"numero", "sucesso", "mensagem"})
+        """
+        numeros = [d["numero"] for d in decisoes]
+        if not self.db_available or not self.conn:
+            return [{"numero": n, "sucesso": False, "mensagem": "Banco indisponível"} for n in numeros]
+
+        resultados = {n: {"numero": n, "sucesso": False, "mensagem": "Solicitação não encontrada"} for n in numeros}
+        agora = datetime.datetime.now().isoformat()
+
+        try:
+            cursor = self.conn.cursor()
+            # Reserva a escrita já na leitura para validar contra o estado atual
+            cursor.execute('BEGIN IMMEDIATE')
+
+            atuais = {}
+            for inicio in range(0, len(numeros), 500):
+                lote = numeros[inicio:inicio + 500]
+                placeholders = ', '.join('?' for _ in lote)
+                cursor.execute(f'''
+                    SELECT numero_solicitacao_estoque, etapa_atual, aprovacoes, historico_etapas, valor_estimado
+                    FROM solicitacoes WHERE numero_solicitacao_estoque IN ({placeholders})
+                ''', lote)
+                for row in cursor.fetchall():
+                    atuais[row[0]] = dict(row)
+
+            updates = []
+            novas_aprovacoes = []
+            movimentacoes = []
+            auditoria = []
+            notificacoes = []
+            for decisao in decisoes:
+                numero = decisao["numero"]
+                atual = atuais.get(numero)
+                if not atual:
+                    continue
+                if atual["etapa_atual"] != "Aguardando Aprovação":
+                    resultados[numero]["mensagem"] = f"Solicitação não está aguardando aprovação (etapa: {atual['etapa_atual']})"
+                    continue
+
+                aprovar = decisao.get("decisao") == "Aprovar"
+                observacoes = decisao.get("observacoes", "")
+                aprovacoes_sol = self._load_json_list(atual["aprovacoes"])
+                historico = self._load_json_list(atual["historico_etapas"])
+
+                registro = {
+                    "nivel": "Gerência&Diretoria",
+                    "aprovador": aprovador,
+                    "nome_aprovador": nome_aprovador,
+                    "status": "Aprovado" if aprovar else "Reprovado",
+                    "data_aprovacao": agora,
+                    "observacoes": observacoes
+                }
+                aprovacoes_sol.append(registro)
+                novas_aprovacoes.append(self._aprovacao_row(numero, registro))
+                if aprovar:
+                    # Aprovação: etapa intermediária "Aprovado" e transição automática para Compra feita
+                    nova_etapa = "Compra feita"
+                    mensagem = f"Solicitação aprovada por {nome_aprovador} - Compra autorizada e realizada"
+                    historico.append({
+                        "etapa": "Aprovado",
+                        "data_entrada": agora,
+                        "usuario": nome_aprovador,
+                        "observacoes": f"Aprovado - {observacoes}"
+                    })
+                else:
+                    nova_etapa = "Reprovado"
+                    mensagem = f"Solicitação reprovada por {nome_aprovador}"
+                historico.append({
+                    "etapa": nova_etapa,
+                    "data_entrada": agora,
+                    "usuario": nome_aprovador,
+                    "observacoes": observacoes
+                })
+
+                updates.append((nova_etapa, nova_etapa, json.dumps(aprovacoes_sol), json.dumps(historico), numero))
+                movimentacoes.append((numero, "Aguardando Aprovação", nova_etapa, nome_aprovador, observacoes))
+                auditoria.append((
+                    aprovador,
+                    "APROVAR_SOLICITACAO" if aprovar else "REPROVAR_SOLICITACAO",
+                    "APROVACOES",
+                    json.dumps({"valor_estimado": atual["valor_estimado"], "observacoes": observacoes, "lote": True}, ensure_ascii=False),
+                    numero,
+                    ip_address
+                ))
+                notificacoes.append(("Solicitante", numero, mensagem, agora))
+                notificacoes.append(("Suprimentos", numero, mensagem, agora))
+                resultados[numero] = {"numero": numero, "sucesso": True, "mensagem": "Aprovada" if aprovar else "Reprovada"}
+
+            if updates:
+                cursor.executemany('''
+                    UPDATE solicitacoes SET status = ?, etapa_atual = ?, aprovacoes = ?, historico_etapas = ?
+                    WHERE numero_solicitacao_estoque = ?
+                ''', updates)
+                cursor.executemany('''
+                    INSERT INTO aprovacoes (numero_solicitacao, nivel, aprovador, nome_aprovador, status, data_aprovacao, observacoes)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', novas_aprovacoes)
+                cursor.executemany('''
+                    INSERT INTO movimentacoes (numero_solicitacao, etapa_origem, etapa_destino, usuario, observacoes)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', movimentacoes)
+                cursor.executemany('''
+                    INSERT INTO auditoria_admin (usuario, acao, modulo, detalhes, solicitacao_id, ip_address)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', auditoria)
+                cursor.executemany(
+                    'INSERT INTO notificacoes (perfil, numero, mensagem, data) VALUES (?, ?, ?, ?)',
+                    notificacoes
+                )
+
+            self.conn.commit()
+            return [resultados[n] for n in numeros]
+        except Exception as e:
+            self.conn.rollback()
+            self.last_error = str(e)
+            print(f"Erro ao registrar aprovações em lote: {e}")
+            return [{"numero": n, "sucesso": False, "mensagem": f"Erro no lote: {e}"} for n in numeros]
+
+    @staticmethod
+    def _load_json_list(valor) -> List:
+        """Desserializa campo JSON de lista, tolerando vazio ou inválido"""
+        try:
+            return json.loads(valor) if valor else []
+        except Exception:
+            return []
+
+    def get_aprovacoes_by_aprovador(self, aprovador: str, limit: int = 10) -> List[Dict]:
+        """Últimas aprovações de um aprovador (range scan em idx_aprovacoes_aprovador_data)"""
+        if not self.db_available or not self.conn:
+            return []
+            
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute('''
+                SELECT a.numero_solicitacao, a.status, a.data_aprovacao, a.observacoes,
+                       s.valor_estimado, s.solicitante
+                FROM aprovacoes a
+                LEFT JOIN solicitacoes s ON s.numero_solicitacao_estoque = a.numero_solicitacao
+                WHERE a.aprovador = ?
+                ORDER BY a.data_aprovacao DESC
+                LIMIT ?
+            ''', (aprovador, limit))
+            return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"Erro ao buscar aprovações: {e}")
+            return []
+    
+    def get_aprovador_stats(self, aprovador: str) -> Dict:
+        """Estatísticas de decisões de um aprovador (consulta indexada por aprovador)"""
+        if not self.db_available or not self.conn:
+            return {}
+            
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute('''
+                SELECT COUNT(*) AS total,
+                       SUM(CASE WHEN a.status = 'Aprovado' THEN 1 ELSE 0 END) AS aprovadas,
+                       SUM(CASE WHEN a.status = 'Reprovado' THEN 1 ELSE 0 END) AS reprovadas,
+                       SUM(CASE WHEN a.status = 'Aprovado' THEN COALESCE(s.valor_estimado, 0) ELSE 0 END) AS valor_aprovado,
+                       MAX(a.data_aprovacao) AS ultima_decisao
+                FROM aprovacoes a
+                LEFT JOIN solicitacoes s ON s.numero_solicitacao_estoque = a.numero_solicitacao
+                WHERE a.aprovador = ?
+            ''', (aprovador,))
+            row = cursor.fetchone()
+            return dict(row) if row else {}
+        except Exception as e:
+            print(f"Erro ao calcular estatísticas do aprovador: {e}")
+            return {}
+    
+    def get_price_benchmarks(self, codigos: List[str]) -> Dict[str, Dict]:
+        """Referências de preço unitário por produto e por fornecedor (range scan em idx_cotacoes_produto_data)
+        
+        Returns:
+            Dict por código: ultimo_preco, ultimo_fornecedor, ultima_data, mediana, total_cotacoes
+            e por_fornecedor ({fornecedor: {ultimo_preco, ultima_data, mediana, total_cotacoes}})
+        """
+        codigos = [c for c in dict.fromkeys(codigos) if c]
+        if not codigos or not self.db_available or not self.conn:
+            return {}
+            
+        try:
+            cursor = self.conn.cursor()
+            precos: Dict[str, List[tuple]] = {}
+            for inicio in range(0, len(codigos), 500):
+                lote = codigos[inicio:inicio + 500]
+                placeholders = ', '.join('?' for _ in lote)
+                cursor.execute(f'''
+                    SELECT codigo_produto, fornecedor, valor_unitario, data_cotacao
+                    FROM cotacoes
+                    WHERE codigo_produto IN ({placeholders})
+                    ORDER BY codigo_produto, data_cotacao DESC
+                ''', lote)
+                for codigo, fornecedor, valor, data in cursor.fetchall():
+                    precos.setdefault(codigo, []).append((fornecedor, valor, data))
+            
+            def resumo(linhas: List[tuple]) -> Dict:
+                # Linhas já em ordem decrescente de data: a primeira é a mais recente
+                return {
+                    "ultimo_preco": linhas[0][1],
+                    "ultima_data": linhas[0][2],
+                    "mediana": statistics.median(l[1] for l in linhas),
+                    "total_cotacoes": len(linhas)
+                }
+            
+            benchmarks = {}
+            for codigo, linhas in precos.items():
+                por_fornecedor: Dict[str, List[tuple]] = {}
+                for linha in linhas:
+                    por_fornecedor.setdefault(linha[0], []).append(linha)
+                benchmarks[codigo] = dict(
+                    resumo(linhas),
+                    ultimo_fornecedor=linhas[0][0],
+                    por_fornecedor={f: resumo(l) for f, l in por_fornecedor.items()}
+                )
+            return benchmarks
+        except Exception as e:
+            print(f"Erro ao calcular referências de preço: {e}")
+            return {}
+    
+    def get_cotacoes_by_fornecedor(self, fornecedor: str, limit: int = 20) -> List[Dict]:
+        """Últimos preços cotados por um fornecedor (range scan em idx_cotacoes_fornecedor_data)"""
+        if not self.db_available or not self.conn:
+            return []
+            
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute('''
+                SELECT numero_solicitacao, codigo_produto, descricao, quantidade, valor_unitario,
+                       valor_total, prazo_entrega, data_cotacao, status
+                FROM cotacoes
+                WHERE fornecedor = ?
+                ORDER BY data_cotacao DESC, id DESC
+                LIMIT ?
+            ''', (fornecedor, limit))
+            return [dict(row) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"Erro ao buscar cotações do fornecedor: {e}")
+            return []
+    
     def get_solicitacao_by_numero(self, numero: int) -> Dict:
         """Busca solicitação por número"""
         if not self.db_available or not self.conn:
@@ -471,17 +1140,7 @@ class LocalDatabaseManager:
             cursor.execute(sql, (numero,))
             row = cursor.fetchone()
             if row:
-                sol = dict(row)
-                # Deserializa campos JSON
-                for field in ['anexos_requisicao', 'cotacoes', 'aprovacoes', 'historico_etapas', 'itens']:
-                    try:
-                        if sol.get(field):
-                            sol[field] = json.loads(sol[field])
-                        else:
-                            sol[field] = []
-                    except:
-                        sol[field] = []
-                return sol
+                return self._row_to_solicitacao(row)
             return {}
         except Exception as e:
             print(f"Erro ao buscar solicitação: {e}")
@@ -622,6 +1281,50 @@ class LocalDatabaseManager:
             print(f"Erro ao buscar próximo número de solicitação: {e}")
             return 1
     
+    def add_notification_event(self, perfil: str, numero: int, mensagem: str) -> bool:
+        """Registra um evento de notificação (um único INSERT; a exibição é feita pelo digest)"""
+        if not self.db_available or not self.conn:
+            return False
+            
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute(
+                'INSERT INTO notificacoes (perfil, numero, mensagem, data) VALUES (?, ?, ?, ?)',
+                (perfil, numero or 0, mensagem, datetime.datetime.now().isoformat())
+            )
+            self.conn.commit()
+            return True
+        except Exception as e:
+            self.conn.rollback()
+            print(f"Erro ao registrar notificação: {e}")
+            return False
+    
+    def get_latest_digest(self, perfil: str, destinatarios: List[str] = None) -> Dict:
+        """Último digest do perfil (ou do solicitante) via idx_notificacoes_digest_perfil"""
+        if not self.db_available or not self.conn:
+            return {}
+            
+        destinatarios = [d for d in destinatarios or [] if d] or ['']
+        try:
+            cursor = self.conn.cursor()
+            placeholders = ', '.join('?' for _ in destinatarios)
+            cursor.execute(f'''
+                SELECT perfil, destinatario, periodo_inicio, periodo_fim, eventos, conteudo
+                FROM notificacoes_digest
+                WHERE perfil = ? AND destinatario IN ({placeholders})
+                ORDER BY periodo_fim DESC
+                LIMIT 1
+            ''', [perfil] + destinatarios)
+            row = cursor.fetchone()
+            if not row:
+                return {}
+            digest = dict(row)
+            digest.update(json.loads(digest.pop('conteudo') or '{}'))
+            return digest
+        except Exception as e:
+            print(f"Erro ao buscar digest de notificações: {e}")
+            return {}
+    
     def log_admin_action(self, usuario: str, acao: str, modulo: str, detalhes: str = None, solicitacao_id: int = None, ip_address: str = None):
         """Registra ação do Admin para auditoria"""
         if not self.db_available or not self.conn:
@@ -656,6 +1359,14 @@ class LocalDatabaseManager:
             print(f"Erro ao buscar logs de auditoria: {e}")
             return []
     
+    def reconnect(self):
+        """Reabre a conexão (ex.: após restauração do arquivo do banco) mantendo a mesma instância"""
+        self.close()
+        self.conn = None
+        self.db_available = False
+        self.setup_database()
+        return self.db_available
+    
     def close(self):
         """Fecha conexão"""
         if self.conn:
@@ -0,0 +1,357 @@
+"""
+Backends de banco do LocalDatabaseManager: SQLite (padrão) e PostgreSQL
+
+Selecionado pela variável DB_BACKEND ("sqlite" ou "postgresql"). O gerenciador continua
+escrito no dialeto SQLite (placeholders ?, INSERT OR REPLACE/IGNORE, BEGIN IMMEDIATE)
+sobre uma conexão com a interface do sqlite3. No PostgreSQL essa conexão é uma fachada
+sobre um pool psycopg2 que traduz os comandos e empresta conexões por operação:
+- leituras fora de transação pegam uma conexão do pool, buscam as linhas e a devolvem;
+- escritas (ou BEGIN) prendem uma conexão à thread até o commit()/rollback().
+Leituras grandes usam cursores do lado do servidor (stream) e cargas em massa, COPY.
+
+PostgreSQL: DATABASE_URL ou as variáveis padrão da libpq (PGHOST, PGPORT, PGDATABASE,
+PGUSER, PGPASSWORD, geradas por setup_postgres_fallback.py); tamanho do pool em
+DB_POOL_MIN/DB_POOL_MAX. Cada instância do Streamlit tem o seu pool.
+"""
+
+import io
+import os
+import re
+import sqlite3
+import threading
+import uuid
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Sequence
+
+# Chave de conflito usada ao traduzir INSERT OR REPLACE para ON CONFLICT ... DO UPDATE
+CHAVES_UPSERT = {
+    "configuracoes": "chave",
+    "sessoes": "id",
+}
+
+_RE_UPSERT = re.compile(r"^\s*INSERT\s+OR\s+REPLACE\s+INTO\s+(\w+)\s*\(([^)]*)\)", re.IGNORECASE)
+_RE_IGNORE = re.compile(r"^\s*INSERT\s+OR\s+IGNORE\s+INTO", re.IGNORECASE)
+_RE_TIPOS = [
+    (re.compile(r"\bINTEGER\s+PRIMARY\s+KEY\s+AUTOINCREMENT\b", re.IGNORECASE), "SERIAL PRIMARY KEY"),
+    (re.compile(r"\bDATETIME\b", re.IGNORECASE), "TIMESTAMP"),
+    # REAL no PostgreSQL tem 6 dígitos de precisão; valores monetários precisam de double
+    (re.compile(r"\bREAL\b", re.IGNORECASE), "DOUBLE PRECISION"),
+]
+_COMANDOS_LEITURA = ("SELECT", "WITH", "EXPLAIN", "SHOW")
+# Literais '...' (com '' escapado) e identificadores "..." não passam pelas substituições
+_RE_QUOTADO = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")")
+
+
+@lru_cache(maxsize=1024)
+def traduzir_sql(sql: str, com_parametros: bool = True) -> str:
+    """Converte um comando no dialeto SQLite usado pelo gerenciador para o PostgreSQL"""
+    texto = sql.strip().rstrip(';')
+    upsert = _RE_UPSERT.match(texto)
+    if upsert:
+        tabela = upsert.group(1)
+        colunas = [c.strip() for c in upsert.group(2).split(',')]
+        chave = CHAVES_UPSERT[tabela]
+        atualizacoes = ', '.join(f"{c} = EXCLUDED.{c}" for c in colunas if c != chave)
+        texto = (f"INSERT INTO {tabela} ({', '.join(colunas)}){texto[upsert.end():]} "
+                 f"ON CONFLICT ({chave}) DO UPDATE SET {atualizacoes}")
+    elif _RE_IGNORE.match(texto):
+        texto = _RE_IGNORE.sub("INSERT INTO", texto, count=1) + " ON CONFLICT DO NOTHING"
+    partes = _RE_QUOTADO.split(texto)
+    # Índices pares: trechos de código; ímpares: literais/identificadores entre aspas
+    for i in range(0, len(partes), 2):
+        for padrao, substituto in _RE_TIPOS:
+            partes[i] = padrao.sub(substituto, partes[i])
+    if com_parametros:
+        # O psycopg2 formata o comando inteiro: '%' é escapado também dentro dos literais
+        partes = [parte.replace('%', '%%') for parte in partes]
+        for i in range(0, len(partes), 2):
+            partes[i] = partes[i].replace('?', '%s')
+    return ''.join(partes)
+
+
+def _comando(sql: str) -> str:
+    partes = sql.split(None, 1)
+    return partes[0].upper() if partes else ""
+
+
+class SQLiteBackend:
+    """Arquivo SQLite local (uma conexão compartilhada, como antes)"""
+
+    nome = "sqlite"
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+
+    def connect(self) -> sqlite3.Connection:
+        # Garante que o diretório existe
+        db_dir = os.path.dirname(os.path.abspath(self.db_path))
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir, exist_ok=True)
+
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row  # Equivalente ao RealDictCursor
+        conn.execute('PRAGMA foreign_keys = ON')
+        return conn
+
+    def descricao(self) -> str:
+        return f"SQLite: {os.path.abspath(self.db_path)}"
+
+    def colunas(self, cursor, tabela: str) -> List[str]:
+        cursor.execute(f'PRAGMA table_info({tabela})')
+        return [row[1] for row in cursor.fetchall()]
+
+    def dias_entre(self, fim: str, inicio: str) -> str:
+        """Fragmento SQL com a diferença em dias (fracionários) entre duas datas ISO"""
+        return f"(julianday({fim}) - julianday({inicio}))"
+
+    def plano(self, conn, sql: str, params: Sequence = None) -> List[str]:
+        """Plano de execução do comando (EXPLAIN QUERY PLAN), uma linha por nó"""
+        cursor = conn.cursor()
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params if params is not None else ())
+        return [row[3] for row in cursor.fetchall()]
+
+    def stream(self, conn, sql: str, params: Sequence = (), tamanho_lote: int = 1000) -> Iterator:
+        """Itera o resultado em lotes de tamanho_lote (o cursor do sqlite3 já é incremental)"""
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        while True:
+            linhas = cursor.fetchmany(tamanho_lote)
+            if not linhas:
+                break
+            yield from linhas
+
+    def bulk_insert(self, cursor, tabela: str, colunas: Sequence[str], linhas: Iterable[Sequence],
+                    ignorar_conflitos: bool = False) -> int:
+        """Carga em massa na transação do cursor; retorna as linhas inseridas"""
+        linhas = list(linhas)
+        if not linhas:
+            return 0
+        cursor.executemany(
+            f"INSERT {'OR IGNORE ' if ignorar_conflitos else ''}INTO {tabela} ({', '.join(colunas)}) "
+            f"VALUES ({', '.join('?' for _ in colunas)})",
+            linhas
+        )
+        return cursor.rowcount
+
+
+class PostgresBackend:
+    """PostgreSQL com pool de conexões psycopg2 (ThreadedConnectionPool)"""
+
+    nome = "postgresql"
+
+    def __init__(self, dsn: str = None, minconn: int = None, maxconn: int = None):
+        import psycopg2.extras
+        import psycopg2.pool
+
+        self.dsn = os.getenv('DATABASE_URL', '') if dsn is None else dsn
+        self.pool = psycopg2.pool.ThreadedConnectionPool(
+            minconn or int(os.getenv('DB_POOL_MIN', '1')),
+            maxconn or int(os.getenv('DB_POOL_MAX', '10')),
+            self.dsn,
+            client_encoding='UTF8',
+            # DictRow aceita row[0], row['coluna'] e dict(row), como o sqlite3.Row
+            cursor_factory=psycopg2.extras.DictCursor
+        )
+
+    def connect(self) -> "ConexaoPool":
+        return ConexaoPool(self)
+
+    def descricao(self) -> str:
+        conn = self.pool.getconn()
+        try:
+            parametros = conn.get_dsn_parameters()
+        finally:
+            self.pool.putconn(conn)
+        return f"PostgreSQL: {parametros.get('host', 'local')}:{parametros.get('port', '5432')}/{parametros.get('dbname', '')}"
+
+    def colunas(self, cursor, tabela: str) -> List[str]:
+        cursor.execute('SELECT column_name FROM information_schema.columns WHERE table_name = ?', (tabela,))
+        return [row[0] for row in cursor.fetchall()]
+
+    def dias_entre(self, fim: str, inicio: str) -> str:
+        """Fragmento SQL com a diferença em dias; datas fora do formato ISO resultam em NULL (como no julianday)"""
+        return (f"(CASE WHEN {inicio} ~ '^[0-9]{{4}}-[0-9]{{2}}-[0-9]{{2}}' "
+                f"THEN EXTRACT(EPOCH FROM CAST({fim} AS TIMESTAMP) - CAST({inicio} AS TIMESTAMP)) / 86400 END)")
+
+    def plano(self, conn, sql: str, params: Sequence = None) -> List[str]:
+        """Plano de execução do comando (EXPLAIN, sem executá-lo), uma linha por nó"""
+        pg = self.pool.getconn()
+        try:
+            with pg.cursor() as cursor:
+                cursor.execute(f"EXPLAIN {traduzir_sql(sql, params is not None)}", params)
+                return [row[0] for row in cursor.fetchall()]
+        finally:
+            pg.rollback()
+            self.pool.putconn(pg, close=bool(pg.closed))
+
+    def stream(self, conn, sql: str, params: Sequence = (), tamanho_lote: int = 1000) -> Iterator:
+        """Itera o resultado com um cursor do lado do servidor (tamanho_lote linhas por ida ao banco)"""
+        pg = self.pool.getconn()
+        try:
+            with pg.cursor(name=f"stream_{uuid.uuid4().hex}") as cursor:
+                cursor.itersize = tamanho_lote
+                cursor.execute(traduzir_sql(sql, bool(params)), params or None)
+                yield from cursor
+        finally:
+            pg.rollback()
+            self.pool.putconn(pg)
+
+    def bulk_insert(self, cursor, tabela: str, colunas: Sequence[str], linhas: Iterable[Sequence],
+                    ignorar_conflitos: bool = False) -> int:
+        """Carga em massa via COPY na transação do cursor; com conflitos ignorados, passa por tabela temporária"""
+        buffer = io.StringIO()
+        quantidade = 0
+        for linha in linhas:
+            buffer.write('\t'.join(_valor_copy(v) for v in linha) + '\n')
+            quantidade += 1
+        if not quantidade:
+            return 0
+        buffer.seek(0)
+        lista = ', '.join(colunas)
+        pg = cursor.conexao.transacao()
+        with pg.cursor() as raw:
+            if not ignorar_conflitos:
+                raw.copy_expert(f"COPY {tabela} ({lista}) FROM STDIN", buffer)
+                return quantidade
+            temporaria = f"_copia_{tabela}"
+            raw.execute(f"CREATE TEMP TABLE IF NOT EXISTS {temporaria} (LIKE {tabela} INCLUDING DEFAULTS) ON COMMIT DROP")
+            raw.execute(f"TRUNCATE {temporaria}")
+            raw.copy_expert(f"COPY {temporaria} ({lista}) FROM STDIN", buffer)
+            raw.execute(f"INSERT INTO {tabela} ({lista}) SELECT {lista} FROM {temporaria} ON CONFLICT DO NOTHING")
+            return raw.rowcount
+
+
+def _valor_copy(valor) -> str:
+    """Valor no formato texto do COPY (\\N = NULL)"""
+    if valor is None:
+        return '\\N'
+    if isinstance(valor, bool):
+        return 't' if valor else 'f'
+    if hasattr(valor, 'isoformat'):
+        valor = valor.isoformat()
+    return (str(valor).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+class ConexaoPool:
+    """Conexão com a interface do sqlite3 sobre o pool (no máximo uma transação aberta por thread)"""
+
+    def __init__(self, backend: PostgresBackend):
+        self.backend = backend
+        self._local = threading.local()
+
+    def atual(self):
+        """Conexão da transação aberta pela thread (None fora de transação)"""
+        return getattr(self._local, 'conn', None)
+
+    def transacao(self):
+        """Conexão da transação da thread, emprestando uma do pool se necessário"""
+        conn = self.atual()
+        if conn is None:
+            conn = self._local.conn = self.backend.pool.getconn()
+        return conn
+
+    def cursor(self) -> "CursorPool":
+        return CursorPool(self)
+
+    def execute(self, sql: str, params: Sequence = None) -> "CursorPool":
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql: str, seq_params: Iterable[Sequence]) -> "CursorPool":
+        return self.cursor().executemany(sql, seq_params)
+
+    def commit(self):
+        self._encerrar('commit')
+
+    def rollback(self):
+        self._encerrar('rollback')
+
+    def _encerrar(self, acao: str):
+        conn = self.atual()
+        if conn is None:
+            return
+        self._local.conn = None
+        try:
+            getattr(conn, acao)()
+        finally:
+            self.backend.pool.putconn(conn, close=bool(conn.closed))
+
+    def close(self):
+        self.backend.pool.closeall()
+
+
+class CursorPool:
+    """Cursor com a interface do sqlite3; as linhas são buscadas de uma vez e a conexão é liberada"""
+
+    def __init__(self, conexao: ConexaoPool):
+        self.conexao = conexao
+        self.rowcount = -1
+        self.description = None
+        self._linhas: List = []
+        self._posicao = 0
+
+    def execute(self, sql: str, params: Sequence = None) -> "CursorPool":
+        comando = _comando(sql)
+        if comando == 'BEGIN':
+            # BEGIN / BEGIN IMMEDIATE: psycopg2 abre a transação no primeiro comando
+            self.conexao.transacao()
+            return self
+        texto = traduzir_sql(sql, params is not None)
+        if self.conexao.atual() is None and comando in _COMANDOS_LEITURA:
+            pg = self.conexao.backend.pool.getconn()
+            try:
+                self._executar(pg, texto, params)
+            finally:
+                pg.rollback()
+                self.conexao.backend.pool.putconn(pg, close=bool(pg.closed))
+        else:
+            self._executar(self.conexao.transacao(), texto, params)
+        return self
+
+    def executemany(self, sql: str, seq_params: Iterable[Sequence]) -> "CursorPool":
+        with self.conexao.transacao().cursor() as cursor:
+            cursor.executemany(traduzir_sql(sql), seq_params)
+            self.rowcount = cursor.rowcount
+        self.description = None
+        self._linhas, self._posicao = [], 0
+        return self
+
+    def _executar(self, pg, texto: str, params):
+        with pg.cursor() as cursor:
+            cursor.execute(texto, params)
+            self.rowcount = cursor.rowcount
+            self.description = cursor.description
+            self._linhas = cursor.fetchall() if cursor.description else []
+            self._posicao = 0
+
+    def fetchone(self):
+        if self._posicao >= len(self._linhas):
+            return None
+        self._posicao += 1
+        return self._linhas[self._posicao - 1]
+
+    def fetchmany(self, size: int = 1) -> List:
+        linhas = self._linhas[self._posicao:self._posicao + size]
+        self._posicao += len(linhas)
+        return linhas
+
+    def fetchall(self) -> List:
+        linhas = self._linhas[self._posicao:]
+        self._posicao = len(self._linhas)
+        return linhas
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def close(self):
+        self._linhas = []
+
+
+def criar_backend(db_path: str):
+    """Backend configurado em DB_BACKEND (padrão: sqlite)"""
+    nome = os.getenv('DB_BACKEND', 'sqlite').strip().lower()
+    if nome in ('postgresql', 'postgres', 'pg'):
+        return PostgresBackend()
+    if nome != 'sqlite':
+        raise ValueError(f"DB_BACKEND inválido: {nome} (use sqlite ou postgresql)")
+    return SQLiteBackend(db_path)
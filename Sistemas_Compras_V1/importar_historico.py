@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Importação do histórico de compras a partir de planilhas no formato "Compras_SLA .xlsx"
+
+A planilha é lida em streaming (openpyxl read_only), aba por aba: cada aba corresponde
+a uma etapa do fluxo e a primeira linha traz os cabeçalhos, convertidos em colunas de
+solicitacoes pelo mapeamento (MAPEAMENTO_PADRAO, extensível via --mapeamento). As linhas
+são normalizadas e validadas em lotes com pandas; cada lote é gravado em carga em massa
+(executemany no SQLite, COPY no PostgreSQL) em uma transação que também registra o
+checkpoint (última linha importada da aba), então uma importação interrompida continua
+de onde parou.
+
+Linhas com "Nº Solicitação (Estoque)" mantêm o número; números já existentes no banco
+são ignorados (INSERT OR IGNORE). Linhas sem número ficam em importacao_pendentes (na
+mesma transação do lote) e, ao fim da planilha, recebem uma única faixa MAX + 1 ... MAX + n,
+acima de todos os números históricos, em um INSERT ... SELECT. Cada uma leva uma chave
+estável (aba, linha e hash do conteúdo) registrada em importacao_origens ao ser numerada,
+então reimportar a planilha (--reiniciar) não as numera de novo.
+
+Uso:
+    python3 importar_historico.py "Compras_SLA .xlsx" [--mapeamento mapa.json] [--lote 5000]
+    python3 importar_historico.py historico_2023.xlsx --abas "Pedido Finalizado" --rejeitados rejeitados.csv
+    python3 importar_historico.py historico_2023.xlsx --reiniciar
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from database_local import PRIORIDADE_RANK, PRIORIDADE_RANK_PADRAO
+from validacoes_sistema import ValidadorSistema
+
+LOTE_PADRAO = 5000
+
+# Cabeçalho da planilha -> coluna de solicitacoes (None = coluna ignorada)
+MAPEAMENTO_PADRAO = {
+    "Carimbo de data/hora": "carimbo_data_hora",
+    "Solicitante": "solicitante",
+    "Solicitante ( Nome e Sobrenome)": "solicitante",
+    "Departamento": "departamento",
+    "Prioridade": "prioridade",
+    "Descrição": "descricao",
+    "Aplicação": "local_aplicacao",
+    # Status da planilha é texto livre (Pendente/Finalizado); o sistema usa a etapa da aba
+    "Status": None,
+    "Nº Solicitação (Estoque)": "numero_solicitacao_estoque",
+    "Nº Pedido (Compras)": "numero_pedido_compras",
+    "Data Nº Pedido": "data_numero_pedido",
+    "Data cotação": "data_cotacao",
+    "Data entrega": "data_entrega",
+    "SLA (dias)": "sla_dias",
+    "Dias Atendimento": "dias_atendimento",
+    "SLA Cumprido?": "sla_cumprido",
+    "Observações": "observacoes",
+}
+
+# Aba da planilha -> etapa_atual; abas fora do mapa usam --etapa-padrao
+ETAPA_POR_ABA = {
+    "Solicitação": "Solicitação",
+    "Suprimentos": "Suprimentos",
+    "Em Cotação": "Em Cotação",
+    "Pedido Finalizado": "Pedido Finalizado",
+}
+ETAPA_PADRAO = "Pedido Finalizado"
+
+# Mesmos valores de app.SLA_PADRAO, usados quando a planilha não traz o SLA
+SLA_PADRAO = {"Urgente": 1, "Alta": 2, "Normal": 3, "Baixa": 5}
+
+# Grafias encontradas nas planilhas antigas (comparação sem caixa)
+PRIORIDADE_ALIAS = {nome.lower(): nome for nome in PRIORIDADE_RANK}
+PRIORIDADE_ALIAS.update({"nomal": "Normal", "média": "Normal", "media": "Normal"})
+
+CAMPOS_NUMERICOS = ["numero_solicitacao_estoque", "numero_pedido_compras", "sla_dias", "dias_atendimento"]
+CAMPOS_DATA = ["data_numero_pedido", "data_cotacao", "data_entrega"]
+CAMPOS_TEXTO = ["solicitante", "departamento", "descricao", "local_aplicacao", "sla_cumprido", "observacoes"]
+
+COLUNAS_INSERT = [
+    "numero_solicitacao_estoque", "numero_pedido_compras", "solicitante", "departamento",
+    "descricao", "prioridade", "prioridade_rank", "local_aplicacao", "status", "etapa_atual",
+    "carimbo_data_hora", "data_numero_pedido", "data_cotacao", "data_entrega", "sla_dias",
+    "dias_atendimento", "sla_cumprido", "observacoes", "anexos_requisicao", "cotacoes",
+    "aprovacoes", "historico_etapas", "itens",
+]
+# Linhas válidas sem número aguardando a alocação da faixa ao fim da planilha
+# (mesmos tipos de solicitacoes, sem as restrições)
+SQL_CRIAR_PENDENTES = (
+    f"CREATE TABLE IF NOT EXISTS importacao_pendentes AS "
+    f"SELECT '' AS arquivo, '' AS chave_origem, {', '.join(COLUNAS_INSERT[1:])} FROM solicitacoes WHERE 1 = 0"
+)
+# Linhas sem número já numeradas (chave_origem -> número alocado)
+SQL_CRIAR_ORIGENS = (
+    "CREATE TABLE IF NOT EXISTS importacao_origens ("
+    "chave_origem TEXT PRIMARY KEY, numero_solicitacao_estoque INTEGER NOT NULL)"
+)
+
+CONFIG_CHECKPOINT = "importacao_historico:{arquivo}:{aba}"
+
+
+def carregar_mapeamento(caminho: Optional[str]) -> Dict[str, Optional[str]]:
+    """MAPEAMENTO_PADRAO com os ajustes do arquivo JSON ({"Cabeçalho": "coluna" | null})"""
+    mapeamento = dict(MAPEAMENTO_PADRAO)
+    if caminho:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            mapeamento.update(json.load(f))
+    return mapeamento
+
+
+def _texto(valor) -> Optional[str]:
+    """Texto da célula; números inteiros gravados como float pelo Excel (229.0) viram '229'"""
+    if valor is None:
+        return None
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    texto = str(valor).strip()
+    return texto or None
+
+
+def chave_origem(aba: str, linha: int, registro: Dict) -> str:
+    """Chave estável de uma linha da planilha: aba, número da linha e hash do conteúdo"""
+    conteudo = json.dumps(registro, sort_keys=True, default=str, ensure_ascii=False)
+    return f"{aba}:{linha}:{hashlib.sha256(conteudo.encode('utf-8')).hexdigest()[:16]}"
+
+
+def _datas_iso(coluna: pd.Series) -> pd.Series:
+    """Células datetime ou texto (dd/mm/aaaa) convertidas para ISO; inválidas viram None"""
+    datas = pd.to_datetime(coluna, errors='coerce', dayfirst=True, format='mixed')
+    return datas.map(lambda d: d.isoformat(), na_action='ignore').astype(object).where(datas.notna(), None)
+
+
+def preparar_lote(df: pd.DataFrame, etapa: str) -> Tuple[pd.DataFrame, pd.Series]:
+    """
+    Normaliza e valida um lote de linhas já mapeadas para as colunas de solicitacoes
+
+    O histórico não passa pelas regras do formulário (tamanho mínimo da descrição, lista
+    fechada de departamentos), que recusariam registros legítimos; exige apenas o que o
+    schema exige: solicitante e descrição (checagem de obrigatórios de
+    ValidadorSistema.validar_solicitacoes_lote) e carimbo de data/hora válido.
+
+    Returns:
+        Tuple[pd.DataFrame, pd.Series]: (linhas válidas prontas para inserir, motivo por linha rejeitada)
+    """
+    df = df.reindex(columns=sorted(set(df.columns) | set(CAMPOS_TEXTO + CAMPOS_NUMERICOS + CAMPOS_DATA)
+                                   | {"prioridade", "carimbo_data_hora"}))
+    for campo in CAMPOS_TEXTO:
+        df[campo] = df[campo].map(_texto, na_action='ignore').astype(object).where(df[campo].notna(), None)
+    for campo in CAMPOS_NUMERICOS:
+        df[campo] = pd.to_numeric(df[campo], errors='coerce').round().astype('Int64')
+    for campo in CAMPOS_DATA:
+        df[campo] = _datas_iso(df[campo])
+    carimbo = _datas_iso(df['carimbo_data_hora'])
+
+    prioridade = df['prioridade'].astype('string').str.strip().str.lower().map(PRIORIDADE_ALIAS)
+    df['prioridade'] = prioridade.fillna("Normal").astype(object)
+    df['prioridade_rank'] = df['prioridade'].map(PRIORIDADE_RANK).fillna(PRIORIDADE_RANK_PADRAO).astype(int)
+    df['sla_dias'] = df['sla_dias'].fillna(df['prioridade'].map(SLA_PADRAO).astype('Int64'))
+    df['departamento'] = df['departamento'].fillna('')
+    df['local_aplicacao'] = df['local_aplicacao'].fillna('')
+    df['carimbo_data_hora'] = carimbo
+    df['status'] = etapa
+    df['etapa_atual'] = etapa
+    for campo in ["anexos_requisicao", "cotacoes", "aprovacoes", "historico_etapas", "itens"]:
+        df[campo] = "[]"
+
+    _, motivo = ValidadorSistema.validar_solicitacoes_lote(
+        df, campos=['solicitante', 'descricao'], apenas_obrigatorios=True
+    )
+    sem_carimbo = carimbo.isna().to_numpy(dtype=bool)
+    motivo[sem_carimbo] = (motivo[sem_carimbo] + "; Carimbo de data/hora inválido").str.lstrip('; ')
+    valido = motivo == ""
+    return df.loc[valido, COLUNAS_INSERT].copy(), motivo[~valido]
+
+
+def _linhas(ws, inicio: int, colunas: List[Tuple[int, str]]) -> Iterator[Tuple[int, Dict]]:
+    """Percorre a aba a partir da linha inicio, ignorando linhas vazias"""
+    for numero_linha, valores in enumerate(ws.iter_rows(min_row=inicio, values_only=True), start=inicio):
+        if not any(v is not None and v != "" for v in valores):
+            continue
+        yield numero_linha, {campo: valores[i] if i < len(valores) else None for i, campo in colunas}
+
+
+def _gravar_lote(db, linhas: pd.DataFrame, origens: pd.Series, arquivo: str, chave_checkpoint: str,
+                 ultima_linha: int) -> Tuple[int, int]:
+    """
+    Insere o lote e grava o checkpoint em uma única transação
+
+    Linhas sem número cuja chave (origens, indexada pela linha da planilha) já está em
+    importacao_origens foram numeradas em uma importação anterior e não voltam a pendentes.
+
+    Returns:
+        Tuple[int, int]: (inseridas com número da planilha, enviadas para importacao_pendentes)
+    """
+    conn = db.conn
+    cursor = conn.cursor()
+    try:
+        cursor.execute('BEGIN IMMEDIATE')
+        valores = linhas.astype(object).where(linhas.notna(), None)
+        sem_numero = linhas['numero_solicitacao_estoque'].isna()
+        inseridas = db.backend.bulk_insert(
+            cursor, 'solicitacoes', COLUNAS_INSERT,
+            valores[~sem_numero].itertuples(index=False, name=None), ignorar_conflitos=True
+        )
+        pendentes = db.backend.bulk_insert(cursor, 'importacao_pendentes', ['arquivo', 'chave_origem'] + COLUNAS_INSERT[1:], (
+            (arquivo, origem) + linha for origem, linha in zip(
+                origens.loc[linhas.index[sem_numero.to_numpy()]],
+                valores.loc[sem_numero, COLUNAS_INSERT[1:]].itertuples(index=False, name=None))
+        ))
+        if pendentes:
+            cursor.execute('''
+                DELETE FROM importacao_pendentes
+                WHERE arquivo = ? AND chave_origem IN (SELECT chave_origem FROM importacao_origens)
+            ''', (arquivo,))
+            pendentes -= cursor.rowcount
+        cursor.execute('INSERT OR REPLACE INTO configuracoes (chave, valor) VALUES (?, ?)',
+                       (chave_checkpoint, str(ultima_linha)))
+        conn.commit()
+        return inseridas, pendentes
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def alocar_pendentes(conn, arquivo: str) -> Tuple[int, int]:
+    """
+    Numera as linhas pendentes da planilha com a faixa MAX + 1 ... MAX + n, as move para
+    solicitacoes e registra as chaves em importacao_origens (pendências de outras
+    planilhas, ainda em importação, ficam onde estão)
+
+    Returns:
+        Tuple[int, int]: (primeiro número alocado, quantidade); (0, 0) sem pendências
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.execute('SELECT COALESCE(MAX(numero_solicitacao_estoque), 0) FROM solicitacoes')
+        inicio = cursor.fetchone()[0] + 1
+        colunas = ', '.join(COLUNAS_INSERT[1:])
+        # Ordem determinística: as duas consultas precisam alocar os mesmos números
+        numero = "? - 1 + ROW_NUMBER() OVER (ORDER BY carimbo_data_hora, chave_origem)"
+        cursor.execute(f'''
+            INSERT INTO solicitacoes (numero_solicitacao_estoque, {colunas})
+            SELECT {numero}, {colunas}
+            FROM importacao_pendentes WHERE arquivo = ?
+        ''', (inicio, arquivo))
+        quantidade = cursor.rowcount
+        cursor.execute(f'''
+            INSERT INTO importacao_origens (chave_origem, numero_solicitacao_estoque)
+            SELECT chave_origem, numero FROM (
+                SELECT chave_origem, {numero} AS numero
+                FROM importacao_pendentes WHERE arquivo = ?
+            ) alocadas
+            WHERE chave_origem IS NOT NULL
+        ''', (inicio, arquivo))
+        cursor.execute('DELETE FROM importacao_pendentes WHERE arquivo = ?', (arquivo,))
+        conn.commit()
+        return (inicio, quantidade) if quantidade > 0 else (0, 0)
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def importar_aba(db, ws, arquivo: str, mapeamento: Dict, etapa: str, lote: int = LOTE_PADRAO,
+                 reiniciar: bool = False, rejeitados: Optional[csv.writer] = None) -> Dict:
+    """
+    Importa uma aba em lotes a partir do checkpoint (arquivo: nome da planilha, sem diretório)
+
+    Returns:
+        Dict com lidas, inseridas, sem_numero (aguardando alocação), ignoradas (número já
+        existente) e rejeitadas
+    """
+    cabecalho = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), ())
+    colunas = [(i, mapeamento[str(nome).strip()]) for i, nome in enumerate(cabecalho)
+               if nome is not None and mapeamento.get(str(nome).strip())]
+    resumo = {"lidas": 0, "inseridas": 0, "sem_numero": 0, "ignoradas": 0, "rejeitadas": 0}
+    if not colunas:
+        print(f"⚠️ Aba '{ws.title}' sem cabeçalhos reconhecidos; ignorada")
+        return resumo
+
+    chave = CONFIG_CHECKPOINT.format(arquivo=arquivo, aba=ws.title)
+    checkpoint = 1 if reiniciar else int(db.get_config(chave, "1"))
+    if checkpoint > 1:
+        print(f"↪️ Aba '{ws.title}': retomando após a linha {checkpoint}")
+
+    def gravar(numeros: List[int], registros: List[Dict], ultima_linha: int):
+        df = pd.DataFrame(registros, index=numeros)
+        validas, motivos = preparar_lote(df, etapa)
+        origens = pd.Series([chave_origem(ws.title, linha, registro) for linha, registro in zip(numeros, registros)],
+                            index=numeros)
+        inseridas, sem_numero = _gravar_lote(db, validas, origens, arquivo, chave, ultima_linha)
+        if rejeitados is not None:
+            rejeitados.writerows((ws.title, linha, motivo) for linha, motivo in motivos.items())
+        resumo["lidas"] += len(df)
+        resumo["inseridas"] += inseridas
+        resumo["sem_numero"] += sem_numero
+        resumo["ignoradas"] += len(validas) - sem_numero - inseridas
+        resumo["rejeitadas"] += len(motivos)
+
+    numeros, registros = [], []
+    for numero_linha, registro in _linhas(ws, checkpoint + 1, colunas):
+        numeros.append(numero_linha)
+        registros.append(registro)
+        if len(registros) >= lote:
+            gravar(numeros, registros, numero_linha)
+            print(f"   {ws.title}: linha {numero_linha} ({resumo['inseridas']} inseridas)")
+            numeros, registros = [], []
+    if registros:
+        gravar(numeros, registros, numeros[-1])
+    return resumo
+
+
+def importar_planilha(db, arquivo: str, mapeamento: Dict = None, abas: List[str] = None,
+                      etapa_padrao: str = ETAPA_PADRAO, lote: int = LOTE_PADRAO,
+                      reiniciar: bool = False, arquivo_rejeitados: str = None) -> Tuple[Dict, Tuple[int, int]]:
+    """
+    Importa todas as abas (ou as informadas) da planilha e numera as linhas sem número
+
+    Returns:
+        Tuple[Dict, Tuple[int, int]]: (resumo por aba, (primeiro número alocado, quantidade))
+    """
+    mapeamento = mapeamento or dict(MAPEAMENTO_PADRAO)
+    nome = os.path.basename(arquivo)
+    cursor = db.conn.cursor()
+    cursor.execute(SQL_CRIAR_PENDENTES)
+    cursor.execute(SQL_CRIAR_ORIGENS)
+    # Migração: pendências gravadas antes da chave de origem
+    if 'chave_origem' not in db.backend.colunas(cursor, 'importacao_pendentes'):
+        cursor.execute('ALTER TABLE importacao_pendentes ADD COLUMN chave_origem TEXT')
+    if reiniciar:
+        db.conn.execute('DELETE FROM importacao_pendentes WHERE arquivo = ?', (nome,))
+    db.conn.commit()
+    wb = load_workbook(arquivo, read_only=True, data_only=True)
+    saida = open(arquivo_rejeitados, 'a', newline='', encoding='utf-8') if arquivo_rejeitados else None
+    try:
+        rejeitados = csv.writer(saida) if saida else None
+        resultado = {}
+        for ws in wb.worksheets:
+            if abas and ws.title not in abas:
+                continue
+            etapa = ETAPA_POR_ABA.get(ws.title, etapa_padrao)
+            resultado[ws.title] = importar_aba(db, ws, nome, mapeamento, etapa, lote, reiniciar, rejeitados)
+        # Só depois de todas as abas: a faixa fica acima de qualquer número histórico
+        return resultado, alocar_pendentes(db.conn, nome)
+    finally:
+        wb.close()
+        if saida:
+            saida.close()
+
+
+def main():
+    """Ponto de entrada para execução via CLI"""
+    parser = argparse.ArgumentParser(description="Importa o histórico de compras de planilhas Compras_SLA.xlsx")
+    parser.add_argument("arquivo", help="Planilha .xlsx")
+    parser.add_argument("--mapeamento", help="JSON com ajustes do mapeamento {\"Cabeçalho\": \"coluna\" | null}")
+    parser.add_argument("--abas", nargs="+", help="Importa apenas estas abas")
+    parser.add_argument("--etapa-padrao", default=ETAPA_PADRAO,
+                        help=f"Etapa das abas fora de ETAPA_POR_ABA (padrão: {ETAPA_PADRAO})")
+    parser.add_argument("--lote", type=int, default=LOTE_PADRAO, help=f"Linhas por transação (padrão: {LOTE_PADRAO})")
+    parser.add_argument("--reiniciar", action="store_true", help="Ignora os checkpoints e lê as abas desde o início")
+    parser.add_argument("--rejeitados", help="CSV (aba, linha, motivo) das linhas rejeitadas")
+    args = parser.parse_args()
+
+    from database_local import get_local_database
+    db = get_local_database()
+    if not db.db_available:
+        print(f"❌ Banco indisponível: {db.last_error}")
+        return False
+
+    inicio = time.time()
+    try:
+        resultado, (primeiro, alocados) = importar_planilha(db, args.arquivo, carregar_mapeamento(args.mapeamento), args.abas,
+                                      args.etapa_padrao, args.lote, args.reiniciar, args.rejeitados)
+    except Exception as e:
+        print(f"❌ Importação interrompida: {e} (execute novamente para retomar do último checkpoint)")
+        return False
+
+    for aba, resumo in resultado.items():
+        print(f"📄 {aba}: {resumo['lidas']} lidas, {resumo['inseridas']} inseridas, "
+              f"{resumo['sem_numero']} sem número, {resumo['ignoradas']} já existentes, "
+              f"{resumo['rejeitadas']} rejeitadas")
+    if alocados:
+        print(f"🔢 {alocados} solicitação(ões) sem número numerada(s) de {primeiro} a {primeiro + alocados - 1}")
+    print(f"✅ Importação concluída em {time.time() - inicio:.1f}s")
+    return True
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main() else 1)
@@ -0,0 +1,251 @@
+"""
+Armazenamento JSON do modo offline (fallback quando o banco está indisponível)
+
+O estado fica em um snapshot (compras_sla_data.json, mesmo formato de antes) mais um
+journal append-only em JSON lines (compras_sla_data.json.journal) com as mudanças desde
+o snapshot. Cada save grava uma linha (com fsync) contendo apenas as solicitações e
+seções alteradas; a cada COMPACTAR_A_CADA linhas o estado é compactado em um novo
+snapshot (arquivo temporário + fsync + rename) e o journal é zerado.
+
+A leitura reconstrói o estado (snapshot + journal, migrate_data uma única vez) apenas
+quando os arquivos mudam em disco (cache por mtime/tamanho); cada load devolve uma cópia
+independente do estado em cache (pickle, bem mais rápido que deepcopy).
+"""
+
+import datetime
+import json
+import os
+import pickle
+import tempfile
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Linhas de journal acumuladas antes de compactar em um novo snapshot
+COMPACTAR_A_CADA = 200
+
+CHAVE_SOLICITACAO = "numero_solicitacao_estoque"
+
+
+class JsonJournalStore:
+    """Snapshot + journal JSON lines com cache do estado reconstruído"""
+
+    def __init__(self, caminho: str, migrar: Callable[[Dict], Dict] = None):
+        self.caminho = caminho
+        self.caminho_journal = caminho + ".journal"
+        self.migrar = migrar
+        self._lock = threading.Lock()
+        self._estado = None
+        self._copia = None
+        self._assinatura = None
+        self._linhas_journal = 0
+
+    def load(self) -> Optional[Dict]:
+        """Retorna uma cópia do estado atual (None se não há dados gravados)"""
+        with self._lock:
+            estado = self._estado_atual()
+            if estado is None:
+                return None
+            # O chamador altera o dict recebido; o cache não pode ser compartilhado
+            if self._copia is None:
+                self._copia = pickle.dumps(estado, pickle.HIGHEST_PROTOCOL)
+            return pickle.loads(self._copia)
+
+    def save(self, data: Dict):
+        """Grava no journal apenas o que mudou em relação ao estado atual; compacta quando necessário"""
+        with self._lock:
+            anterior = self._estado_atual()
+            if anterior is None:
+                self._gravar_snapshot(data)
+                self._estado, self._linhas_journal = self._reconstruir()
+                self._copia = None
+                self._assinatura = self._assinatura_arquivos()
+                return
+
+            registros = _diferencas(anterior, data)
+            if not registros:
+                return
+            linha = json.dumps({"data": datetime.datetime.now().isoformat(), "registros": registros},
+                               ensure_ascii=False, default=str)
+            # O cache recebe a mesma versão serializada que uma releitura do disco produziria
+            _aplicar(anterior, json.loads(linha)["registros"])
+            self._copia = None
+            try:
+                if self._linhas_journal + 1 >= COMPACTAR_A_CADA:
+                    self._gravar_snapshot(anterior)
+                    self._linhas_journal = 0
+                else:
+                    self._anexar(linha)
+                    self._linhas_journal += 1
+            except Exception:
+                # Falha de gravação: o cache não pode ficar à frente do disco
+                self._estado = None
+                raise
+            self._assinatura = self._assinatura_arquivos()
+
+    def compactar(self):
+        """Força a compactação do journal em um novo snapshot"""
+        with self._lock:
+            estado = self._estado_atual()
+            if estado is not None:
+                self._gravar_snapshot(estado)
+                self._linhas_journal = 0
+                self._assinatura = self._assinatura_arquivos()
+
+    def _assinatura_arquivos(self) -> Tuple:
+        assinatura = []
+        for caminho in (self.caminho, self.caminho_journal):
+            try:
+                info = os.stat(caminho)
+                assinatura.append((info.st_mtime_ns, info.st_size))
+            except FileNotFoundError:
+                assinatura.append(None)
+        return tuple(assinatura)
+
+    def _estado_atual(self) -> Optional[Dict]:
+        """Estado em cache; reconstruído se o snapshot ou o journal mudaram em disco"""
+        assinatura = self._assinatura_arquivos()
+        if self._estado is None or assinatura != self._assinatura:
+            self._estado, self._linhas_journal = self._reconstruir()
+            self._copia = None
+            self._assinatura = assinatura
+        return self._estado
+
+    def _reconstruir(self) -> Tuple[Optional[Dict], int]:
+        estado = None
+        if os.path.exists(self.caminho):
+            with open(self.caminho, 'r', encoding='utf-8') as f:
+                estado = json.load(f)
+
+        linhas = 0
+        if os.path.exists(self.caminho_journal):
+            with open(self.caminho_journal, 'rb') as f:
+                conteudo = f.read()
+            fim_valido = conteudo.rfind(b"\n") + 1
+            if fim_valido < len(conteudo):
+                # Última linha sem quebra: gravação interrompida, o save não chegou a concluir.
+                # Truncada para que o próximo append não seja colado nela.
+                print(f"Journal {self.caminho_journal}: linha incompleta descartada")
+                with open(self.caminho_journal, 'r+b') as f:
+                    f.truncate(fim_valido)
+            for numero, texto in enumerate(conteudo[:fim_valido].splitlines(), start=1):
+                try:
+                    registros = json.loads(texto)["registros"]
+                except (ValueError, KeyError, TypeError):
+                    print(f"Journal {self.caminho_journal}: linha {numero} inválida ignorada")
+                    continue
+                if estado is None:
+                    estado = {}
+                _aplicar(estado, registros)
+                linhas += 1
+
+        if estado is not None and self.migrar:
+            estado = self.migrar(estado)
+        return estado, linhas
+
+    def _anexar(self, linha: str):
+        with open(self.caminho_journal, 'a', encoding='utf-8') as f:
+            f.write(linha + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _gravar_snapshot(self, estado: Dict):
+        diretorio = os.path.dirname(os.path.abspath(self.caminho))
+        fd, temporario = tempfile.mkstemp(prefix=".compras_sla_", suffix=".tmp", dir=diretorio)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(estado, f, ensure_ascii=False, default=str)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporario, self.caminho)
+        except Exception:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            raise
+        _fsync_diretorio(diretorio)
+        # Zerado só após o rename: se cair antes, reaplicar o journal ao novo snapshot é idempotente
+        open(self.caminho_journal, 'w', encoding='utf-8').close()
+
+
+def _diferencas(anterior: Dict, novo: Dict) -> List[Dict]:
+    """Registros de journal que levam o estado anterior ao novo"""
+    registros = []
+    for chave, valor in novo.items():
+        if chave != "solicitacoes" and anterior.get(chave) != valor:
+            registros.append({"op": "set", "chave": chave, "valor": valor})
+    for chave in anterior.keys() - novo.keys():
+        registros.append({"op": "del", "chave": chave})
+
+    novas = novo.get("solicitacoes", [])
+    if any(s.get(CHAVE_SOLICITACAO) is None for s in novas):
+        # Sem número não há como identificar a solicitação: grava a lista inteira
+        if anterior.get("solicitacoes") != novas:
+            registros.append({"op": "set", "chave": "solicitacoes", "valor": novas})
+        return registros
+
+    antigas = {s.get(CHAVE_SOLICITACAO): s for s in anterior.get("solicitacoes", [])}
+    vistas = set()
+    for solicitacao in novas:
+        numero = solicitacao[CHAVE_SOLICITACAO]
+        vistas.add(numero)
+        if antigas.get(numero) != solicitacao:
+            registros.append({"op": "sol", "numero": numero, "dados": solicitacao})
+    for numero in antigas.keys() - vistas:
+        registros.append({"op": "del_sol", "numero": numero})
+    return registros
+
+
+def _aplicar(estado: Dict, registros: List[Dict]):
+    """Aplica registros de journal ao estado (no lugar); todos os registros são idempotentes"""
+    lista = estado.setdefault("solicitacoes", [])
+    posicoes = {s.get(CHAVE_SOLICITACAO): i for i, s in enumerate(lista)}
+    removidas = False
+    for registro in registros:
+        op = registro.get("op")
+        if op == "set":
+            estado[registro["chave"]] = registro["valor"]
+            if registro["chave"] == "solicitacoes":
+                lista = estado["solicitacoes"]
+                posicoes = {s.get(CHAVE_SOLICITACAO): i for i, s in enumerate(lista)}
+        elif op == "del":
+            estado.pop(registro["chave"], None)
+        elif op == "sol":
+            numero = registro["numero"]
+            if numero in posicoes:
+                lista[posicoes[numero]] = registro["dados"]
+            else:
+                posicoes[numero] = len(lista)
+                lista.append(registro["dados"])
+        elif op == "del_sol" and registro["numero"] in posicoes:
+            lista[posicoes.pop(registro["numero"])] = None
+            removidas = True
+    if removidas:
+        lista[:] = [s for s in lista if s is not None]
+
+
+def _fsync_diretorio(diretorio: str):
+    """Persiste o rename no diretório (sem suporte no Windows)"""
+    try:
+        fd = os.open(diretorio, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+# Uma instância por arquivo: o cache é compartilhado entre os reruns do Streamlit
+_stores: Dict[str, JsonJournalStore] = {}
+
+
+def get_json_store(caminho: str, migrar: Callable[[Dict], Dict] = None) -> JsonJournalStore:
+    """Retorna o store do arquivo (instância única por caminho)"""
+    chave = os.path.abspath(caminho)
+    store = _stores.get(chave)
+    if store is None:
+        store = _stores[chave] = JsonJournalStore(caminho, migrar)
+    elif migrar and store.migrar is None:
+        store.migrar = migrar
+    return store
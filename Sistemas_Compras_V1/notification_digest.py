@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Digest de notificações do Sistema de Compras
+Eventos são gravados com um único INSERT em notificacoes (app.add_notification);
+este módulo agrega periodicamente os eventos de cada janela em um resumo por perfil
+(e por solicitante): eventos recebidos, contagem por etapa, SLAs vencidos e itens
+aguardando o perfil. A sidebar lê apenas o último resumo (notificacoes_digest).
+
+Uso via CLI/cron:
+    python3 notification_digest.py [--reter-dias 30]
+"""
+
+import argparse
+import datetime
+import json
+import os
+from typing import Dict, List
+
+# Etapas em que cada perfil é o responsável pela próxima ação
+ETAPAS_POR_PERFIL = {
+    "Estoque": ["Solicitação"],
+    "Suprimentos": ["Requisição", "Suprimentos", "Em Cotação", "Pedido de Compras", "Compra feita", "Aguardando Entrega"],
+    "Gerência&Diretoria": ["Aguardando Aprovação"],
+    "Admin": [],
+}
+PERFIL_SOLICITANTE = "Solicitante"
+ETAPAS_FINAIS = ("Pedido Finalizado", "Reprovado")
+
+INTERVALO_PADRAO_MINUTOS = int(os.getenv("NOTIFICACOES_DIGEST_MINUTOS", "60"))
+RETENCAO_PADRAO_DIAS = 30
+
+CONFIG_ULTIMO_EVENTO = "digest_ultimo_evento_id"
+CONFIG_ULTIMA_EXECUCAO = "digest_ultima_execucao"
+
+
+def normalizar_perfil(perfil: str) -> str:
+    """Converte o perfil da sessão no nome usado nos digests (app compara perfis sem caixa)"""
+    for nome in list(ETAPAS_POR_PERFIL) + [PERFIL_SOLICITANTE]:
+        if (perfil or "").lower() == nome.lower():
+            return nome
+    if (perfil or "").lower() == "aprovador":
+        return "Gerência&Diretoria"
+    return PERFIL_SOLICITANTE
+
+
+def build_digests(db, agora: datetime.datetime = None) -> int:
+    """
+    Gera os digests da janela desde a última execução
+
+    Duas consultas agregadas por janela: eventos por perfil/solicitante e solicitações
+    abertas por etapa/solicitante (com SLA vencido). Grava um digest por perfil e um por
+    solicitante com eventos ou solicitações abertas, tudo em uma transação.
+
+    Returns:
+        int: Quantidade de digests gerados
+    """
+    if not db.db_available or not db.conn:
+        return 0
+
+    agora = agora or datetime.datetime.now()
+    conn = db.conn
+    try:
+        cursor = conn.cursor()
+        # Serializa execuções concorrentes (cron e sidebar)
+        cursor.execute('BEGIN IMMEDIATE')
+        ultimo_id = int(_config(cursor, CONFIG_ULTIMO_EVENTO, "0"))
+        inicio = _config(cursor, CONFIG_ULTIMA_EXECUCAO, "")
+        cursor.execute('SELECT COALESCE(MAX(id), 0) FROM notificacoes')
+        maximo_id = cursor.fetchone()[0]
+
+        # Eventos da janela: por perfil e, para o Solicitante, por dono da solicitação
+        cursor.execute('''
+            SELECT n.perfil, COALESCE(s.solicitante, '') AS solicitante,
+                   COUNT(*) AS eventos, COUNT(DISTINCT n.numero) AS solicitacoes
+            FROM notificacoes n
+            LEFT JOIN solicitacoes s ON s.numero_solicitacao_estoque = n.numero
+            WHERE n.id > ? AND n.id <= ?
+            GROUP BY n.perfil, COALESCE(s.solicitante, '')
+        ''', (ultimo_id, maximo_id))
+        eventos = cursor.fetchall()
+
+        # Estado atual: abertas por etapa e solicitante, com SLA vencido (dias corridos)
+        placeholders = ', '.join('?' for _ in ETAPAS_FINAIS)
+        dias_abertos = db.backend.dias_entre('?', 'carimbo_data_hora')
+        cursor.execute(f'''
+            SELECT etapa_atual, solicitante, COUNT(*) AS total,
+                   SUM(CASE WHEN {dias_abertos} > sla_dias THEN 1 ELSE 0 END) AS vencidas
+            FROM solicitacoes
+            WHERE etapa_atual NOT IN ({placeholders})
+            GROUP BY etapa_atual, solicitante
+        ''', (agora.isoformat(),) + ETAPAS_FINAIS)
+        abertas = cursor.fetchall()
+
+        digests = _montar_digests(eventos, abertas)
+        periodo_fim = agora.isoformat()
+        cursor.executemany('''
+            INSERT INTO notificacoes_digest (perfil, destinatario, periodo_inicio, periodo_fim, eventos, conteudo)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [
+            (perfil, destinatario, inicio or None, periodo_fim, conteudo["eventos"], json.dumps(conteudo, ensure_ascii=False))
+            for (perfil, destinatario), conteudo in digests.items()
+        ])
+        _set_config(cursor, CONFIG_ULTIMO_EVENTO, str(maximo_id))
+        _set_config(cursor, CONFIG_ULTIMA_EXECUCAO, periodo_fim)
+        conn.commit()
+        return len(digests)
+    except Exception as e:
+        conn.rollback()
+        print(f"Erro ao gerar digest de notificações: {e}")
+        return 0
+
+
+def _montar_digests(eventos: List, abertas: List) -> Dict[tuple, Dict]:
+    """Distribui as linhas agregadas entre os digests de perfil e de solicitante"""
+    def vazio() -> Dict:
+        return {"eventos": 0, "solicitacoes": 0, "por_etapa": {}, "sla_vencido": 0, "aguardando": 0}
+
+    digests = {(perfil, ""): vazio() for perfil in ETAPAS_POR_PERFIL}
+
+    for perfil, solicitante, qtd_eventos, qtd_solicitacoes in eventos:
+        if perfil == PERFIL_SOLICITANTE:
+            chave = (PERFIL_SOLICITANTE, solicitante)
+            if not solicitante:
+                continue
+        else:
+            chave = (normalizar_perfil(perfil), "")
+            if chave not in digests:
+                # Eventos de sistema sem perfil de destino específico vão para o Admin
+                chave = ("Admin", "")
+        digest = digests.setdefault(chave, vazio())
+        digest["eventos"] += qtd_eventos
+        digest["solicitacoes"] += qtd_solicitacoes
+
+    for etapa, solicitante, total, vencidas in abertas:
+        for perfil, etapas in ETAPAS_POR_PERFIL.items():
+            digest = digests[(perfil, "")]
+            digest["por_etapa"][etapa] = digest["por_etapa"].get(etapa, 0) + total
+            # Admin acompanha todas as etapas; os demais, apenas as suas
+            if etapa in etapas or perfil == "Admin":
+                digest["sla_vencido"] += vencidas or 0
+            if etapa in etapas:
+                digest["aguardando"] += total
+        if solicitante:
+            digest = digests.setdefault((PERFIL_SOLICITANTE, solicitante), vazio())
+            digest["por_etapa"][etapa] = digest["por_etapa"].get(etapa, 0) + total
+            digest["sla_vencido"] += vencidas or 0
+            digest["aguardando"] += total
+
+    return digests
+
+
+def refresh_if_stale(db, intervalo_minutos: int = None) -> bool:
+    """Gera novos digests se o último tiver mais de intervalo_minutos (usado pela sidebar sem cron)"""
+    intervalo = INTERVALO_PADRAO_MINUTOS if intervalo_minutos is None else intervalo_minutos
+    ultima = db.get_config(CONFIG_ULTIMA_EXECUCAO, "")
+    try:
+        if ultima and datetime.datetime.now() - datetime.datetime.fromisoformat(ultima) < datetime.timedelta(minutes=intervalo):
+            return False
+    except ValueError:
+        pass
+    return build_digests(db) > 0
+
+
+def purge(db, reter_dias: int = RETENCAO_PADRAO_DIAS) -> int:
+    """Remove eventos já agregados e digests mais antigos que reter_dias"""
+    if not db.db_available or not db.conn:
+        return 0
+    limite = (datetime.datetime.now() - datetime.timedelta(days=reter_dias)).isoformat()
+    try:
+        cursor = db.conn.cursor()
+        ultimo_id = int(_config(cursor, CONFIG_ULTIMO_EVENTO, "0"))
+        cursor.execute('DELETE FROM notificacoes WHERE id <= ? AND data < ?', (ultimo_id, limite))
+        removidos = cursor.rowcount
+        cursor.execute('DELETE FROM notificacoes_digest WHERE periodo_fim < ?', (limite,))
+        removidos += cursor.rowcount
+        db.conn.commit()
+        return removidos
+    except Exception as e:
+        db.conn.rollback()
+        print(f"Erro ao limpar notificações antigas: {e}")
+        return 0
+
+
+def _config(cursor, chave: str, padrao: str) -> str:
+    cursor.execute('SELECT valor FROM configuracoes WHERE chave = ?', (chave,))
+    row = cursor.fetchone()
+    return row[0] if row else padrao
+
+
+def _set_config(cursor, chave: str, valor: str):
+    cursor.execute('INSERT OR REPLACE INTO configuracoes (chave, valor) VALUES (?, ?)', (chave, valor))
+
+
+def main():
+    """Ponto de entrada para execução via CLI/cron"""
+    parser = argparse.ArgumentParser(description="Gera o digest de notificações do Sistema de Compras")
+    parser.add_argument("--reter-dias", type=int, default=RETENCAO_PADRAO_DIAS,
+                        help=f"Remove eventos agregados e digests mais antigos (padrão: {RETENCAO_PADRAO_DIAS})")
+    args = parser.parse_args()
+
+    from database_local import get_local_database
+    db = get_local_database()
+    if not db.db_available:
+        print(f"❌ Banco indisponível: {db.last_error}")
+        return False
+
+    gerados = build_digests(db)
+    removidos = purge(db, args.reter_dias)
+    print(f"✅ {gerados} digest(s) gerado(s), {removidos} registro(s) antigo(s) removido(s)")
+    return True
+
+
+if __name__ == "__main__":
+    raise SystemExit(0 if main() else 1)
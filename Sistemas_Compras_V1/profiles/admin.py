@@ -33,6 +33,7 @@ def get_profile_options() -> List[str]:
         # === FUNCIONALIDADES EXCLUSIVAS DO ADMIN ===
         "⚙️ Configurações SLA",
         "🔍 Auditoria",
+        "⏱️ Desempenho SQL",
         "👥 Gerenciar Usuários",
         
         # === ACESSO DIRETO A PERFIS (MODO ADMIN) ===
@@ -99,6 +100,9 @@ def handle_profile_option(opcao: str, data: Dict, usuario: Dict, USE_DATABASE: b
     elif opcao == "🔍 Auditoria":
         from .admin_auditoria import show_admin_auditoria
         show_admin_auditoria()
+    elif opcao == "⏱️ Desempenho SQL":
+        from .admin_desempenho import show_admin_desempenho
+        show_admin_desempenho()
     elif opcao == "👥 Gerenciar Usuários":
         from .admin_usuarios import gerenciar_usuarios
         gerenciar_usuarios(data, usuario, USE_DATABASE)
@@ -0,0 +1,107 @@
+"""
+Interface de Desempenho SQL para Admin
+Comandos mais custosos (sql_monitor) e log de consultas lentas com plano de execução
+"""
+
+import streamlit as st
+import pandas as pd
+from database_local import get_local_database
+from sql_monitor import get_monitor_sql
+
+def show_admin_desempenho():
+    """Interface com as estatísticas por comando SQL e as consultas lentas"""
+
+    st.title("⏱️ Desempenho SQL")
+
+    db = get_local_database()
+    monitor = get_monitor_sql()
+
+    st.info(
+        f"📋 Estatísticas deste processo desde {monitor.desde.strftime('%d/%m/%Y %H:%M:%S')} "
+        f"({db.connection_info or db.db_type}). Comandos acima de {monitor.limite_ms:.0f} ms "
+        f"são gravados em `{monitor.caminho_log}` com o plano de execução."
+    )
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        ordenar_por = st.selectbox(
+            "📊 Ordenar por:",
+            ["total_ms", "p95_ms", "max_ms", "contagem", "linhas"],
+            format_func={
+                "total_ms": "Tempo total",
+                "p95_ms": "p95",
+                "max_ms": "Pior execução",
+                "contagem": "Execuções",
+                "linhas": "Linhas lidas/alteradas",
+            }.get
+        )
+
+    with col2:
+        limite = st.selectbox("🔢 Comandos exibidos:", [10, 25, 50, 100], index=1)
+
+    estatisticas = monitor.estatisticas(ordenar_por=ordenar_por, limite=limite)
+
+    if not estatisticas:
+        st.warning("📝 Nenhum comando registrado ainda (SQL_MONITOR=0 desliga o monitor).")
+    else:
+        df = pd.DataFrame(estatisticas)
+
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Execuções", int(df['contagem'].sum()))
+        with col2:
+            st.metric("Tempo Total", f"{df['total_ms'].sum() / 1000:.1f} s")
+        with col3:
+            st.metric("Consultas Lentas", int(df['lentas'].sum()))
+        with col4:
+            st.metric("Erros", int(df['erros'].sum()))
+
+        st.subheader("🏆 Comandos Mais Custosos")
+        df['chamadores'] = df['chamadores'].apply(lambda chamadores: "; ".join(chamadores))
+        st.dataframe(
+            df[['sql', 'contagem', 'total_ms', 'media_ms', 'p95_ms', 'max_ms', 'linhas', 'lentas', 'erros', 'chamadores']].rename(columns={
+                'sql': 'Comando',
+                'contagem': 'Execuções',
+                'total_ms': 'Total (ms)',
+                'media_ms': 'Média (ms)',
+                'p95_ms': 'p95 (ms)',
+                'max_ms': 'Máx (ms)',
+                'linhas': 'Linhas',
+                'lentas': 'Lentas',
+                'erros': 'Erros',
+                'chamadores': 'Chamado por'
+            }),
+            width='stretch',
+            hide_index=True
+        )
+
+    if st.button("🔄 Zerar estatísticas"):
+        monitor.reset()
+        st.rerun()
+
+    # Consultas lentas
+    st.subheader("🐢 Consultas Lentas Recentes")
+    lentas = monitor.consultas_lentas(limite=50)
+
+    if not lentas:
+        st.success("✅ Nenhuma consulta lenta registrada.")
+        return
+
+    for registro in lentas:
+        varredura = any(
+            passo.lstrip().startswith(("SCAN", "Seq Scan")) or "-> Seq Scan" in passo
+            for passo in registro.get('plano', [])
+        )
+        titulo = f"{'🔴' if varredura else '🟡'} {registro['duracao_ms']} ms · {registro['linhas']} linhas · {registro['chamador']}"
+        with st.expander(titulo):
+            st.write(f"**Data/Hora:** {registro['data']}")
+            st.code(registro['sql'], language='sql')
+            if registro.get('plano'):
+                st.write("**Plano de execução:**")
+                st.code("\n".join(registro['plano']))
+            if registro.get('erro'):
+                st.error(registro['erro'])
+
+if __name__ == "__main__":
+    show_admin_desempenho()
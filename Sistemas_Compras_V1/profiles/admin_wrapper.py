@@ -3,6 +3,7 @@ Wrapper administrativo para acesso completo a todas as funcionalidades
 Permite ao Admin acessar qualquer funcionalidade de qualquer perfil com privilégios elevados
 """
 
+import os
 import streamlit as st
 from typing import Dict, List
 
@@ -145,11 +146,20 @@ def show_advanced_settings(data: Dict, usuario: Dict, USE_DATABASE: bool = False
     
     with col1:
         if st.button("📥 Fazer Backup do Sistema"):
-            create_system_backup(data)
+            create_system_backup(data, USE_DATABASE)
     
     with col2:
         if st.button("📤 Restaurar Sistema"):
-            restore_system_backup(data)
+            st.session_state["admin_show_restore"] = True
+    
+    if USE_DATABASE:
+        with st.expander("🗂️ Backups disponíveis"):
+            show_backup_generations()
+    
+    # Mantém o formulário de restauração aberto entre reruns
+    if st.session_state.get("admin_show_restore"):
+        with st.expander("📤 Restauração do Sistema", expanded=True):
+            restore_system_backup(data, USE_DATABASE)
 
 def execute_function_directly(funcao: str, categoria: str, data: Dict, usuario: Dict, USE_DATABASE: bool = False):
     """Executa uma função diretamente baseada na categoria"""
@@ -234,8 +244,70 @@ def get_all_profile_functions() -> Dict[str, List[str]]:
         ]
     }
 
-def create_system_backup(data: Dict):
+def create_system_backup(data: Dict, USE_DATABASE: bool = False):
     """Cria backup completo do sistema"""
+    if not USE_DATABASE:
+        create_json_backup(data)
+        return
+    
+    try:
+        from database_local import get_local_database
+        from backup_manager import BackupManager
+        
+        db = get_local_database()
+        if not db.db_available:
+            st.error(f"❌ Banco indisponível: {db.last_error}")
+            return
+        if db.db_type != 'sqlite':
+            st.info("ℹ️ Backup do PostgreSQL é feito pelo servidor (pg_dump); snapshots aqui são apenas do SQLite.")
+            return
+        
+        manager = BackupManager(db_path=db.db_path)
+        barra = st.progress(0.0, text="Iniciando backup...")
+        
+        def atualizar_progresso(fracao: float, fase: str):
+            barra.progress(fracao, text=f"{fase} - {fracao * 100:.0f}%")
+        
+        # Usa a conexão da aplicação: escritas feitas por ela não reiniciam a cópia
+        backup_path = manager.create_backup(conn=db.conn, progress_callback=atualizar_progresso)
+        st.success(f"✅ Backup criado com sucesso: {os.path.basename(backup_path)}")
+    except Exception as e:
+        st.error(f"❌ Erro ao criar backup: {str(e)}")
+
+def show_backup_generations():
+    """Lista as gerações de backup disponíveis para download"""
+    try:
+        from database_local import get_local_database
+        from backup_manager import BackupManager
+        
+        manager = BackupManager(db_path=get_local_database().db_path)
+        backups = manager.list_backups()
+    except Exception as e:
+        st.error(f"❌ Erro ao listar backups: {str(e)}")
+        return
+    
+    if not backups:
+        st.info("Nenhum backup encontrado.")
+        return
+    
+    st.caption(f"Mantendo as últimas {manager.geracoes} gerações em '{manager.backup_dir}'")
+    for backup in backups:
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            tamanho_mb = backup["tamanho_bytes"] / (1024 * 1024)
+            st.markdown(f"**{backup['nome_arquivo']}** — {tamanho_mb:.2f} MB ({backup['compressao']})")
+        with col2:
+            with open(backup["caminho"], 'rb') as f:
+                st.download_button(
+                    label="📥 Baixar",
+                    data=f,
+                    file_name=backup["nome_arquivo"],
+                    mime="application/octet-stream",
+                    key=f"download_{backup['nome_arquivo']}"
+                )
+
+def create_json_backup(data: Dict):
+    """Cria backup em JSON dos dados em memória (modo sem banco)"""
     try:
         import json
         from datetime import datetime
@@ -249,7 +321,7 @@ def create_system_backup(data: Dict):
         backup_filename = f"sistema_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
         
         with open(backup_filename, 'w', encoding='utf-8') as f:
-            json.dump(backup_data, f, ensure_ascii=False, indent=2, default=str)
+            json.dump(backup_data, f, ensure_ascii=False, default=str)
         
         st.success(f"✅ Backup criado com sucesso: {backup_filename}")
         
@@ -265,17 +337,67 @@ def create_system_backup(data: Dict):
     except Exception as e:
         st.error(f"❌ Erro ao criar backup: {str(e)}")
 
-def restore_system_backup(data: Dict):
-    """Restaura sistema a partir de backup"""
-    st.warning("⚠️ Funcionalidade de restauração em desenvolvimento.")
-    st.info("Esta funcionalidade permitirá restaurar o sistema a partir de um arquivo de backup.")
-    
-    uploaded_file = st.file_uploader(
-        "Selecione o arquivo de backup:",
-        type=['json'],
-        key="backup_restore"
+def restore_system_backup(data: Dict, USE_DATABASE: bool = False):
+    """Restaura sistema a partir de backup (snapshot SQLite comprimido ou JSON legado)"""
+    if not USE_DATABASE:
+        st.warning("⚠️ Restauração disponível apenas com banco de dados ativo.")
+        return
+    
+    from database_local import get_local_database
+    from backup_manager import BackupManager
+    
+    db = get_local_database()
+    if db.db_type != 'sqlite':
+        st.info("ℹ️ Restauração do PostgreSQL é feita pelo servidor (pg_restore/psql).")
+        return
+    manager = BackupManager(db_path=db.db_path)
+    
+    origem = st.radio(
+        "Origem do backup:",
+        ["Backups disponíveis", "Enviar arquivo"],
+        horizontal=True,
+        key="backup_restore_origem"
     )
     
-    if uploaded_file:
-        if st.button("🔄 Restaurar Sistema", key="restore_confirm"):
-            st.info("🚧 Funcionalidade em implementação. Contate o desenvolvedor para restauração manual.")
+    backup_path = None
+    if origem == "Backups disponíveis":
+        backups = manager.list_backups()
+        if not backups:
+            st.info("Nenhum backup encontrado.")
+            return
+        nomes = [b["nome_arquivo"] for b in backups]
+        selecionado = st.selectbox("Selecione o backup:", nomes, key="backup_restore_select")
+        backup_path = next(b["caminho"] for b in backups if b["nome_arquivo"] == selecionado)
+    else:
+        uploaded_file = st.file_uploader(
+            "Selecione o arquivo de backup:",
+            type=['gz', 'zst', 'json'],
+            key="backup_restore"
+        )
+        if uploaded_file:
+            # Salva o upload em disco para leitura em streaming
+            os.makedirs(manager.backup_dir, exist_ok=True)
+            backup_path = os.path.join(manager.backup_dir, f"upload_{os.path.basename(uploaded_file.name)}")
+            with open(backup_path, 'wb') as out:
+                out.write(uploaded_file.getbuffer())
+    
+    if not backup_path:
+        return
+    
+    st.warning("⚠️ A restauração substitui todos os dados atuais. Um backup de segurança é criado antes da troca.")
+    confirmar = st.checkbox("Confirmo a substituição dos dados atuais", key="restore_confirm_check")
+    
+    if st.button("🔄 Restaurar Sistema", key="restore_confirm", disabled=not confirmar):
+        barra = st.progress(0.0, text="Iniciando restauração...")
+        
+        def atualizar_progresso(fracao: float, fase: str):
+            barra.progress(fracao, text=f"{fase} - {fracao * 100:.0f}%")
+        
+        try:
+            total = manager.restore_backup(backup_path, db=db, progress_callback=atualizar_progresso)
+            st.success(f"✅ Sistema restaurado com sucesso: {total} solicitações.")
+        except Exception as e:
+            st.error(f"❌ Erro ao restaurar backup: {str(e)}")
+        finally:
+            if origem == "Enviar arquivo" and os.path.exists(backup_path):
+                os.remove(backup_path)
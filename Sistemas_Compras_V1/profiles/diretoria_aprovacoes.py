@@ -6,7 +6,7 @@ Contém: Visualizar solicitações pendentes, aprovar/reprovar, histórico de ap
 import streamlit as st
 import pandas as pd
 import datetime
-from typing import Dict
+from typing import Dict, List
 
 def aprovacoes(data: Dict, usuario: Dict, USE_DATABASE: bool = False):
     """Página de aprovações para perfil Gerência&Diretoria"""
@@ -22,30 +22,29 @@ def aprovacoes(data: Dict, usuario: Dict, USE_DATABASE: bool = False):
         except ImportError:
             USE_DATABASE = False
     
-    # Busca solicitações do banco ou JSON
-    solicitacoes_todas = []
+    # Busca a fila de aprovação do banco (já ordenada pelo índice) ou do JSON
+    solicitacoes_aprovacao = []
     if USE_DATABASE:
         try:
             db = get_database()
             if db.db_available:
-                solicitacoes_todas = db.get_all_solicitacoes()
+                # Urgente > Alta > Normal > Baixa e, na mesma prioridade, a mais antiga primeiro
+                solicitacoes_aprovacao = db.next_work_items("Aguardando Aprovação")
         except Exception as e:
             st.warning(f"⚠️ Erro ao acessar banco de dados: {e}")
             USE_DATABASE = False
     
     if not USE_DATABASE:
-        solicitacoes_todas = data.get("solicitacoes", [])
-    
-    # Filtra solicitações que precisam de aprovação
-    solicitacoes_aprovacao = []
-    for sol in solicitacoes_todas:
-        if sol.get("status") == "Aguardando Aprovação" or sol.get("etapa_atual") == "Aguardando Aprovação":
-            solicitacoes_aprovacao.append(sol)
-    
-    # Ordena por prioridade conforme solicitado pelo cliente
-    # Urgente > Alta > Normal > Baixa
-    prioridade_ordem = {"Urgente": 0, "Alta": 1, "Normal": 2, "Baixa": 3}
-    solicitacoes_aprovacao.sort(key=lambda x: prioridade_ordem.get(x.get('prioridade', 'Normal'), 2))
+        # Filtra solicitações que precisam de aprovação
+        for sol in data.get("solicitacoes", []):
+            if sol.get("status") == "Aguardando Aprovação" or sol.get("etapa_atual") == "Aguardando Aprovação":
+                solicitacoes_aprovacao.append(sol)
+        
+        # Ordena por prioridade conforme solicitado pelo cliente
+        # Urgente > Alta > Normal > Baixa
+        prioridade_ordem = {"Urgente": 0, "Alta": 1, "Normal": 2, "Baixa": 3}
+        solicitacoes_aprovacao.sort(key=lambda x: (prioridade_ordem.get(x.get('prioridade', 'Normal'), 2),
+                                                   x.get('carimbo_data_hora', '')))
     
     if not solicitacoes_aprovacao:
         st.info("✅ Não há solicitações pendentes de aprovação no momento.")
@@ -53,19 +52,43 @@ def aprovacoes(data: Dict, usuario: Dict, USE_DATABASE: bool = False):
         # Mostra histórico de aprovações recentes
         st.markdown("### 📚 Histórico Recente de Aprovações")
         historico_aprovacoes = []
-        for sol in data.get("solicitacoes", []):
-            for aprovacao in sol.get("aprovacoes", []):
-                if aprovacao.get("aprovador") == usuario.get("username"):
-                    historico_aprovacoes.append({
-                        "Solicitação": sol.get("numero_solicitacao_estoque"),
-                        "Data": aprovacao.get("data_aprovacao", ""),
-                        "Decisão": aprovacao.get("status", ""),
-                        "Valor": format_brl(sol.get("valor_estimado")),
-                        "Solicitante": sol.get("solicitante", "")
-                    })
+        if USE_DATABASE and db.db_available:
+            # Consulta indexada por (aprovador, data_aprovacao DESC)
+            stats = db.get_aprovador_stats(usuario.get("username"))
+            if stats.get("total"):
+                col1, col2, col3, col4 = st.columns(4)
+                with col1:
+                    st.metric("Decisões", stats.get("total") or 0)
+                with col2:
+                    st.metric("Aprovadas", stats.get("aprovadas") or 0)
+                with col3:
+                    st.metric("Reprovadas", stats.get("reprovadas") or 0)
+                with col4:
+                    st.metric("Valor Aprovado", format_brl(stats.get("valor_aprovado") or 0))
+            
+            for aprovacao in db.get_aprovacoes_by_aprovador(usuario.get("username"), limit=10):
+                historico_aprovacoes.append({
+                    "Solicitação": aprovacao.get("numero_solicitacao"),
+                    "Data": aprovacao.get("data_aprovacao", ""),
+                    "Decisão": aprovacao.get("status", ""),
+                    "Valor": format_brl(aprovacao.get("valor_estimado")),
+                    "Solicitante": aprovacao.get("solicitante", "")
+                })
+        else:
+            for sol in data.get("solicitacoes", []):
+                for aprovacao in sol.get("aprovacoes", []):
+                    if aprovacao.get("aprovador") == usuario.get("username"):
+                        historico_aprovacoes.append({
+                            "Solicitação": sol.get("numero_solicitacao_estoque"),
+                            "Data": aprovacao.get("data_aprovacao", ""),
+                            "Decisão": aprovacao.get("status", ""),
+                            "Valor": format_brl(sol.get("valor_estimado")),
+                            "Solicitante": sol.get("solicitante", "")
+                        })
+            historico_aprovacoes = historico_aprovacoes[-10:]  # Últimas 10
         
         if historico_aprovacoes:
-            df_historico = pd.DataFrame(historico_aprovacoes[-10:])  # Últimas 10
+            df_historico = pd.DataFrame(historico_aprovacoes)
             st.dataframe(df_historico, width='stretch')
         else:
             st.info("Nenhuma aprovação realizada ainda.")
@@ -76,7 +99,10 @@ def aprovacoes(data: Dict, usuario: Dict, USE_DATABASE: bool = False):
         st.info("💡 **Solicitações ordenadas por prioridade:** Urgente → Alta → Normal → Baixa")
     
     # Tabs para organizar aprovações
-    tab1, tab2 = st.tabs(["🔍 Pendentes de Aprovação", "📊 Resumo Financeiro"])
+    tab1, tab_lote, tab2 = st.tabs(["🔍 Pendentes de Aprovação", "✅ Decisão em Lote", "📊 Resumo Financeiro"])
+    
+    with tab_lote:
+        aprovacoes_em_lote(data, usuario, solicitacoes_aprovacao, USE_DATABASE)
     
     with tab1:
         for i, sol in enumerate(solicitacoes_aprovacao):
@@ -333,3 +359,161 @@ def aprovacoes(data: Dict, usuario: Dict, USE_DATABASE: bool = False):
                 for k, v in valores_por_departamento.items()
             ]).sort_values("Valor_Num", ascending=False)
             st.dataframe(dept_df[["Departamento", "Valor"]], width='stretch')
+
+
+def aprovacoes_em_lote(data: Dict, usuario: Dict, solicitacoes_aprovacao: List[Dict], USE_DATABASE: bool = False):
+    """Aprova ou reprova várias solicitações de uma vez (uma transação no banco)"""
+    from app import save_data, add_notification, format_brl
+    
+    st.markdown("### ✅ Decisão em Lote")
+    st.info("💡 Filtre, marque as solicitações e confirme a decisão para todas de uma só vez.")
+    
+    # Filtros
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        prioridades = sorted({s.get('prioridade', 'Normal') for s in solicitacoes_aprovacao})
+        filtro_prioridade = st.multiselect("Prioridade:", prioridades, default=prioridades, key="lote_aprov_prioridade")
+    with col2:
+        departamentos = sorted({s.get('departamento', 'Outro') for s in solicitacoes_aprovacao})
+        filtro_departamento = st.multiselect("Departamento:", departamentos, default=departamentos, key="lote_aprov_departamento")
+    with col3:
+        valor_maximo = st.number_input(
+            "Valor estimado até (R$, 0 = sem limite):",
+            min_value=0.0,
+            value=0.0,
+            step=100.0,
+            key="lote_aprov_valor_max"
+        )
+    
+    filtradas = [
+        s for s in solicitacoes_aprovacao
+        if s.get('prioridade', 'Normal') in filtro_prioridade
+        and s.get('departamento', 'Outro') in filtro_departamento
+        and (not valor_maximo or (s.get('valor_estimado') or 0) <= valor_maximo)
+    ]
+    if not filtradas:
+        st.info("Nenhuma solicitação corresponde aos filtros.")
+        return
+    
+    marcar_todas = st.checkbox("Marcar todas as filtradas", key="lote_aprov_marcar_todas")
+    df_lote = pd.DataFrame([
+        {
+            "Selecionar": marcar_todas,
+            "Solicitação": s.get('numero_solicitacao_estoque'),
+            "Prioridade": s.get('prioridade', 'Normal'),
+            "Solicitante": s.get('solicitante', ''),
+            "Departamento": s.get('departamento', ''),
+            "Descrição": (s.get('descricao') or '')[:60],
+            "Valor Estimado": float(s.get('valor_estimado') or 0)
+        }
+        for s in filtradas
+    ])
+    
+    try:
+        editado = st.data_editor(
+            df_lote,
+            column_config={
+                "Selecionar": st.column_config.CheckboxColumn("Selecionar", default=False),
+                "Valor Estimado": st.column_config.NumberColumn("Valor Estimado", format="R$ %.2f")
+            },
+            disabled=[c for c in df_lote.columns if c != "Selecionar"],
+            hide_index=True,
+            width='stretch',
+            key=f"lote_aprov_editor_{marcar_todas}"
+        )
+    except Exception:
+        editado = df_lote
+        st.dataframe(df_lote, width='stretch')
+        st.warning("Editor não disponível. Use 'Marcar todas as filtradas' para selecionar.")
+    
+    selecionadas = editado[editado["Selecionar"]]
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Filtradas", len(editado))
+    with col2:
+        st.metric("Selecionadas", len(selecionadas))
+    with col3:
+        st.metric("Total Selecionado", format_brl(selecionadas["Valor Estimado"].sum()))
+    
+    observacoes_lote = st.text_area(
+        "Observações (aplicadas a todas as selecionadas):",
+        height=80,
+        key="lote_aprov_observacoes"
+    )
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        aprovar = st.button("✅ Aprovar selecionadas", type="primary", disabled=selecionadas.empty, key="lote_aprov_aprovar")
+    with col2:
+        reprovar = st.button("❌ Reprovar selecionadas", disabled=selecionadas.empty, key="lote_aprov_reprovar")
+    
+    if not (aprovar or reprovar):
+        return
+    
+    decisao = "Aprovar" if aprovar else "Reprovar"
+    decisoes = [
+        {"numero": int(numero), "decisao": decisao, "observacoes": observacoes_lote}
+        for numero in selecionadas["Solicitação"].tolist()
+    ]
+    nome_aprovador = usuario.get('nome', usuario.get('username', 'Diretor'))
+    
+    db = None
+    if USE_DATABASE:
+        from database_local import get_local_database
+        db = get_local_database()
+    
+    if db is not None and db.db_available:
+        resultados = db.apply_aprovacoes_batch(
+            decisoes,
+            usuario.get('username'),
+            nome_aprovador,
+            ip_address=st.session_state.get('client_ip', 'localhost')
+        )
+    else:
+        # Fallback JSON: aplica em memória e salva uma única vez
+        resultados = []
+        agora = datetime.datetime.now().isoformat()
+        for d in decisoes:
+            sol = next((s for s in data.get("solicitacoes", []) if s.get("numero_solicitacao_estoque") == d["numero"]), None)
+            if sol is None or sol.get("etapa_atual") != "Aguardando Aprovação":
+                resultados.append({"numero": d["numero"], "sucesso": False, "mensagem": "Solicitação não está aguardando aprovação"})
+                continue
+            sol.setdefault("aprovacoes", []).append({
+                "nivel": "Gerência&Diretoria",
+                "aprovador": usuario.get('username'),
+                "nome_aprovador": nome_aprovador,
+                "status": "Aprovado" if decisao == "Aprovar" else "Reprovado",
+                "data_aprovacao": agora,
+                "observacoes": observacoes_lote
+            })
+            historico = sol.setdefault("historico_etapas", [])
+            if decisao == "Aprovar":
+                nova_etapa = "Compra feita"
+                mensagem_notif = f"Solicitação aprovada por {nome_aprovador} - Compra autorizada e realizada"
+                historico.append({"etapa": "Aprovado", "data_entrada": agora, "usuario": nome_aprovador, "observacoes": f"Aprovado - {observacoes_lote}"})
+            else:
+                nova_etapa = "Reprovado"
+                mensagem_notif = f"Solicitação reprovada por {nome_aprovador}"
+            historico.append({"etapa": nova_etapa, "data_entrada": agora, "usuario": nome_aprovador, "observacoes": observacoes_lote})
+            sol["status"] = nova_etapa
+            sol["etapa_atual"] = nova_etapa
+            # Notifica solicitante e suprimentos, como no fluxo individual
+            add_notification(data, "Solicitante", d["numero"], mensagem_notif)
+            add_notification(data, "Suprimentos", d["numero"], mensagem_notif)
+            resultados.append({"numero": d["numero"], "sucesso": True, "mensagem": "Aprovada" if decisao == "Aprovar" else "Reprovada"})
+        save_data(data)
+    
+    sucesso = sum(1 for r in resultados if r["sucesso"])
+    if sucesso == len(resultados):
+        st.success(f"✅ {sucesso} solicitação(ões) {'aprovada(s)' if decisao == 'Aprovar' else 'reprovada(s)'}.")
+    else:
+        st.warning(f"⚠️ {sucesso} de {len(resultados)} decisão(ões) registrada(s). Verifique os itens com falha.")
+    
+    st.dataframe(pd.DataFrame([
+        {
+            "Solicitação": r["numero"],
+            "Resultado": "✅" if r["sucesso"] else "❌",
+            "Detalhe": r["mensagem"]
+        }
+        for r in resultados
+    ]), width='stretch')
@@ -90,9 +90,8 @@ def nova_solicitacao(data: Dict, usuario: Dict, USE_DATABASE: bool = False):
             except Exception:
                 pass
         
-        import json
-        with open("compras_sla_data.json", 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+        from json_journal import get_json_store
+        get_json_store("compras_sla_data.json").save(data)
     
     # Interface principal
     st.markdown(get_section_header_html('📝 Nova Solicitação de Compra'), unsafe_allow_html=True)
@@ -99,6 +99,59 @@ def gerenciar_cotacoes(data: Dict, usuario: Dict, USE_DATABASE: bool = False):
         with tabs[2]:
             comparar_selecionar_cotacao(sol_dados, data, usuario, USE_DATABASE)
 
+def _carregar_lista(valor) -> List:
+    """Lê campos de lista que podem vir como lista (banco) ou JSON serializado (uma ou mais vezes)"""
+    while isinstance(valor, str):
+        try:
+            valor = json.loads(valor) if valor else []
+        except Exception:
+            return []
+    return valor if isinstance(valor, list) else []
+
+def mostrar_referencias_preco(benchmarks: Dict[str, Dict], itens: List[Dict]):
+    """Mostra último preço e mediana por item (geral e por fornecedor) com base no histórico de cotações"""
+    from app import format_brl
+    
+    linhas = []
+    for item in itens:
+        ref = benchmarks.get(item.get('codigo'))
+        if not ref:
+            continue
+        linhas.append({
+            "Código": item.get('codigo'),
+            "Descrição": item.get('descricao', ''),
+            "Último Preço": format_brl(ref["ultimo_preco"]),
+            "Fornecedor": ref["ultimo_fornecedor"],
+            "Data": ref["ultima_data"],
+            "Mediana": format_brl(ref["mediana"]),
+            "Cotações": ref["total_cotacoes"]
+        })
+    
+    with st.expander("📈 Referências de Preço (histórico de cotações)", expanded=bool(linhas)):
+        if not linhas:
+            st.info("Nenhum histórico de preço para os itens desta solicitação.")
+            return
+        st.dataframe(pd.DataFrame(linhas), width='stretch', hide_index=True)
+        
+        # Detalhe por fornecedor
+        por_fornecedor = []
+        for item in itens:
+            ref = benchmarks.get(item.get('codigo'))
+            if not ref:
+                continue
+            for fornecedor, dados in ref["por_fornecedor"].items():
+                por_fornecedor.append({
+                    "Código": item.get('codigo'),
+                    "Fornecedor": fornecedor,
+                    "Último Preço": format_brl(dados["ultimo_preco"]),
+                    "Data": dados["ultima_data"],
+                    "Mediana": format_brl(dados["mediana"]),
+                    "Cotações": dados["total_cotacoes"]
+                })
+        if por_fornecedor:
+            st.markdown("**Por fornecedor:**")
+            st.dataframe(pd.DataFrame(por_fornecedor), width='stretch', hide_index=True)
+
 def mostrar_cotacoes_atuais(sol_dados: Dict):
     """Mostra cotações já cadastradas para a solicitação"""
     
@@ -149,6 +202,18 @@ def adicionar_nova_cotacao(sol_dados: Dict, data: Dict, usuario: Dict, USE_DATAB
     
     st.markdown("### ➕ Adicionar Nova Cotação")
     
+    from app import format_brl
+    
+    # Referências de preço: consulta indexada na tabela cotacoes
+    itens_solicitacao = _carregar_lista(sol_dados.get('itens'))
+    benchmarks = {}
+    if USE_DATABASE and itens_solicitacao:
+        from database_local import get_local_database
+        db = get_local_database()
+        if db.db_available:
+            benchmarks = db.get_price_benchmarks([item.get('codigo') for item in itens_solicitacao])
+            mostrar_referencias_preco(benchmarks, itens_solicitacao)
+    
     with st.form("nova_cotacao_form"):
         col1, col2 = st.columns(2)
         
@@ -170,6 +235,13 @@ def adicionar_nova_cotacao(sol_dados: Dict, data: Dict, usuario: Dict, USE_DATAB
                 min_value=1,
                 value=15
             )
+            
+            frete = st.number_input(
+                "Frete (R$)",
+                min_value=0.0,
+                step=0.01,
+                format="%.2f"
+            )
         
         with col2:
             data_cotacao = st.date_input(
@@ -197,7 +269,6 @@ def adicionar_nova_cotacao(sol_dados: Dict, data: Dict, usuario: Dict, USE_DATAB
         st.markdown("#### 📦 Detalhamento por Item (Opcional)")
         
         try:
-            itens_solicitacao = json.loads(sol_dados.get('itens', '[]'))
             if itens_solicitacao:
                 st.info("💡 Preencha os valores unitários para cada item ou deixe em branco para usar o valor total.")
                 
@@ -221,6 +292,10 @@ def adicionar_nova_cotacao(sol_dados: Dict, data: Dict, usuario: Dict, USE_DATAB
                             key=f"valor_unit_{i}",
                             format="%.2f"
                         )
+                        ref = benchmarks.get(item.get('codigo'))
+                        if ref:
+                            st.caption(f"Último: {format_brl(ref['ultimo_preco'])} ({ref['ultimo_fornecedor']}) · "
+                                       f"Mediana: {format_brl(ref['mediana'])}")
                         
                         if valor_unitario > 0:
                             itens_cotacao.append({
@@ -246,6 +321,7 @@ def adicionar_nova_cotacao(sol_dados: Dict, data: Dict, usuario: Dict, USE_DATAB
                     'fornecedor': fornecedor,
                     'valor_total': valor_total,
                     'prazo_entrega': prazo_entrega,
+                    'frete': frete,
                     'data_cotacao': data_cotacao.strftime('%d/%m/%Y'),
                     'condicoes_pagamento': condicoes_pagamento,
                     'numero_cotacao': numero_cotacao,
@@ -295,6 +371,96 @@ def adicionar_nova_cotacao(sol_dados: Dict, data: Dict, usuario: Dict, USE_DATAB
             else:
                 st.error("❌ Preencha os campos obrigatórios (Fornecedor e Valor Total)")
 
+def comparar_por_item(sol_dados: Dict, cotacoes: List[Dict]):
+    """Matriz item × fornecedor com melhor preço por item, melhor fornecedor único e divisão ótima"""
+    from app import format_brl
+    from comparador_cotacoes import montar_matriz, mais_barato_por_item, divisao_otima
+    
+    st.markdown("#### 🧮 Comparação por Item")
+    
+    matriz = montar_matriz(cotacoes, _carregar_lista(sol_dados.get('itens')))
+    fornecedores = matriz["fornecedores"]
+    if not fornecedores or not matriz["codigos"]:
+        st.info("📝 Nenhuma cotação com valores por item.")
+        return
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        max_fornecedores = st.number_input(
+            "Máx. de fornecedores",
+            min_value=1,
+            max_value=len(fornecedores),
+            value=min(2, len(fornecedores)),
+            key=f"max_forn_{sol_dados.get('numero_solicitacao_estoque')}"
+        )
+    with col2:
+        peso_frete = st.number_input(
+            "Peso do frete",
+            min_value=0.0,
+            value=1.0,
+            step=0.1,
+            help="1,0 = frete somado ao custo pelo valor cheio",
+            key=f"peso_frete_{sol_dados.get('numero_solicitacao_estoque')}"
+        )
+    with col3:
+        peso_prazo = st.number_input(
+            "Peso do prazo (R$/dia)",
+            min_value=0.0,
+            value=0.0,
+            step=10.0,
+            help="Custo atribuído a cada dia do maior prazo de entrega entre os fornecedores escolhidos",
+            key=f"peso_prazo_{sol_dados.get('numero_solicitacao_estoque')}"
+        )
+    
+    por_item = mais_barato_por_item(matriz)
+    unico = divisao_otima(matriz, 1, peso_frete, peso_prazo)
+    divisao = divisao_otima(matriz, max_fornecedores, peso_frete, peso_prazo)
+    
+    # Matriz de preços unitários
+    df_matriz = pd.DataFrame(matriz["precos"], index=matriz["codigos"], columns=fornecedores)
+    df_matriz.insert(0, "Descrição", matriz["descricoes"])
+    df_matriz.insert(1, "Qtd", matriz["quantidades"])
+    df_matriz["Melhor Preço"] = [fornecedores[f] if f >= 0 else "Sem cotação" for f in por_item["fornecedor"]]
+    st.dataframe(
+        df_matriz,
+        width='stretch',
+        column_config={f: st.column_config.NumberColumn(f, format="R$ %.2f") for f in fornecedores}
+    )
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Menor preço por item", format_brl(por_item["total"]),
+                  help="Cada item no fornecedor mais barato, sem frete e sem limite de fornecedores")
+    with col2:
+        if unico["viavel"]:
+            st.metric(f"Fornecedor único: {fornecedores[unico['fornecedores'][0]]}",
+                      format_brl(unico["custo_itens"] + unico["frete"]),
+                      help="Itens + frete do fornecedor que cota todos os itens com menor pontuação")
+        else:
+            st.metric("Fornecedor único", "N/A", help="Nenhum fornecedor cotou todos os itens")
+    with col3:
+        if divisao["viavel"]:
+            st.metric(f"Divisão ótima ({len(divisao['fornecedores'])} forn.)",
+                      format_brl(divisao["custo_itens"] + divisao["frete"]),
+                      help=f"Prazo: {divisao['prazo']:.0f} dias")
+        else:
+            st.metric("Divisão ótima", "N/A", help="Nenhuma combinação cobre todos os itens cotados")
+    
+    if por_item["sem_cotacao"]:
+        st.warning(f"⚠️ Itens sem cotação: {', '.join(por_item['sem_cotacao'])}")
+    
+    if divisao["viavel"] and len(divisao["fornecedores"]) > 1:
+        st.markdown("**Divisão ótima dos itens:**")
+        custo = matriz["precos"] * matriz["quantidades"][:, None]
+        st.dataframe(pd.DataFrame([
+            {
+                "Código": codigo,
+                "Fornecedor": fornecedores[f],
+                "Valor": format_brl(custo[i, f])
+            }
+            for i, (codigo, f) in enumerate(zip(matriz["codigos"], divisao["atribuicao"])) if f >= 0
+        ]), width='stretch', hide_index=True)
+
 def comparar_selecionar_cotacao(sol_dados: Dict, data: Dict, usuario: Dict, USE_DATABASE: bool):
     """Interface para comparar cotações e selecionar a melhor"""
     
@@ -328,6 +494,10 @@ def comparar_selecionar_cotacao(sol_dados: Dict, data: Dict, usuario: Dict, USE_
     df_comparacao = pd.DataFrame(dados_comparacao)
     st.dataframe(df_comparacao, width='stretch')
     
+    # Comparação por item (cotações com detalhamento de itens)
+    if any(c.get('itens_cotacao') for c in cotacoes):
+        comparar_por_item(sol_dados, cotacoes)
+    
     # Seleção da melhor cotação
     st.markdown("#### 🎯 Selecionar Cotação Vencedora")
     
@@ -6,7 +6,7 @@ Contém: Visualizar solicitações em diferentes etapas, mover entre etapas, con
 import streamlit as st
 import pandas as pd
 import datetime
-from typing import Dict
+from typing import Dict, List
 
 def mover_etapa(data: Dict, usuario: Dict, USE_DATABASE: bool = False):
     """Página para mover solicitações entre etapas"""
@@ -82,7 +82,10 @@ def mover_etapa(data: Dict, usuario: Dict, USE_DATABASE: bool = False):
     st.success(f"🔄 {len(solicitacoes_moveveis)} solicitação(ões) disponível(eis) para movimentação")
     
     # Tabs para organizar funcionalidades
-    tab1, tab2 = st.tabs(["🔄 Controlar Entregas", "📊 Controle de Etapas"])
+    tab1, tab_lote, tab2 = st.tabs(["🔄 Controlar Entregas", "📦 Movimentação em Lote", "📊 Controle de Etapas"])
+    
+    with tab_lote:
+        mover_em_lote(data, usuario, solicitacoes_moveveis, USE_DATABASE)
     
     with tab1:
         st.markdown("### 🔄 Controlar Entregas e Finalizações")
@@ -464,3 +467,187 @@ def mover_etapa(data: Dict, usuario: Dict, USE_DATABASE: bool = False):
             st.dataframe(atraso_df, width='stretch')
         else:
             st.success("✅ Nenhuma solicitação com atraso de SLA identificada.")
+
+
+def mover_em_lote(data: Dict, usuario: Dict, solicitacoes_moveveis: List[Dict], USE_DATABASE: bool = False):
+    """Move várias solicitações da mesma etapa de uma só vez (uma transação no banco)"""
+    from app import save_data, add_notification, format_brl, calcular_dias_uteis, obter_sla_por_prioridade, verificar_sla_cumprido
+    from validacoes_sistema import TRANSICOES_VALIDAS
+    
+    st.markdown("### 📦 Movimentação em Lote")
+    st.info("💡 Selecione várias solicitações da mesma etapa e mova todas de uma vez.")
+    
+    # Agrupa por etapa atual
+    por_etapa: Dict[str, List[Dict]] = {}
+    for sol in solicitacoes_moveveis:
+        etapa = sol.get("etapa_atual", sol.get("status", ""))
+        por_etapa.setdefault(etapa, []).append(sol)
+    
+    etapas_origem = [e for e in por_etapa if TRANSICOES_VALIDAS.get(e)]
+    if not etapas_origem:
+        st.info("📋 Nenhuma solicitação com transição disponível.")
+        return
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        etapa_origem = st.selectbox(
+            "Etapa de origem:",
+            etapas_origem,
+            format_func=lambda e: f"{e} ({len(por_etapa[e])})",
+            key="lote_etapa_origem"
+        )
+    with col2:
+        etapa_destino = st.selectbox(
+            "Etapa de destino:",
+            TRANSICOES_VALIDAS.get(etapa_origem, []),
+            key="lote_etapa_destino"
+        )
+    
+    candidatas = por_etapa.get(etapa_origem, [])
+    opcoes = {
+        sol.get("numero_solicitacao_estoque"): (
+            f"#{sol.get('numero_solicitacao_estoque')} - {sol.get('solicitante', 'N/A')} - "
+            f"{format_brl(sol.get('valor_final') or sol.get('valor_estimado'))}"
+        )
+        for sol in candidatas
+    }
+    
+    with st.form("mover_lote_form"):
+        selecionar_todas = st.checkbox(f"Selecionar todas ({len(opcoes)})", key="lote_todas")
+        selecionadas = st.multiselect(
+            "Solicitações:",
+            list(opcoes.keys()),
+            format_func=lambda n: opcoes.get(n, str(n)),
+            key="lote_selecionadas"
+        )
+        
+        updates = {}
+        if etapa_destino == "Aguardando Entrega":
+            data_entrega_prevista = st.date_input(
+                "Data de Entrega Prevista",
+                value=datetime.date.today() + datetime.timedelta(days=7)
+            )
+            updates["data_entrega_prevista"] = data_entrega_prevista.isoformat()
+        elif etapa_destino == "Pedido Finalizado":
+            col_a, col_b = st.columns(2)
+            with col_a:
+                data_entrega_real = st.date_input("Data de Entrega Real", value=datetime.date.today())
+                entrega_conforme = st.selectbox("Entrega Conforme?", ["Sim", "Não", "Parcial"])
+            with col_b:
+                responsavel_recebimento = st.text_input(
+                    "Responsável pelo Recebimento",
+                    value=usuario.get('nome', usuario.get('username', ''))
+                )
+                nota_fiscal = st.text_input(
+                    "Número da Nota Fiscal",
+                    placeholder="Ex: NF-123456",
+                    help="Registrada em todas as solicitações selecionadas"
+                )
+            updates.update({
+                "data_entrega_real": data_entrega_real.isoformat(),
+                "entrega_conforme": entrega_conforme,
+                "responsavel_recebimento": responsavel_recebimento,
+                "nota_fiscal": nota_fiscal
+            })
+        
+        observacoes = st.text_area("Observações (registradas no histórico de cada solicitação)", height=80)
+        mover = st.form_submit_button(f"🔄 Mover para {etapa_destino}", type="primary")
+    
+    if not mover:
+        return
+    
+    numeros = list(opcoes.keys()) if selecionar_todas else list(selecionadas)
+    if not numeros:
+        st.error("❌ Selecione ao menos uma solicitação.")
+        return
+    
+    nome_usuario = usuario.get('nome', usuario.get('username'))
+    por_numero = {sol.get("numero_solicitacao_estoque"): sol for sol in candidatas}
+    resultados = []
+    validos = []
+    updates_por_item = {}
+    notificacoes_por_item = {}
+    
+    for numero in numeros:
+        sol = por_numero.get(numero, {})
+        if etapa_destino == "Aguardando Entrega" and not sol.get("numero_pedido_compras"):
+            resultados.append({"numero": numero, "sucesso": False, "mensagem": "Número do pedido não informado"})
+            continue
+        if etapa_destino == "Pedido Finalizado":
+            # SLA final calculado por item
+            try:
+                data_inicio = datetime.datetime.fromisoformat(sol.get('carimbo_data_hora', datetime.datetime.now().isoformat()))
+                dias_atendimento = calcular_dias_uteis(data_inicio, datetime.datetime.now())
+                sla_dias = obter_sla_por_prioridade(sol.get('prioridade', 'Normal'), sol.get('departamento'))
+                updates_por_item[numero] = {
+                    "dias_atendimento": dias_atendimento,
+                    "sla_dias": sla_dias,
+                    "sla_cumprido": verificar_sla_cumprido(dias_atendimento, sla_dias)
+                }
+            except Exception:
+                pass
+        # Mesmas notificações do fluxo individual
+        if etapa_destino == "Aguardando Entrega":
+            notificacoes_por_item[numero] = [(
+                "Solicitante", f"Pedido #{sol.get('numero_pedido_compras')} em andamento - Aguardando entrega"
+            )]
+        elif etapa_destino == "Pedido Finalizado":
+            notificacoes_por_item[numero] = [(
+                "Solicitante", f"Pedido finalizado com sucesso! NF: {updates.get('nota_fiscal', '')}"
+            )]
+        validos.append(numero)
+    
+    if validos:
+        db = None
+        if USE_DATABASE:
+            from database_local import get_local_database
+            db = get_local_database()
+        
+        if db is not None and db.db_available:
+            resultados.extend(db.move_solicitacoes_batch(
+                validos, etapa_destino, nome_usuario, TRANSICOES_VALIDAS,
+                updates=updates, updates_por_item=updates_por_item, observacoes=observacoes,
+                notificacoes_por_item=notificacoes_por_item
+            ))
+        else:
+            # Fallback JSON: aplica em memória e salva uma única vez
+            agora = datetime.datetime.now().isoformat()
+            for numero in validos:
+                sol = next((s for s in data.get("solicitacoes", []) if s.get("numero_solicitacao_estoque") == numero), None)
+                if sol is None:
+                    resultados.append({"numero": numero, "sucesso": False, "mensagem": "Solicitação não encontrada"})
+                    continue
+                origem = sol.get("etapa_atual", sol.get("status", ""))
+                if etapa_destino not in TRANSICOES_VALIDAS.get(origem, []):
+                    resultados.append({"numero": numero, "sucesso": False, "mensagem": f"Transição inválida: '{origem}' → '{etapa_destino}'"})
+                    continue
+                sol.update(updates)
+                sol.update(updates_por_item.get(numero, {}))
+                sol["status"] = etapa_destino
+                sol["etapa_atual"] = etapa_destino
+                sol.setdefault("historico_etapas", []).append({
+                    "etapa": etapa_destino,
+                    "data_entrada": agora,
+                    "usuario": nome_usuario,
+                    "observacoes": observacoes
+                })
+                for perfil, mensagem in notificacoes_por_item.get(numero, []):
+                    add_notification(data, perfil, numero, mensagem)
+                resultados.append({"numero": numero, "sucesso": True, "mensagem": f"{origem} → {etapa_destino}"})
+            save_data(data)
+    
+    sucesso = sum(1 for r in resultados if r["sucesso"])
+    if sucesso == len(resultados):
+        st.success(f"✅ {sucesso} solicitação(ões) movida(s) para '{etapa_destino}'.")
+    else:
+        st.warning(f"⚠️ {sucesso} de {len(resultados)} solicitação(ões) movida(s). Verifique os itens com falha.")
+    
+    resultados_df = pd.DataFrame([
+        {
+            "Solicitação": r["numero"],
+            "Resultado": "✅ Movida" if r["sucesso"] else "❌ Falhou",
+            "Detalhe": r["mensagem"]
+        }
+        for r in resultados
+    ])
+    st.dataframe(resultados_df, width='stretch')
@@ -37,8 +37,8 @@ def show_requisicoes_pendentes():
         return
     
     # Buscar requisições na etapa "Requisição" (aguardando processamento por suprimentos)
-    solicitacoes = db.get_all_solicitacoes()
-    requisicoes_pendentes = [s for s in solicitacoes if s.get('etapa_atual') == 'Requisição']
+    # Fila indexada já em ordem de prioridade e chegada
+    requisicoes_pendentes = db.next_work_items('Requisição')
     
     if not requisicoes_pendentes:
         st.info("✅ Não há requisições pendentes de processamento no momento.")
@@ -76,13 +76,10 @@ def show_requisicoes_pendentes():
     if filtro_departamento != "Todos":
         requisicoes_filtradas = [r for r in requisicoes_filtradas if r.get('departamento') == filtro_departamento]
     
-    # Ordenar por prioridade (Urgente primeiro)
-    if ordenar_por == "Prioridade":
-        ordem_prioridade = {"Urgente": 0, "Alta": 1, "Normal": 2, "Baixa": 3}
-        requisicoes_filtradas.sort(key=lambda x: ordem_prioridade.get(x.get('prioridade', 'Normal'), 2))
-    elif ordenar_por == "Data Requisição":
+    # "Prioridade" mantém a ordem da própria fila (Urgente primeiro, depois chegada)
+    if ordenar_por == "Data Requisição":
         requisicoes_filtradas.sort(key=lambda x: x.get('data_requisicao', ''), reverse=True)
-    else:  # Solicitante
+    elif ordenar_por == "Solicitante":
         requisicoes_filtradas.sort(key=lambda x: x.get('solicitante', ''))
     
     # Exibir requisições
@@ -231,9 +228,8 @@ def show_criar_pedido_compras():
         st.error("❌ Banco de dados não disponível")
         return
     
-    # Buscar solicitações em cotação
-    solicitacoes = db.get_all_solicitacoes()
-    em_cotacao = [s for s in solicitacoes if s.get('etapa_atual') == 'Em Cotação']
+    # Buscar solicitações em cotação (fila em ordem de prioridade e chegada)
+    em_cotacao = db.next_work_items('Em Cotação')
     
     if not em_cotacao:
         st.info("📋 Não há cotações prontas para gerar pedido de compras.")
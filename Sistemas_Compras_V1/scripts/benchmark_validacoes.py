@@ -0,0 +1,100 @@
+"""
+Benchmark da validação em lote (ValidadorSistema.validar_solicitacoes_lote)
+
+Compara o lote vetorizado com o laço por linha (validar_solicitacao_completa) em N
+solicitações com 1 a 3 itens cada: um cenário só com linhas válidas e outro com ~20% de
+linhas inválidas (campos vazios, valores fora da faixa, itens inválidos). Também confere
+que as duas validações chegam ao mesmo resultado.
+
+Usage:
+    python scripts/benchmark_validacoes.py [--linhas 100000] [--repeticoes 3]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Dict, List
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from validacoes_sistema import (DEPARTAMENTOS_VALIDOS, PRIORIDADES_VALIDAS, UNIDADES_VALIDAS,
+                                ValidadorSistema)
+
+
+def gerar_solicitacoes(n: int, taxa_invalidas: float, semente: int = 42) -> List[Dict]:
+    """Solicitações sintéticas; `taxa_invalidas` das linhas recebem um erro aleatório"""
+    rnd = random.Random(semente)
+    solicitacoes = []
+    for i in range(n):
+        itens = [
+            {"quantidade": rnd.randint(1, 50), "unidade": rnd.choice(UNIDADES_VALIDAS),
+             "valor_unitario": round(rnd.uniform(1, 500), 2)}
+            for _ in range(rnd.randint(1, 3))
+        ]
+        sol = {
+            "solicitante": f"Usuário {i % 97}",
+            "departamento": rnd.choice(DEPARTAMENTOS_VALIDOS),
+            "prioridade": rnd.choice(PRIORIDADES_VALIDAS),
+            "descricao": f"Compra de material para manutenção #{i}",
+            "valor_total": round(sum(it["quantidade"] * it["valor_unitario"] for it in itens), 2),
+            "itens": itens,
+        }
+        if rnd.random() < taxa_invalidas:
+            erro = rnd.randrange(7)
+            if erro == 0:
+                sol["solicitante"] = ""
+            elif erro == 1:
+                sol["prioridade"] = "Média"
+            elif erro == 2:
+                sol["descricao"] = "curta"
+            elif erro == 3:
+                sol["valor_total"] = 0
+            elif erro == 4:
+                sol["valor_total"] = 2_000_000
+            elif erro == 5:
+                sol["itens"] = []
+            else:
+                sol["itens"][0]["quantidade"] = 0
+        solicitacoes.append(sol)
+    return solicitacoes
+
+
+def medir(funcao, repeticoes: int) -> float:
+    """Melhor tempo (s) entre as repetições"""
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da validação em lote de solicitações")
+    parser.add_argument("--linhas", type=int, default=100_000)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    for cenario, taxa in (("válidas", 0.0), ("mistas (~20% inválidas)", 0.2)):
+        solicitacoes = gerar_solicitacoes(args.linhas, taxa)
+        df = pd.DataFrame(solicitacoes)
+
+        t_lote = medir(lambda: ValidadorSistema.validar_solicitacoes_lote(df), args.repeticoes)
+        t_laco = medir(lambda: [ValidadorSistema.validar_solicitacao_completa(s) for s in solicitacoes],
+                       args.repeticoes)
+
+        validos, mensagens = ValidadorSistema.validar_solicitacoes_lote(df)
+        unitarios = [ValidadorSistema.validar_solicitacao_completa(s) for s in solicitacoes]
+        divergencias = sum(
+            bool(validos.iat[i]) != ok or mensagens.iat[i] != "; ".join(erros)
+            for i, (ok, erros) in enumerate(unitarios)
+        )
+        print(f"{args.linhas} solicitações {cenario}: lote {t_lote:.3f}s, laço por linha {t_laco:.3f}s, "
+              f"{int((~validos).sum())} inválidas, {divergencias} divergências")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""
+Geração em lote de PDFs de Pedido de Compras e Requisição a partir das solicitações
+
+Reaproveita o pipeline reportlab de generate_pdf_from_md.py (estilos cacheados por
+processo) e distribui os documentos entre processos com ProcessPoolExecutor. Cada PDF
+é gravado com nome derivado do hash do seu conteúdo (<dir>/<tipo>/<sha256>.pdf):
+documentos inalterados não são renderizados de novo. Um index.json por tipo mapeia
+o número da solicitação para o arquivo atual.
+
+Usage:
+    python scripts/generate_documents.py --tipo pedido [--etapa "Compra feita"] [--dir documentos] [--workers 4]
+    python scripts/generate_documents.py --tipo requisicao --numeros 10 11 12
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from generate_pdf_from_md import build_styles
+
+# Incrementar ao mudar o layout: invalida os PDFs já gerados
+TEMPLATE_VERSION = 1
+OUTPUT_DIR_PADRAO = "documentos"
+
+TIPOS = {
+    "pedido": "Pedido de Compras",
+    "requisicao": "Requisição",
+}
+
+# Campos da solicitação usados em cada documento (e no hash do conteúdo)
+CAMPOS = {
+    "pedido": [
+        "numero_pedido_compras", "data_numero_pedido", "numero_solicitacao_estoque", "numero_requisicao",
+        "solicitante", "departamento", "prioridade", "local_aplicacao", "descricao",
+        "fornecedor_final", "fornecedor_recomendado", "valor_final", "valor_estimado",
+        "data_entrega_prevista", "observacoes_pedido_compras", "itens",
+    ],
+    "requisicao": [
+        "numero_requisicao", "data_requisicao", "responsavel_estoque", "numero_solicitacao_estoque",
+        "solicitante", "departamento", "prioridade", "local_aplicacao", "descricao",
+        "observacoes_requisicao", "itens",
+    ],
+}
+
+
+@lru_cache(maxsize=None)
+def get_fonts() -> Dict[str, str]:
+    """Registra a fonte do documento uma vez por processo (TTF opcional via PDF_FONT_TTF)"""
+    ttf = os.getenv("PDF_FONT_TTF")
+    if ttf and os.path.isfile(ttf):
+        pdfmetrics.registerFont(TTFont("DocFont", ttf))
+        return {"normal": "DocFont", "bold": "DocFont"}
+    return {"normal": "Helvetica", "bold": "Helvetica-Bold"}
+
+
+@lru_cache(maxsize=None)
+def get_document_styles():
+    """Estilos de generate_pdf_from_md acrescidos dos usados nos documentos (cache por processo)"""
+    styles = build_styles()
+    fonts = get_fonts()
+    styles.add(ParagraphStyle(name="CellZiran", fontName=fonts["normal"], fontSize=9, leading=11))
+    styles.add(ParagraphStyle(name="LabelZiran", fontName=fonts["bold"], fontSize=9, leading=11, textColor=colors.HexColor('#4A5568')))
+    return styles
+
+
+def _init_worker():
+    # Aquece os caches do processo antes do primeiro documento
+    get_document_styles()
+
+
+def document_payload(solicitacao: Dict, tipo: str) -> Dict:
+    """Extrai da solicitação apenas os campos que aparecem no documento"""
+    payload = {campo: solicitacao.get(campo) for campo in CAMPOS[tipo]}
+    itens = payload.get("itens") or []
+    if isinstance(itens, str):
+        try:
+            itens = json.loads(itens)
+        except ValueError:
+            itens = []
+    payload["itens"] = itens if isinstance(itens, list) else []
+    return payload
+
+
+def content_hash(payload: Dict, tipo: str) -> str:
+    """Hash estável do conteúdo do documento (inclui tipo e versão do template)"""
+    bruto = json.dumps({"tipo": tipo, "versao": TEMPLATE_VERSION, "dados": payload},
+                       sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(bruto.encode("utf-8")).hexdigest()
+
+
+def _brl(valor) -> str:
+    try:
+        return f"R$ {float(valor):,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+    except (TypeError, ValueError):
+        return "-"
+
+
+def _texto(valor) -> str:
+    if valor is None or valor == "":
+        return "-"
+    return str(valor).replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def build_story(payload: Dict, tipo: str) -> List:
+    """Monta o conteúdo (flowables) do Pedido de Compras ou da Requisição"""
+    styles = get_document_styles()
+    story = []
+
+    if tipo == "pedido":
+        titulo = f"Pedido de Compras Nº {_texto(payload.get('numero_pedido_compras'))}"
+        campos = [
+            ("Data do Pedido", payload.get("data_numero_pedido")),
+            ("Solicitação", payload.get("numero_solicitacao_estoque")),
+            ("Requisição", payload.get("numero_requisicao")),
+            ("Fornecedor", payload.get("fornecedor_final") or payload.get("fornecedor_recomendado")),
+            ("Valor", _brl(payload.get("valor_final") or payload.get("valor_estimado"))),
+            ("Entrega Prevista", payload.get("data_entrega_prevista")),
+        ]
+        observacoes = payload.get("observacoes_pedido_compras")
+    else:
+        titulo = f"Requisição Nº {_texto(payload.get('numero_requisicao'))}"
+        campos = [
+            ("Data da Requisição", payload.get("data_requisicao")),
+            ("Solicitação", payload.get("numero_solicitacao_estoque")),
+            ("Responsável Estoque", payload.get("responsavel_estoque")),
+        ]
+        observacoes = payload.get("observacoes_requisicao")
+
+    campos += [
+        ("Solicitante", payload.get("solicitante")),
+        ("Departamento", payload.get("departamento")),
+        ("Prioridade", payload.get("prioridade")),
+        ("Local de Aplicação", payload.get("local_aplicacao")),
+    ]
+
+    story.append(Paragraph(titulo, styles["TitleZiran"]))
+    story.append(Spacer(1, 6))
+
+    dados = [[Paragraph(rotulo, styles["LabelZiran"]), Paragraph(_texto(valor), styles["CellZiran"])]
+             for rotulo, valor in campos]
+    tabela = Table(dados, colWidths=[130, 390])
+    tabela.setStyle(TableStyle([
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ("LINEBELOW", (0, 0), (-1, -1), 0.25, colors.HexColor('#E2E8F0')),
+    ]))
+    story.append(tabela)
+
+    story.append(Paragraph("Descrição", styles["H2Ziran"]))
+    story.append(Paragraph(_texto(payload.get("descricao")), styles["BodyZiran"]))
+
+    itens = payload.get("itens") or []
+    if itens:
+        story.append(Paragraph("Itens", styles["H2Ziran"]))
+        linhas = [[Paragraph(c, styles["LabelZiran"]) for c in ("Código", "Descrição", "Qtd", "Unidade")]]
+        for item in itens:
+            linhas.append([
+                Paragraph(_texto(item.get("codigo")), styles["CellZiran"]),
+                Paragraph(_texto(item.get("nome") or item.get("descricao")), styles["CellZiran"]),
+                Paragraph(_texto(item.get("quantidade")), styles["CellZiran"]),
+                Paragraph(_texto(item.get("unidade")), styles["CellZiran"]),
+            ])
+        tabela_itens = Table(linhas, colWidths=[80, 320, 50, 70], repeatRows=1)
+        tabela_itens.setStyle(TableStyle([
+            ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor('#EDF2F7')),
+            ("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor('#CBD5E0')),
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ]))
+        story.append(tabela_itens)
+
+    if observacoes:
+        story.append(Paragraph("Observações", styles["H2Ziran"]))
+        story.append(Paragraph(_texto(observacoes), styles["BodyZiran"]))
+
+    return story
+
+
+def render_document(payload: Dict, tipo: str, output_pdf: str):
+    """Renderiza o PDF em arquivo temporário e troca de forma atômica (sem PDFs truncados)"""
+    out_dir = os.path.dirname(os.path.abspath(output_pdf))
+    fd, tmp = tempfile.mkstemp(suffix=".pdf.tmp", dir=out_dir)
+    os.close(fd)
+    try:
+        doc = SimpleDocTemplate(
+            tmp,
+            pagesize=A4,
+            rightMargin=36,
+            leftMargin=36,
+            topMargin=36,
+            bottomMargin=36,
+            title=TIPOS[tipo],
+            author="Sistema de Gestão de Compras"
+        )
+        doc.build(build_story(payload, tipo))
+        os.replace(tmp, output_pdf)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _render_job(payload: Dict, tipo: str, output_pdf: str) -> str:
+    # Executado nos processos do pool
+    render_document(payload, tipo, output_pdf)
+    return output_pdf
+
+
+def generate_batch(solicitacoes: List[Dict], tipo: str, output_dir: str = OUTPUT_DIR_PADRAO,
+                   workers: Optional[int] = None, progress=None) -> Dict[str, int]:
+    """
+    Gera os documentos de um lote de solicitações em paralelo
+
+    Documentos cujo hash de conteúdo já existe em disco são pulados. O index.json do
+    tipo é atualizado ao final com numero_solicitacao_estoque -> arquivo apenas para os
+    documentos inalterados ou gerados com sucesso; em caso de erro o mapeamento anterior
+    é mantido.
+
+    Args:
+        solicitacoes: Solicitações (dicts como em get_all_solicitacoes)
+        tipo: "pedido" ou "requisicao"
+        output_dir: Diretório base dos documentos
+        workers: Processos do pool (padrão: os.cpu_count())
+        progress: Callback opcional (concluidos, total)
+
+    Returns:
+        Dict[str, int]: Contagem de gerados, inalterados e erros
+    """
+    if tipo not in TIPOS:
+        raise ValueError(f"Tipo de documento inválido: {tipo}")
+
+    destino = os.path.join(output_dir, tipo)
+    os.makedirs(destino, exist_ok=True)
+    index_path = os.path.join(destino, "index.json")
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+
+    pendentes = []
+    resultado = {"gerados": 0, "inalterados": 0, "erros": 0}
+    for sol in solicitacoes:
+        payload = document_payload(sol, tipo)
+        chave = str(sol.get("numero_solicitacao_estoque"))
+        arquivo = content_hash(payload, tipo) + ".pdf"
+        caminho = os.path.join(destino, arquivo)
+        if os.path.exists(caminho):
+            index[chave] = arquivo
+            resultado["inalterados"] += 1
+        else:
+            pendentes.append((chave, arquivo, payload, caminho))
+
+    total = len(pendentes)
+    if pendentes:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futuros = {
+                pool.submit(_render_job, payload, tipo, caminho): (chave, arquivo)
+                for chave, arquivo, payload, caminho in pendentes
+            }
+            for concluidos, futuro in enumerate(as_completed(futuros), start=1):
+                try:
+                    futuro.result()
+                    chave, arquivo = futuros[futuro]
+                    index[chave] = arquivo
+                    resultado["gerados"] += 1
+                except Exception as e:
+                    resultado["erros"] += 1
+                    print(f"❌ Erro ao gerar documento: {e}")
+                if progress:
+                    progress(concluidos, total)
+
+    tmp_index = index_path + ".tmp"
+    with open(tmp_index, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_index, index_path)
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera PDFs de Pedido de Compras/Requisição em lote")
+    parser.add_argument("--tipo", choices=sorted(TIPOS), required=True)
+    parser.add_argument("--etapa", help="Filtra por etapa_atual (ex.: 'Compra feita')")
+    parser.add_argument("--numeros", type=int, nargs="*", help="Números de solicitação específicos")
+    parser.add_argument("--dir", default=OUTPUT_DIR_PADRAO, help=f"Diretório de saída (padrão: {OUTPUT_DIR_PADRAO})")
+    parser.add_argument("--workers", type=int, help="Processos em paralelo (padrão: número de CPUs)")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from database_local import get_local_database
+    db = get_local_database()
+    if not db.db_available:
+        print(f"❌ Banco indisponível: {db.last_error}")
+        sys.exit(1)
+
+    # Só gera o documento quando o número correspondente já existe
+    campo_numero = "numero_pedido_compras" if args.tipo == "pedido" else "numero_requisicao"
+    numeros = set(args.numeros or [])
+    solicitacoes = [
+        s for s in db.iter_solicitacoes(etapa=args.etapa)
+        if s.get(campo_numero) and (not numeros or s.get("numero_solicitacao_estoque") in numeros)
+    ]
+
+    inicio = time.time()
+    resultado = generate_batch(solicitacoes, args.tipo, args.dir, args.workers)
+    print(f"PDFs em {os.path.join(args.dir, args.tipo)}: {resultado['gerados']} gerados, "
+          f"{resultado['inalterados']} inalterados, {resultado['erros']} erros ({time.time() - inicio:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import sys
 import os
+from functools import lru_cache
 from typing import List
 from reportlab.lib.pagesizes import A4
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Preformatted
@@ -8,7 +9,9 @@ from reportlab.lib.enums import TA_LEFT
 from reportlab.lib import colors
 
 
+@lru_cache(maxsize=None)
 def build_styles():
+    # Cacheado por processo: montar o stylesheet a cada documento pesa em lotes grandes
     styles = getSampleStyleSheet()
     styles.add(ParagraphStyle(name="TitleZiran", fontName="Helvetica-Bold", fontSize=18, leading=22, spaceAfter=12, textColor=colors.HexColor('#2D3748')))
     styles.add(ParagraphStyle(name="H1Ziran", parent=styles["Heading1"], fontSize=16, leading=20, spaceBefore=12, spaceAfter=8, textColor=colors.HexColor('#2D3748')))
@@ -0,0 +1,320 @@
+"""
+Instrumentação dos comandos SQL do LocalDatabaseManager
+
+A conexão do gerenciador é embrulhada em ConexaoInstrumentada: todo execute/executemany
+(e a leitura das linhas com fetch*) é cronometrado e agregado por formato de comando
+(SQL normalizado, literais trocados por ?). Para cada formato ficam contagem, tempo total,
+máximo, p95 (sobre as últimas AMOSTRAS_P95 execuções), linhas, erros e os pontos do
+código que o chamaram.
+
+Comandos acima de SQL_LENTA_MS (padrão 250 ms) vão para o log de consultas lentas
+(SQL_LOG_LENTAS, padrão sql_lentas.log, JSON lines) junto com o plano de execução
+(EXPLAIN QUERY PLAN no SQLite, EXPLAIN no PostgreSQL). SQL_MONITOR=0 desliga tudo.
+
+As estatísticas são do processo (uma instância do Streamlit) e zeram ao reiniciá-lo.
+"""
+
+import collections
+import datetime
+import json
+import os
+import re
+import sys
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+# Execuções guardadas por formato para o cálculo do p95
+AMOSTRAS_P95 = 1000
+# Chamadores distintos guardados por formato
+MAX_CHAMADORES = 20
+# Comandos cujo plano de execução é registrado no log de lentas
+_COMANDOS_COM_PLANO = ("SELECT", "WITH", "UPDATE", "DELETE", "INSERT", "REPLACE")
+# Módulos da camada de banco: o chamador relevante é o primeiro frame fora deles
+_MODULOS_BANCO = ("sql_monitor.py", "db_backends.py", "database_local.py")
+
+_RE_STRING = re.compile(r"'(?:[^']|'')*'")
+_RE_NUMERO = re.compile(r"\b\d+(?:\.\d+)?\b")
+_RE_LISTA = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_RE_TUPLAS = re.compile(r"(\(\?\.\.\.\))(?:\s*,\s*\(\?\.\.\.\))+")
+_RE_ESPACOS = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def normalizar_sql(sql: str) -> str:
+    """Formato do comando: espaços colapsados, literais e listas IN (?, ?, ...) trocados por ?"""
+    texto = _RE_ESPACOS.sub(' ', sql).strip().rstrip(';')
+    texto = _RE_STRING.sub('?', texto)
+    texto = _RE_NUMERO.sub('?', texto)
+    texto = _RE_LISTA.sub('(?...)', texto)
+    return _RE_TUPLAS.sub(r'\1, ...', texto)
+
+
+def _chamador() -> str:
+    """Ponto do código que originou o comando: método do gerenciador ← tela/script"""
+    frame = sys._getframe(2)
+    metodo = None
+    while frame is not None:
+        arquivo = os.path.basename(frame.f_code.co_filename)
+        if arquivo not in _MODULOS_BANCO:
+            # Pasta + arquivo bastam para identificar a tela (profiles/...) ou o script
+            caminho = os.path.normpath(frame.f_code.co_filename).split(os.sep)[-2:]
+            origem = f"{'/'.join(caminho)}:{frame.f_lineno} {frame.f_code.co_name}"
+            return f"{metodo} ← {origem}" if metodo else origem
+        if metodo is None and arquivo == "database_local.py":
+            metodo = frame.f_code.co_name
+        frame = frame.f_back
+    return metodo or "?"
+
+
+def _percentil(valores, fracao: float) -> float:
+    ordenados = sorted(valores)
+    if not ordenados:
+        return 0.0
+    return ordenados[min(len(ordenados) - 1, int(round(fracao * (len(ordenados) - 1))))]
+
+
+class MonitorSQL:
+    """Agregado por formato de comando + log de consultas lentas"""
+
+    def __init__(self, limite_ms: float = None, caminho_log: str = None):
+        self.limite_ms = float(os.getenv('SQL_LENTA_MS', '250')) if limite_ms is None else limite_ms
+        self.caminho_log = caminho_log or os.getenv('SQL_LOG_LENTAS', 'sql_lentas.log')
+        self.desde = datetime.datetime.now()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict] = {}
+
+    def registrar(self, sql: str, params, duracao: float, linhas: int, chamador: str,
+                  erro: Exception = None, backend=None, conn=None):
+        """Contabiliza uma execução (duracao em segundos); grava no log se passou do limite"""
+        formato = normalizar_sql(sql)
+        ms = duracao * 1000
+        with self._lock:
+            stats = self._stats.get(formato)
+            if stats is None:
+                stats = self._stats[formato] = {
+                    'contagem': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'linhas': 0, 'erros': 0, 'lentas': 0,
+                    'amostras': collections.deque(maxlen=AMOSTRAS_P95),
+                    'chamadores': collections.Counter(),
+                }
+            stats['contagem'] += 1
+            stats['total_ms'] += ms
+            stats['max_ms'] = max(stats['max_ms'], ms)
+            stats['linhas'] += max(linhas, 0)
+            stats['amostras'].append(ms)
+            if erro is not None:
+                stats['erros'] += 1
+            if chamador in stats['chamadores'] or len(stats['chamadores']) < MAX_CHAMADORES:
+                stats['chamadores'][chamador] += 1
+            lenta = ms >= self.limite_ms
+            if lenta:
+                stats['lentas'] += 1
+
+        if lenta:
+            self._registrar_lenta(sql, formato, params, ms, linhas, chamador, erro, backend, conn)
+
+    def _registrar_lenta(self, sql, formato, params, ms, linhas, chamador, erro, backend, conn):
+        plano = []
+        comando = formato.split(' ', 1)[0].upper()
+        if backend is not None and conn is not None and erro is None and comando in _COMANDOS_COM_PLANO:
+            try:
+                plano = backend.plano(conn, sql, params)
+            except Exception as e:
+                plano = [f"(plano indisponível: {e})"]
+        registro = {
+            'data': datetime.datetime.now().isoformat(timespec='seconds'),
+            'duracao_ms': round(ms, 1),
+            'linhas': linhas,
+            'chamador': chamador,
+            'sql': formato,
+            'plano': plano,
+        }
+        if erro is not None:
+            registro['erro'] = str(erro)
+        try:
+            with self._lock, open(self.caminho_log, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"Erro ao gravar log de consultas lentas: {e}")
+
+    def estatisticas(self, ordenar_por: str = 'total_ms', limite: int = None) -> List[Dict]:
+        """Formatos de comando ordenados (padrão: tempo total), com média e p95 em ms"""
+        with self._lock:
+            itens = [(formato, dict(stats), list(stats['amostras']), stats['chamadores'].most_common(3))
+                     for formato, stats in self._stats.items()]
+        resultado = []
+        for formato, stats, amostras, chamadores in itens:
+            resultado.append({
+                'sql': formato,
+                'contagem': stats['contagem'],
+                'total_ms': round(stats['total_ms'], 1),
+                'media_ms': round(stats['total_ms'] / stats['contagem'], 2),
+                'p95_ms': round(_percentil(amostras, 0.95), 2),
+                'max_ms': round(stats['max_ms'], 1),
+                'linhas': stats['linhas'],
+                'erros': stats['erros'],
+                'lentas': stats['lentas'],
+                'chamadores': [f"{c} ({n}x)" for c, n in chamadores],
+            })
+        resultado.sort(key=lambda item: item[ordenar_por], reverse=True)
+        return resultado[:limite] if limite else resultado
+
+    def consultas_lentas(self, limite: int = 50) -> List[Dict]:
+        """Últimas entradas do log de consultas lentas (mais recentes primeiro)"""
+        if not os.path.exists(self.caminho_log):
+            return []
+        with open(self.caminho_log, 'r', encoding='utf-8', errors='replace') as f:
+            ultimas = collections.deque(f, maxlen=limite)
+        registros = []
+        for linha in reversed(ultimas):
+            try:
+                registros.append(json.loads(linha))
+            except ValueError:
+                continue
+        return registros
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self.desde = datetime.datetime.now()
+
+
+class CursorInstrumentado:
+    """Cursor que cronometra execute/executemany e a leitura das linhas do último comando"""
+
+    def __init__(self, cursor, conexao: "ConexaoInstrumentada"):
+        self._cursor = cursor
+        self._conexao = conexao
+        self._pendente: Optional[List] = None
+
+    def __getattr__(self, nome):
+        return getattr(self._cursor, nome)
+
+    def execute(self, sql: str, params=None):
+        self._finalizar()
+        chamador = _chamador()
+        inicio = time.perf_counter()
+        try:
+            if params is None:
+                self._cursor.execute(sql)
+            else:
+                self._cursor.execute(sql, params)
+        except Exception as e:
+            self._conexao.registrar(sql, params, time.perf_counter() - inicio, 0, chamador, e)
+            raise
+        duracao = time.perf_counter() - inicio
+        if self._cursor.description is None:
+            self._conexao.registrar(sql, params, duracao, self._cursor.rowcount, chamador)
+        else:
+            # SELECT: o tempo de leitura das linhas (fetch*) conta para o mesmo comando
+            self._pendente = [sql, params, duracao, 0, chamador]
+        return self
+
+    def executemany(self, sql: str, seq_params):
+        self._finalizar()
+        chamador = _chamador()
+        inicio = time.perf_counter()
+        try:
+            self._cursor.executemany(sql, seq_params)
+        except Exception as e:
+            self._conexao.registrar(sql, None, time.perf_counter() - inicio, 0, chamador, e)
+            raise
+        self._conexao.registrar(sql, None, time.perf_counter() - inicio, self._cursor.rowcount, chamador)
+        return self
+
+    def _ler(self, metodo, *args):
+        inicio = time.perf_counter()
+        resultado = metodo(*args)
+        if self._pendente is not None:
+            self._pendente[2] += time.perf_counter() - inicio
+        return resultado
+
+    def fetchone(self):
+        linha = self._ler(self._cursor.fetchone)
+        if linha is None:
+            self._finalizar()
+        elif self._pendente is not None:
+            self._pendente[3] += 1
+        return linha
+
+    def fetchmany(self, size: int = None):
+        tamanho = self._cursor.arraysize if size is None else size
+        linhas = self._ler(self._cursor.fetchmany, tamanho)
+        if self._pendente is not None:
+            self._pendente[3] += len(linhas)
+        if len(linhas) < tamanho:
+            self._finalizar()
+        return linhas
+
+    def fetchall(self):
+        linhas = self._ler(self._cursor.fetchall)
+        if self._pendente is not None:
+            self._pendente[3] += len(linhas)
+        self._finalizar()
+        return linhas
+
+    def __iter__(self):
+        while True:
+            linha = self.fetchone()
+            if linha is None:
+                return
+            yield linha
+
+    def _finalizar(self):
+        """Registra o SELECT pendente (linhas esgotadas, novo comando ou cursor fechado)"""
+        pendente, self._pendente = self._pendente, None
+        if pendente is not None:
+            self._conexao.registrar(*pendente)
+
+    def close(self):
+        self._finalizar()
+        self._cursor.close()
+
+    def __del__(self):
+        try:
+            self._finalizar()
+        except Exception:
+            pass
+
+
+class ConexaoInstrumentada:
+    """Conexão do backend com os cursores instrumentados; o restante é repassado à conexão real"""
+
+    def __init__(self, conn, backend, monitor: MonitorSQL):
+        self._conn = conn
+        self._backend = backend
+        self.monitor = monitor
+
+    def __getattr__(self, nome):
+        return getattr(self._conn, nome)
+
+    def cursor(self) -> CursorInstrumentado:
+        return CursorInstrumentado(self._conn.cursor(), self)
+
+    def execute(self, sql: str, params=None) -> CursorInstrumentado:
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql: str, seq_params) -> CursorInstrumentado:
+        return self.cursor().executemany(sql, seq_params)
+
+    def registrar(self, sql, params, duracao, linhas, chamador, erro=None):
+        self.monitor.registrar(sql, params, duracao, linhas, chamador, erro, self._backend, self._conn)
+
+
+_monitor: Optional[MonitorSQL] = None
+
+
+def get_monitor_sql() -> MonitorSQL:
+    """Retorna o monitor único do processo"""
+    global _monitor
+    if _monitor is None:
+        _monitor = MonitorSQL()
+    return _monitor
+
+
+def instrumentar(conn, backend):
+    """Embrulha a conexão do backend (sem efeito com SQL_MONITOR=0)"""
+    if os.getenv('SQL_MONITOR', '1').strip().lower() in ('0', 'false', 'nao', 'não'):
+        return conn
+    return ConexaoInstrumentada(conn, backend, get_monitor_sql())
@@ -4,9 +4,12 @@ Módulo de Validações para o Sistema de Gestão de Compras
 Implementa todas as validações identificadas nos testes
 """
 
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Tuple, Optional, Sequence
 import re
 
+import numpy as np
+import pandas as pd
+
 # Configurações do sistema
 PRIORIDADES_VALIDAS = ["Urgente", "Alta", "Normal", "Baixa"]
 DEPARTAMENTOS_VALIDOS = [
@@ -15,6 +18,45 @@ DEPARTAMENTOS_VALIDOS = [
 ]
 UNIDADES_VALIDAS = ["UN", "PC", "CX", "KG", "L", "M", "M2"]
 
+# Campos exigidos em uma solicitação (valores vazios, zero ou lista vazia contam como ausentes)
+CAMPOS_OBRIGATORIOS = ['solicitante', 'departamento', 'prioridade', 'descricao', 'valor_total', 'itens']
+CAMPOS_ITEM = ['quantidade', 'unidade', 'valor_unitario']
+
+# Limites usados nas validações unitárias e em lote
+VALOR_MAXIMO = 1000000
+QUANTIDADE_MAXIMA = 10000
+DESCRICAO_MIN = 10
+DESCRICAO_MAX = 1000
+
+# Mensagens das validações em lote (mesmos textos das validações unitárias)
+MENSAGENS_VALOR = {
+    "nulo": "Valor não pode ser nulo",
+    "nao_numerico": "Valor deve ser numérico",
+    "minimo": "Valor não pode ser negativo",
+    "maximo": "Valor excede limite máximo permitido (R$ 1.000.000)",
+}
+MENSAGENS_QUANTIDADE = {
+    "nulo": "Quantidade não pode ser nula",
+    "nao_numerico": "Quantidade deve ser numérica",
+    "minimo": "Quantidade deve ser maior que zero",
+    "maximo": "Quantidade excede limite máximo (10.000 unidades)",
+}
+
+# Transições permitidas entre etapas do fluxo
+TRANSICOES_VALIDAS = {
+    "Solicitação": ["Requisição"],
+    "Requisição": ["Suprimentos"],
+    "Suprimentos": ["Em Cotação"],
+    "Em Cotação": ["Pedido de Compras"],
+    "Pedido de Compras": ["Aguardando Aprovação"],
+    "Aguardando Aprovação": ["Aprovado", "Reprovado"],
+    "Aprovado": ["Compra feita"],
+    "Reprovado": [],  # Status final
+    "Compra feita": ["Aguardando Entrega"],
+    "Aguardando Entrega": ["Pedido Finalizado"],
+    "Pedido Finalizado": []  # Status final
+}
+
 class ValidadorSistema:
     """Classe para validações do sistema"""
     
@@ -41,7 +83,7 @@ class ValidadorSistema:
         if valor == 0:
             return True, "Atenção: Valor zero detectado"
         
-        if valor > 1000000:  # Limite máximo de 1 milhão
+        if valor > VALOR_MAXIMO:  # Limite máximo de 1 milhão
             return False, "Valor excede limite máximo permitido (R$ 1.000.000)"
         
         return True, ""
@@ -114,7 +156,7 @@ class ValidadorSistema:
         if quantidade <= 0:
             return False, "Quantidade deve ser maior que zero"
         
-        if quantidade > 10000:  # Limite máximo
+        if quantidade > QUANTIDADE_MAXIMA:  # Limite máximo
             return False, "Quantidade excede limite máximo (10.000 unidades)"
         
         return True, ""
@@ -162,10 +204,10 @@ class ValidadorSistema:
         
         descricao_limpa = descricao.strip()
         
-        if len(descricao_limpa) < 10:
+        if len(descricao_limpa) < DESCRICAO_MIN:
             return False, "Descrição deve ter pelo menos 10 caracteres"
         
-        if len(descricao_limpa) > 1000:
+        if len(descricao_limpa) > DESCRICAO_MAX:
             return False, "Descrição não pode exceder 1000 caracteres"
         
         return True, ""
@@ -184,12 +226,7 @@ class ValidadorSistema:
         erros = []
         
         # Validações obrigatórias
-        campos_obrigatorios = [
-            'solicitante', 'departamento', 'prioridade', 
-            'descricao', 'valor_total', 'itens'
-        ]
-        
-        for campo in campos_obrigatorios:
+        for campo in CAMPOS_OBRIGATORIOS:
             if campo not in solicitacao or not solicitacao[campo]:
                 erros.append(f"Campo obrigatório ausente: {campo}")
         
@@ -237,6 +274,79 @@ class ValidadorSistema:
         
         return len(erros) == 0, erros
     
+    @staticmethod
+    def validar_solicitacoes_lote(df: pd.DataFrame, campos: Sequence[str] = None,
+                                  apenas_obrigatorios: bool = False) -> Tuple[pd.Series, pd.Series]:
+        """
+        Valida um lote de solicitações de uma vez (importações e operações em massa)
+        
+        Mesmas regras e mensagens de validar_solicitacao_completa, aplicadas por coluna
+        (dtypes normalizados uma vez, comparações vetorizadas, conjuntos avaliados por valor
+        distinto): coluna ausente ou valor vazio (None, '', 0, lista vazia) gera "Campo
+        obrigatório ausente", e os itens de cada lista, explodidos em um DataFrame, passam
+        pelas regras de validar_itens_lote ("Item N - ..."). Diferenças em relação à validação
+        unitária: colunas numéricas aceitam texto numérico (planilhas) e valores não texto
+        em colunas de texto são comparados pela representação textual.
+        
+        Args:
+            df: DataFrame com uma solicitação por linha
+            campos: Campos validados (padrão: CAMPOS_OBRIGATORIOS)
+            apenas_obrigatorios: True aplica só a checagem de campo obrigatório
+            
+        Returns:
+            Tuple[pd.Series, pd.Series]: (máscara de linhas válidas, mensagens de erro por linha)
+        """
+        campos = list(campos or CAMPOS_OBRIGATORIOS)
+        regras = []
+        ausentes = {}
+        for campo in campos:
+            if campo in df.columns:
+                ausentes[campo] = _valor_ausente(df[campo])
+            regras.append((ausentes.get(campo, np.ones(len(df), dtype=bool)), f"Campo obrigatório ausente: {campo}"))
+        if apenas_obrigatorios:
+            return _consolidar(df.index, regras)
+        
+        if 'prioridade' in ausentes:
+            regras += _regras_conjunto(df['prioridade'], PRIORIDADES_VALIDAS, "Prioridade",
+                                       "Prioridade é obrigatória", "Prioridade inválida")
+        if 'departamento' in ausentes:
+            regras += _regras_conjunto(df['departamento'], DEPARTAMENTOS_VALIDOS, "Departamento",
+                                       "Departamento é obrigatório", "Departamento inválido")
+        if 'descricao' in ausentes:
+            vazia = ausentes['descricao']
+            tamanho = (df['descricao'].astype('string').str.strip().str.len()
+                       .to_numpy(dtype=float, na_value=np.nan))
+            regras += [
+                (vazia, "Descrição: Descrição é obrigatória"),
+                (~vazia & (tamanho < DESCRICAO_MIN), f"Descrição: Descrição deve ter pelo menos {DESCRICAO_MIN} caracteres"),
+                (~vazia & (tamanho > DESCRICAO_MAX), f"Descrição: Descrição não pode exceder {DESCRICAO_MAX} caracteres"),
+            ]
+        if 'valor_total' in ausentes:
+            regras += _regras_numericas(df['valor_total'], "Valor total", MENSAGENS_VALOR,
+                                        minimo_exclusivo=False, maximo=VALOR_MAXIMO)
+        erros_itens = []
+        if 'itens' in ausentes:
+            itens = df['itens'].to_numpy(dtype=object)
+            tamanhos = np.fromiter((len(valor) if isinstance(valor, list) else -1 for valor in itens),
+                                   dtype=np.int64, count=len(itens))
+            regras.append((tamanhos == 0, "Pelo menos um item deve ser adicionado"))
+            erros_itens = _erros_itens_aninhados(itens, tamanhos)
+        
+        return _consolidar(df.index, regras, erros_itens)
+    
+    @staticmethod
+    def validar_itens_lote(df: pd.DataFrame) -> Tuple[pd.Series, pd.Series]:
+        """
+        Valida um lote de itens (quantidade, unidade e valor_unitario, quando presentes)
+        
+        Args:
+            df: DataFrame com um item por linha
+            
+        Returns:
+            Tuple[pd.Series, pd.Series]: (máscara de linhas válidas, mensagens de erro por linha)
+        """
+        return _consolidar(df.index, [(mascara, mensagem) for _, mascara, mensagem in _regras_itens(df)])
+    
     @staticmethod
     def validar_transicao_status(status_atual: str, novo_status: str) -> Tuple[bool, str]:
         """
@@ -249,19 +359,7 @@ class ValidadorSistema:
         Returns:
             Tuple[bool, str]: (é_válida, mensagem_erro)
         """
-        transicoes_validas = {
-            "Solicitação": ["Requisição"],
-            "Requisição": ["Suprimentos"],
-            "Suprimentos": ["Em Cotação"],
-            "Em Cotação": ["Pedido de Compras"],
-            "Pedido de Compras": ["Aguardando Aprovação"],
-            "Aguardando Aprovação": ["Aprovado", "Reprovado"],
-            "Aprovado": ["Compra feita"],
-            "Reprovado": [],  # Status final
-            "Compra feita": ["Aguardando Entrega"],
-            "Aguardando Entrega": ["Pedido Finalizado"],
-            "Pedido Finalizado": []  # Status final
-        }
+        transicoes_validas = TRANSICOES_VALIDAS
         
         if status_atual not in transicoes_validas:
             return False, f"Status atual inválido: {status_atual}"
@@ -325,6 +423,141 @@ class ValidadorSistema:
         return True, ""
 
 
+def _vazio(valor) -> bool:
+    """`not valor`, tratando NaN/NA como vazio"""
+    if isinstance(valor, (list, dict, str)):
+        return not valor
+    return valor is None or bool(pd.isna(valor)) or not valor
+
+
+def _valor_ausente(coluna: pd.Series) -> np.ndarray:
+    """Equivalente por coluna de `not valor` (None/NaN, '', 0, lista vazia)"""
+    if pd.api.types.is_numeric_dtype(coluna):
+        return (coluna.isna() | coluna.eq(0)).to_numpy(dtype=bool)
+    if pd.api.types.is_string_dtype(coluna) and not pd.api.types.is_object_dtype(coluna):
+        return (coluna.isna() | coluna.eq('')).to_numpy(dtype=bool, na_value=True)
+    valores = coluna.to_numpy(dtype=object)
+    try:
+        codigos, distintos = pd.factorize(valores)
+    except TypeError:
+        # Valores não hashable (listas de itens): avalia valor a valor
+        return np.fromiter((not valor if isinstance(valor, (list, str)) else _vazio(valor) for valor in valores),
+                           dtype=bool, count=len(valores))
+    # Avalia só os valores distintos; o código -1 (None/NaN) cai na última posição
+    return np.append([not valor for valor in distintos], True).astype(bool)[codigos]
+
+
+def _regras_itens(df: pd.DataFrame) -> List[Tuple[str, np.ndarray, str]]:
+    """Regras de item como (campo, máscara, mensagem), para as colunas presentes"""
+    regras = []
+    if 'quantidade' in df.columns:
+        regras += [('quantidade', m, msg) for m, msg in
+                   _regras_numericas(df['quantidade'], "Quantidade", MENSAGENS_QUANTIDADE,
+                                     minimo_exclusivo=True, maximo=QUANTIDADE_MAXIMA)]
+    if 'unidade' in df.columns:
+        regras += [('unidade', m, msg) for m, msg in
+                   _regras_conjunto(df['unidade'], UNIDADES_VALIDAS, "Unidade",
+                                    "Unidade é obrigatória", "Unidade inválida", maiusculas=True)]
+    if 'valor_unitario' in df.columns:
+        regras += [('valor_unitario', m, msg) for m, msg in
+                   _regras_numericas(df['valor_unitario'], "Valor unitário", MENSAGENS_VALOR,
+                                     minimo_exclusivo=False, maximo=VALOR_MAXIMO)]
+    return regras
+
+
+def _erros_itens_aninhados(itens: np.ndarray, tamanhos: np.ndarray) -> List[Tuple[np.ndarray, np.ndarray, str]]:
+    """
+    Erros dos itens das listas de cada solicitação, como (linhas, posições no item, mensagem).
+    
+    As listas são explodidas uma vez e as colunas do DataFrame de itens saem direto dos
+    dicts (DataFrame(list) e json_normalize ficam 4x e 20x mais lentos); a checagem de
+    chave presente, como na validação unitária, só roda nos itens com erro.
+    """
+    com_itens = tamanhos > 0
+    if not com_itens.any():
+        return []
+    explodidos = pd.Series(itens, dtype=object)[com_itens].explode()
+    origem = explodidos.index.to_numpy()
+    planos = [item if isinstance(item, dict) else {} for item in explodidos.tolist()]
+    contagem = tamanhos[com_itens]
+    posicao = np.arange(len(planos)) - np.repeat(np.cumsum(contagem) - contagem, contagem)
+    df_itens = pd.DataFrame({campo: [item.get(campo) for item in planos] for campo in CAMPOS_ITEM})
+
+    erros = []
+    for campo, mascara, mensagem in _regras_itens(df_itens):
+        indices = np.flatnonzero(mascara)
+        presentes = np.fromiter((campo in planos[i] for i in indices), dtype=bool, count=indices.size)
+        indices = indices[presentes]
+        if indices.size:
+            erros.append((origem[indices], posicao[indices], mensagem))
+    return erros
+
+
+def _regras_conjunto(coluna: pd.Series, validos: List[str], rotulo: str, obrigatorio: str,
+                     invalido: str, maiusculas: bool = False) -> List[Tuple[np.ndarray, str]]:
+    """
+    Obrigatoriedade (`not valor`, como na validação unitária) e pertinência ao conjunto
+    após strip (e upper), avaliadas uma vez por valor distinto (factorize)
+    """
+    codigos, distintos = pd.factorize(coluna.to_numpy(dtype=object))
+    aceitos = set(validos)
+    normalizados = (str(valor).strip() for valor in distintos)
+    if maiusculas:
+        normalizados = (texto.upper() for texto in normalizados)
+    # O código -1 (None/NaN) cai na última posição: vazio e fora do conjunto não se somam
+    vazio = np.append([not valor for valor in distintos], True).astype(bool)[codigos]
+    fora = np.append([texto not in aceitos for texto in normalizados], False).astype(bool)[codigos] & ~vazio
+    return [
+        (vazio, f"{rotulo}: {obrigatorio}"),
+        (fora, f"{rotulo}: {invalido}. Valores aceitos: {', '.join(validos)}"),
+    ]
+
+
+def _regras_numericas(coluna: pd.Series, rotulo: str, mensagens: Dict[str, str],
+                      minimo_exclusivo: bool, maximo: float) -> List[Tuple[np.ndarray, str]]:
+    """Nulo, não numérico e faixa (coluna inteira convertida uma vez com to_numeric)"""
+    numeros = pd.to_numeric(coluna, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    nulo = coluna.isna().to_numpy(dtype=bool)
+    abaixo = numeros <= 0 if minimo_exclusivo else numeros < 0
+    return [
+        (nulo, f"{rotulo}: {mensagens['nulo']}"),
+        (~nulo & np.isnan(numeros), f"{rotulo}: {mensagens['nao_numerico']}"),
+        (abaixo, f"{rotulo}: {mensagens['minimo']}"),
+        (numeros > maximo, f"{rotulo}: {mensagens['maximo']}"),
+    ]
+
+
+def _consolidar(index: pd.Index, regras: List[Tuple[np.ndarray, str]],
+                erros_itens: List[Tuple[np.ndarray, np.ndarray, str]] = ()) -> Tuple[pd.Series, pd.Series]:
+    """
+    Combina as máscaras em (válidos, mensagens '; '-separadas): primeiro as regras da
+    solicitação, na ordem da lista, depois os erros de itens ("Item N - ..."), por item.
+    Só as linhas com erro passam pelo join das mensagens.
+    """
+    linhas, chaves, textos = [], [], []
+    for ordem, (mascara, mensagem) in enumerate(regras):
+        posicoes = np.flatnonzero(mascara)
+        linhas.append(posicoes)
+        chaves.append(np.full(posicoes.size, ordem))
+        textos.append(np.full(posicoes.size, mensagem, dtype=object))
+    for ordem, (posicoes, itens, mensagem) in enumerate(erros_itens):
+        linhas.append(posicoes)
+        chaves.append(len(regras) + itens * len(erros_itens) + ordem)
+        textos.append(np.array([f"Item {i + 1} - {mensagem}" for i in itens], dtype=object))
+
+    invalido = np.zeros(len(index), dtype=bool)
+    mensagens = np.full(len(index), '', dtype=object)
+    linhas = np.concatenate(linhas) if linhas else np.empty(0, dtype=np.int64)
+    if linhas.size:
+        ordem = np.lexsort((np.concatenate(chaves), linhas))
+        linhas, textos = linhas[ordem], np.concatenate(textos)[ordem]
+        inicios = np.flatnonzero(np.r_[True, linhas[1:] != linhas[:-1]])
+        for inicio, fim in zip(inicios, np.r_[inicios[1:], linhas.size]):
+            mensagens[linhas[inicio]] = '; '.join(textos[inicio:fim])
+        invalido[linhas] = True
+    return pd.Series(~invalido, index=index), pd.Series(mensagens, index=index)
+
+
 def aplicar_validacoes_no_sistema():
     """
     Função para aplicar as validações no sistema principal
@@ -71,6 +71,30 @@ class AuditoriaAdmin(models.Model):
         - `request`: usado para capturar IP.
         - `kwargs`: ignorados ou serializados dentro de `detalhes`.
         """
+        try:
+            registro = cls.montar_registro(usuario, acao, descricao, objeto, request, **kwargs)
+            if registro is not None:
+                registro.save()
+        except Exception:
+            # Fail-safe: nunca quebrar o fluxo por conta da auditoria
+            return
+
+    @classmethod
+    def log_action_em_lote(cls, usuario=None, acao: str = "INFO", descricao: str = "", objeto=None,
+                           request=None, **kwargs):
+        """
+        Igual a `log_action`, mas apenas enfileira o registro no gravador em lote
+        (apps.auditoria.writer): nenhuma escrita no banco dentro da requisição.
+        """
+        registro = cls.montar_registro(usuario, acao, descricao, objeto, request, **kwargs)
+        if registro is not None:
+            from .writer import get_audit_writer  # local import para evitar ciclos
+            get_audit_writer().enfileirar(registro)
+
+    @classmethod
+    def montar_registro(cls, usuario=None, acao: str = "INFO", descricao: str = "", objeto=None,
+                        request=None, **kwargs):
+        """Monta a instância (não salva) com os campos do V1; None se não for possível"""
         try:
             username = None
             if usuario is None:
@@ -112,7 +136,7 @@ class AuditoriaAdmin(models.Model):
                 detalhes_dict["extra"] = extra
             detalhes_text = json.dumps(detalhes_dict, default=str, ensure_ascii=False)
 
-            cls.objects.create(
+            return cls(
                 usuario=username,
                 acao=action_norm,
                 modulo=modulo,
@@ -122,7 +146,7 @@ class AuditoriaAdmin(models.Model):
             )
         except Exception:
             # Fail-safe: nunca quebrar o fluxo por conta da auditoria
-            return
+            return None
 
 
 class LogSistema(models.Model):
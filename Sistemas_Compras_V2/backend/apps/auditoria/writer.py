@@ -0,0 +1,86 @@
+"""
+Gravador em lote para a auditoria do Sistema de Compras V2
+
+Registros de alta frequência (ex.: LOGIN via JWT) não são gravados dentro da requisição:
+são enfileirados em memória e uma thread de fundo os persiste com `bulk_create`
+a cada `AUDITORIA_LOTE_INTERVALO` segundos ou quando a fila atinge `AUDITORIA_LOTE_TAMANHO`.
+No SQLite isso troca um INSERT (e um lock de escrita) por requisição por uma transação por lote.
+
+O `timestamp` dos registros é o do momento da gravação do lote (auto_now_add),
+no máximo alguns segundos após o evento.
+"""
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class AuditoriaWriter:
+    """
+    Fila em memória + thread de fundo que grava os registros de auditoria em lote
+    """
+
+    def __init__(self, tamanho_lote=None, intervalo=None):
+        compras = getattr(settings, 'COMPRAS_SETTINGS', {})
+        self.tamanho_lote = tamanho_lote or compras.get('AUDITORIA_LOTE_TAMANHO', 100)
+        self.intervalo = intervalo or compras.get('AUDITORIA_LOTE_INTERVALO', 2.0)
+        self._pendentes = []
+        self._lock = threading.Lock()
+        self._acordar = threading.Event()
+        self._thread = None
+
+    def enfileirar(self, registro):
+        """Adiciona um registro (instância não salva) à fila; operação apenas em memória"""
+        with self._lock:
+            self._pendentes.append(registro)
+            cheio = len(self._pendentes) >= self.tamanho_lote
+            if self._thread is None or not self._thread.is_alive():
+                self._iniciar()
+        if cheio:
+            self._acordar.set()
+
+    def flush(self):
+        """Grava tudo o que está na fila (chamado pela thread, no encerramento ou em testes)"""
+        with self._lock:
+            lote, self._pendentes = self._pendentes, []
+        if not lote:
+            return 0
+        from .models import AuditoriaAdmin  # local import: o app pode não estar pronto no import
+        try:
+            AuditoriaAdmin.objects.bulk_create(lote, batch_size=self.tamanho_lote)
+        except Exception:
+            # Fail-safe: a auditoria nunca derruba a aplicação; o lote é descartado
+            logger.exception("Falha ao gravar %d registro(s) de auditoria em lote", len(lote))
+            return 0
+        return len(lote)
+
+    def _iniciar(self):
+        self._thread = threading.Thread(target=self._executar, name='auditoria-writer', daemon=True)
+        self._thread.start()
+
+    def _executar(self):
+        while True:
+            self._acordar.wait(self.intervalo)
+            self._acordar.clear()
+            self.flush()
+            # A thread tem a própria conexão com o banco; descarta-a se expirou/quebrou
+            close_old_connections()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_audit_writer():
+    """Retorna o gravador único do processo"""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = AuditoriaWriter()
+                atexit.register(_writer.flush)
+    return _writer
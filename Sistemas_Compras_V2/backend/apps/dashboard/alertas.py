@@ -0,0 +1,124 @@
+"""
+Varredura incremental de SLA que alimenta AlertaSLA
+
+Cada execução olha só a janela (última varredura, agora]: para cada limiar, busca as solicitações
+em andamento cujo instante de cruzamento caiu na janela, com faixas nos índices
+(status, sla_warning_at) e (status, sla_deadline). O custo depende de quantas solicitações
+cruzaram limiares desde a última execução, não do tamanho da tabela. O instante da última
+varredura fica em Configuracao ('sla_alertas_ultima_varredura').
+
+Os alertas são criados com bulk_create(ignore_conflicts=True) em lotes (a unicidade
+solicitacao+tipo_alerta torna a varredura idempotente) e notificados em lote: um registro de log
+estruturado por lote e um UPDATE marcando o lote como notificado.
+"""
+import logging
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.configuracoes.models import Configuracao
+from apps.solicitacoes.models import Solicitacao, STATUS_EM_ANDAMENTO
+from .models import AlertaSLA
+
+logger = logging.getLogger(__name__)
+
+CHAVE_ULTIMA_VARREDURA = 'sla_alertas_ultima_varredura'
+
+
+def limiares():
+    """(tipo_alerta, coluna, atraso): o limiar é cruzado em coluna + atraso"""
+    tolerancia = timedelta(hours=settings.COMPRAS_SETTINGS.get('SLA_ALERTA_VENCIDO_HORAS', 24))
+    return [
+        ('warning', 'sla_warning_at', timedelta(0)),
+        ('danger', 'sla_deadline', timedelta(0)),
+        ('overdue', 'sla_deadline', tolerancia),
+    ]
+
+
+def _mensagem(tipo_alerta, numero, prazo):
+    prazo = timezone.localtime(prazo).strftime('%d/%m/%Y %H:%M')
+    if tipo_alerta == 'warning':
+        return f"Solicitação #{numero} próxima do vencimento do SLA (prazo {prazo})"
+    if tipo_alerta == 'danger':
+        return f"Solicitação #{numero} atingiu o prazo do SLA ({prazo})"
+    return f"Solicitação #{numero} com SLA vencido desde {prazo}"
+
+
+def ultima_varredura():
+    valor = Configuracao.get_config(CHAVE_ULTIMA_VARREDURA)
+    if not valor:
+        return None
+    try:
+        return datetime.fromisoformat(str(valor))
+    except ValueError:
+        return None
+
+
+def varrer_alertas_sla(agora=None, desde=None, completo=False, lote=1000):
+    """
+    Cria os alertas dos limiares cruzados em (desde, agora]; `desde` padrão é a última varredura.
+    `completo` ignora a última varredura (ex.: após backfill_sla_deadline).
+    Retorna {tipo_alerta: solicitações encontradas} (as que já tinham o alerta são ignoradas no insert).
+    """
+    agora = agora or timezone.now()
+    if completo:
+        desde = None
+    elif desde is None:
+        desde = ultima_varredura()
+
+    encontrados = {}
+    for tipo_alerta, coluna, atraso in limiares():
+        filtros = {'status__in': STATUS_EM_ANDAMENTO, f'{coluna}__lte': agora - atraso}
+        if desde is not None:
+            filtros[f'{coluna}__gt'] = desde - atraso
+        linhas = Solicitacao.objects.filter(**filtros).order_by().values_list(
+            'id', 'numero_solicitacao_estoque', 'sla_deadline'
+        )
+
+        pendentes = []
+        encontrados[tipo_alerta] = 0
+        for solicitacao_id, numero, prazo in linhas.iterator(chunk_size=lote):
+            pendentes.append(AlertaSLA(
+                solicitacao_id=solicitacao_id,
+                tipo_alerta=tipo_alerta,
+                mensagem=_mensagem(tipo_alerta, numero, prazo),
+            ))
+            if len(pendentes) >= lote:
+                encontrados[tipo_alerta] += _criar(pendentes)
+                pendentes = []
+        encontrados[tipo_alerta] += _criar(pendentes)
+
+    Configuracao.set_config(CHAVE_ULTIMA_VARREDURA, agora.isoformat())
+    return encontrados
+
+
+def _criar(alertas):
+    # ignore_conflicts: alertas já existentes (mesma solicitação e tipo) são ignorados;
+    # o retorno é o tamanho do lote enviado, não o número de linhas inseridas
+    if not alertas:
+        return 0
+    AlertaSLA.objects.bulk_create(alertas, ignore_conflicts=True)
+    return len(alertas)
+
+
+def notificar_alertas(lote=1000):
+    """Notifica os alertas pendentes em lotes; retorna a quantidade notificada"""
+    notificados = 0
+    while True:
+        alertas = list(
+            AlertaSLA.objects.filter(notificado=False).order_by('pk').values(
+                'id', 'tipo_alerta', 'solicitacao_id', 'mensagem'
+            )[:lote]
+        )
+        if not alertas:
+            return notificados
+        ids = [alerta['id'] for alerta in alertas]
+        logger.warning(
+            "%d alerta(s) de SLA", len(alertas),
+            extra={'alertas': [alerta['mensagem'] for alerta in alertas]},
+        )
+        with transaction.atomic():
+            AlertaSLA.objects.filter(pk__in=ids).update(notificado=True, data_notificacao=timezone.now())
+        notificados += len(ids)
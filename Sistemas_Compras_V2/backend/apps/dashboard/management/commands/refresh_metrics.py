@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.dashboard.models import MetricaDashboard
+
+
+class Command(BaseCommand):
+    help = 'Recalcula as métricas do dashboard (MetricaDashboard) desatualizadas ou de todos os períodos'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--periodo',
+            choices=[periodo for periodo, _ in MetricaDashboard.PERIODO_CHOICES],
+            help='Recalcular apenas um período',
+        )
+        parser.add_argument(
+            '--todas',
+            action='store_true',
+            help='Recalcula mesmo os períodos que não estão desatualizados',
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=int,
+            default=0,
+            help='Modo worker: verifica a cada N segundos e recalcula o que estiver desatualizado',
+        )
+
+    def handle(self, *args, **options):
+        intervalo = options['intervalo']
+        while True:
+            self.atualizar(options['periodo'], options['todas'])
+            if not intervalo:
+                break
+            time.sleep(intervalo)
+            # Processo de longa duração: descarta conexões expiradas/quebradas
+            close_old_connections()
+
+    def atualizar(self, periodo, todas):
+        if periodo:
+            periodos = [periodo]
+        elif todas:
+            periodos = [periodo for periodo, _ in MetricaDashboard.PERIODO_CHOICES]
+        else:
+            periodos = MetricaDashboard.periodos_desatualizados()
+
+        atualizados = 0
+        for periodo in periodos:
+            try:
+                MetricaDashboard.atualizar_periodo(periodo)
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"Erro ao calcular métricas ({periodo}): {e}"))
+                continue
+            atualizados += 1
+            self.stdout.write(f"Métricas recalculadas: {periodo}")
+
+        if atualizados:
+            self.stdout.write(self.style.SUCCESS(f"Períodos atualizados: {atualizados}"))
@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.dashboard.alertas import notificar_alertas, varrer_alertas_sla
+
+
+class Command(BaseCommand):
+    help = 'Gera os alertas de SLA (AlertaSLA) dos limiares cruzados desde a última varredura e os notifica'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--completo',
+            action='store_true',
+            help='Varre todas as solicitações em andamento, ignorando a última varredura',
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=1000,
+            help='Alertas por INSERT/notificação em lote (padrão: 1000)',
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=int,
+            default=0,
+            help='Modo worker: repete a varredura a cada N segundos',
+        )
+
+    def handle(self, *args, **options):
+        intervalo = options['intervalo']
+        completo = options['completo']
+        while True:
+            try:
+                encontrados = varrer_alertas_sla(completo=completo, lote=options['lote'])
+                notificados = notificar_alertas(lote=options['lote'])
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"Erro na varredura de SLA: {e}"))
+            else:
+                resumo = ", ".join(f"{tipo}: {quantidade}" for tipo, quantidade in encontrados.items())
+                self.stdout.write(self.style.SUCCESS(f"Limiares cruzados ({resumo}); alertas notificados: {notificados}"))
+            if not intervalo:
+                break
+            # Só a primeira rodada é completa; as seguintes são incrementais
+            completo = False
+            time.sleep(intervalo)
+            # Processo de longa duração: descarta conexões expiradas/quebradas
+            close_old_connections()
@@ -0,0 +1,74 @@
+# Generated by Django 4.2.16 on 2026-10-19 02:16
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('solicitacoes', '0003_sla_deadline'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatorioAgendado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=100, verbose_name='Nome do Relatório')),
+                ('tipo_relatorio', models.CharField(choices=[('sla_performance', 'Performance de SLA'), ('solicitacoes_departamento', 'Solicitações por Departamento'), ('aprovacoes_valores', 'Aprovações por Valores'), ('tempo_processamento', 'Tempo de Processamento'), ('auditoria_completa', 'Auditoria Completa')], max_length=30, verbose_name='Tipo')),
+                ('frequencia', models.CharField(choices=[('daily', 'Diário'), ('weekly', 'Semanal'), ('monthly', 'Mensal'), ('quarterly', 'Trimestral')], max_length=20, verbose_name='Frequência')),
+                ('destinatarios', models.JSONField(default=list, verbose_name='Destinatários (emails)')),
+                ('ativo', models.BooleanField(default=True, verbose_name='Ativo')),
+                ('filtros', models.JSONField(default=dict, verbose_name='Filtros')),
+                ('ultima_execucao', models.DateTimeField(blank=True, null=True, verbose_name='Última Execução')),
+                ('proxima_execucao', models.DateTimeField(verbose_name='Próxima Execução')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Criado por')),
+            ],
+            options={
+                'verbose_name': 'Relatório Agendado',
+                'verbose_name_plural': 'Relatórios Agendados',
+                'ordering': ['nome'],
+            },
+        ),
+        migrations.CreateModel(
+            name='MetricaDashboard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo_metrica', models.CharField(choices=[('total_solicitacoes', 'Total de Solicitações'), ('solicitacoes_pendentes', 'Solicitações Pendentes'), ('solicitacoes_aprovadas', 'Solicitações Aprovadas'), ('solicitacoes_reprovadas', 'Solicitações Reprovadas'), ('valor_total_mes', 'Valor Total do Mês'), ('tempo_medio_aprovacao', 'Tempo Médio de Aprovação'), ('sla_cumprido', 'SLA Cumprido (%)'), ('solicitacoes_por_departamento', 'Solicitações por Departamento'), ('solicitacoes_por_status', 'Solicitações por Status'), ('top_solicitantes', 'Top Solicitantes'), ('resumo_executivo', 'Resumo Executivo')], max_length=50, verbose_name='Tipo da Métrica')),
+                ('periodo', models.CharField(choices=[('hoje', 'Hoje'), ('semana', 'Esta Semana'), ('mes', 'Este Mês'), ('trimestre', 'Este Trimestre'), ('ano', 'Este Ano'), ('total', 'Total')], max_length=20, verbose_name='Período')),
+                ('valor', models.JSONField(verbose_name='Valor da Métrica')),
+                ('data_calculo', models.DateTimeField(auto_now=True, verbose_name='Data do Cálculo')),
+                ('desatualizada', models.BooleanField(default=False, verbose_name='Desatualizada')),
+            ],
+            options={
+                'verbose_name': 'Métrica do Dashboard',
+                'verbose_name_plural': 'Métricas do Dashboard',
+                'ordering': ['-data_calculo'],
+                'unique_together': {('tipo_metrica', 'periodo')},
+            },
+        ),
+        migrations.CreateModel(
+            name='AlertaSLA',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo_alerta', models.CharField(choices=[('warning', 'Aviso (80% do SLA)'), ('danger', 'Perigo (100% do SLA)'), ('overdue', 'Vencido')], max_length=20, verbose_name='Tipo do Alerta')),
+                ('mensagem', models.TextField(verbose_name='Mensagem')),
+                ('notificado', models.BooleanField(default=False, verbose_name='Notificado')),
+                ('data_notificacao', models.DateTimeField(blank=True, null=True, verbose_name='Data da Notificação')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('solicitacao', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='solicitacoes.solicitacao', verbose_name='Solicitação')),
+            ],
+            options={
+                'verbose_name': 'Alerta de SLA',
+                'verbose_name_plural': 'Alertas de SLA',
+                'ordering': ['-created_at'],
+                'unique_together': {('solicitacao', 'tipo_alerta')},
+            },
+        ),
+    ]
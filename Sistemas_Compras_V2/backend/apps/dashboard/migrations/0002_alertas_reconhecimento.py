@@ -0,0 +1,41 @@
+# Generated by Django 4.2.16 on 2026-10-19 02:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='alertasla',
+            name='data_reconhecimento',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Data do Reconhecimento'),
+        ),
+        migrations.AddField(
+            model_name='alertasla',
+            name='reconhecido',
+            field=models.BooleanField(default=False, verbose_name='Reconhecido'),
+        ),
+        migrations.AddField(
+            model_name='alertasla',
+            name='reconhecido_por',
+            field=models.CharField(blank=True, max_length=150, verbose_name='Reconhecido por'),
+        ),
+        migrations.AlterField(
+            model_name='alertasla',
+            name='tipo_alerta',
+            field=models.CharField(choices=[('warning', 'Aviso (próximo do vencimento)'), ('danger', 'Perigo (100% do SLA)'), ('overdue', 'Vencido')], max_length=20, verbose_name='Tipo do Alerta'),
+        ),
+        migrations.AddIndex(
+            model_name='alertasla',
+            index=models.Index(fields=['reconhecido', 'created_at'], name='dashboard_a_reconhe_c03b2b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='alertasla',
+            index=models.Index(fields=['notificado'], name='dashboard_a_notific_4d3a27_idx'),
+        ),
+    ]
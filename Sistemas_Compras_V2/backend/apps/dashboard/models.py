@@ -2,18 +2,55 @@
 Modelos para dashboard e métricas do Sistema de Compras V2
 """
 from django.db import models
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import Count, Sum, Avg, Q
+from django.db.models import Count, Sum, Avg, Q, OuterRef, Subquery
 from django.utils import timezone
-from datetime import timedelta, datetime
-from decimal import Decimal
+from datetime import timedelta
 
 User = get_user_model()
 
 
+# Métricas que compõem o resumo executivo (uma linha por período)
+METRICAS_RESUMO = [
+    'total_solicitacoes',
+    'solicitacoes_pendentes',
+    'solicitacoes_aprovadas',
+    'solicitacoes_reprovadas',
+    'valor_total_mes',
+    'tempo_medio_aprovacao',
+    'sla_cumprido',
+    'solicitacoes_por_departamento',
+    'solicitacoes_por_status',
+    'top_solicitantes',
+]
+
+
+def inicio_periodo(periodo, agora=None):
+    """Início do período no fuso do sistema (None para 'total')"""
+    agora = timezone.localtime(agora or timezone.now())
+    hoje = agora.replace(hour=0, minute=0, second=0, microsecond=0)
+    if periodo == 'hoje':
+        return hoje
+    elif periodo == 'semana':
+        return hoje - timedelta(days=hoje.weekday())
+    elif periodo == 'mes':
+        return hoje.replace(day=1)
+    elif periodo == 'trimestre':
+        return hoje.replace(month=((hoje.month - 1) // 3) * 3 + 1, day=1)
+    elif periodo == 'ano':
+        return hoje.replace(month=1, day=1)
+    return None
+
+
 class MetricaDashboard(models.Model):
     """
     Armazena métricas calculadas do dashboard para cache/performance
+
+    Uma linha por (tipo_metrica, periodo), recalculadas em conjunto por período pelo comando
+    `refresh_metrics` (cálculo no banco, sem iterar solicitações). Alterações em Solicitacao e
+    Movimentacao marcam as linhas como desatualizadas (apps.dashboard.signals); a métrica
+    'resumo_executivo' reúne todas as demais, de modo que o dashboard executivo lê uma linha.
     """
     METRIC_TYPES = [
         ('total_solicitacoes', 'Total de Solicitações'),
@@ -26,19 +63,23 @@ class MetricaDashboard(models.Model):
         ('solicitacoes_por_departamento', 'Solicitações por Departamento'),
         ('solicitacoes_por_status', 'Solicitações por Status'),
         ('top_solicitantes', 'Top Solicitantes'),
+        ('resumo_executivo', 'Resumo Executivo'),
     ]
     
-    tipo_metrica = models.CharField('Tipo da Métrica', max_length=50, choices=METRIC_TYPES)
-    periodo = models.CharField('Período', max_length=20, choices=[
+    PERIODO_CHOICES = [
         ('hoje', 'Hoje'),
         ('semana', 'Esta Semana'),
         ('mes', 'Este Mês'),
         ('trimestre', 'Este Trimestre'),
         ('ano', 'Este Ano'),
         ('total', 'Total'),
-    ])
+    ]
+    
+    tipo_metrica = models.CharField('Tipo da Métrica', max_length=50, choices=METRIC_TYPES)
+    periodo = models.CharField('Período', max_length=20, choices=PERIODO_CHOICES)
     valor = models.JSONField('Valor da Métrica')
     data_calculo = models.DateTimeField('Data do Cálculo', auto_now=True)
+    desatualizada = models.BooleanField('Desatualizada', default=False)
     
     class Meta:
         verbose_name = 'Métrica do Dashboard'
@@ -49,129 +90,124 @@ class MetricaDashboard(models.Model):
     def __str__(self):
         return f"{self.get_tipo_metrica_display()} - {self.get_periodo_display()}"
     
+    @classmethod
+    def validade(cls):
+        """Idade máxima de uma métrica antes de ser recalculada"""
+        return timedelta(seconds=settings.COMPRAS_SETTINGS.get('METRICAS_VALIDADE', 3600))
+    
+    def is_desatualizada(self):
+        return self.desatualizada or timezone.now() - self.data_calculo >= self.validade()
+    
     @classmethod
     def get_or_calculate_metric(cls, tipo_metrica, periodo, force_recalculate=False):
         """
         Busca métrica do cache ou calcula se necessário
         """
         if not force_recalculate:
-            try:
-                metric = cls.objects.get(tipo_metrica=tipo_metrica, periodo=periodo)
-                # Verifica se métrica não está muito desatualizada (1 hora)
-                if timezone.now() - metric.data_calculo < timedelta(hours=1):
-                    return metric.valor
-            except cls.DoesNotExist:
-                pass
-        
-        # Calcula nova métrica
-        valor = cls._calculate_metric(tipo_metrica, periodo)
+            metric = cls.objects.filter(tipo_metrica=tipo_metrica, periodo=periodo).first()
+            if metric is not None and not metric.is_desatualizada():
+                return metric.valor
         
-        # Salva no cache
-        metric, created = cls.objects.get_or_create(
-            tipo_metrica=tipo_metrica,
-            periodo=periodo,
-            defaults={'valor': valor}
+        # Recalcula o período inteiro (as métricas saem das mesmas consultas)
+        return cls.atualizar_periodo(periodo)[tipo_metrica]
+    
+    @classmethod
+    def periodos_desatualizados(cls):
+        """Períodos com alguma métrica ausente, marcada como desatualizada ou vencida"""
+        limite = timezone.now() - cls.validade()
+        esperadas = len(cls.METRIC_TYPES)
+        atuais = {
+            linha['periodo']
+            for linha in cls.objects.values('periodo').annotate(
+                quantidade=Count('pk'),
+                pendentes=Count('pk', filter=Q(desatualizada=True) | Q(data_calculo__lt=limite)),
+            ).order_by()
+            if linha['quantidade'] == esperadas and not linha['pendentes']
+        }
+        return [periodo for periodo, _ in cls.PERIODO_CHOICES if periodo not in atuais]
+    
+    @classmethod
+    def atualizar_periodo(cls, periodo):
+        """
+        Recalcula e grava todas as métricas do período; retorna {tipo_metrica: valor}.
+        O período é marcado como atualizado antes do cálculo: uma alteração feita durante o
+        cálculo volta a marcá-lo e ele é recalculado na próxima rodada.
+        """
+        cls.objects.filter(periodo=periodo, desatualizada=True).update(desatualizada=False)
+        valores = cls._calcular_periodo(periodo)
+        agora = timezone.now()
+        cls.objects.bulk_create(
+            [
+                cls(tipo_metrica=tipo, periodo=periodo, valor=valor, data_calculo=agora)
+                for tipo, valor in valores.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['tipo_metrica', 'periodo'],
+            update_fields=['valor', 'data_calculo'],
         )
-        if not created:
-            metric.valor = valor
-            metric.save()
-        
-        return valor
+        return valores
+    
+    @classmethod
+    def marcar_desatualizadas(cls):
+        """Marca todas as métricas para recálculo (sinais de Solicitacao/Movimentacao)"""
+        cls.objects.filter(desatualizada=False).update(desatualizada=True)
     
     @classmethod
-    def _calculate_metric(cls, tipo_metrica, periodo):
+    def _calcular_periodo(cls, periodo):
         """
-        Calcula métrica específica para o período
+        Calcula todas as métricas do período com 4 consultas agregadas (sem carregar linhas)
         """
-        from apps.solicitacoes.models import Solicitacao
-        
-        # Define filtro de data baseado no período
-        now = timezone.now()
-        date_filter = {}
-        
-        if periodo == 'hoje':
-            date_filter['created_at__date'] = now.date()
-        elif periodo == 'semana':
-            start_week = now - timedelta(days=now.weekday())
-            date_filter['created_at__gte'] = start_week.replace(hour=0, minute=0, second=0)
-        elif periodo == 'mes':
-            date_filter['created_at__year'] = now.year
-            date_filter['created_at__month'] = now.month
-        elif periodo == 'trimestre':
-            quarter_start = datetime(now.year, ((now.month - 1) // 3) * 3 + 1, 1)
-            date_filter['created_at__gte'] = quarter_start
-        elif periodo == 'ano':
-            date_filter['created_at__year'] = now.year
-        
-        queryset = Solicitacao.objects.filter(**date_filter)
-        
-        if tipo_metrica == 'total_solicitacoes':
-            return queryset.count()
-        
-        elif tipo_metrica == 'solicitacoes_pendentes':
-            return queryset.exclude(status__in=['Aprovado', 'Reprovado', 'Pedido Finalizado']).count()
-        
-        elif tipo_metrica == 'solicitacoes_aprovadas':
-            return queryset.filter(status='Aprovado').count()
+        from apps.solicitacoes.models import DiasEntre, Movimentacao, Solicitacao, SLA_VENCIDO
         
-        elif tipo_metrica == 'solicitacoes_reprovadas':
-            return queryset.filter(status='Reprovado').count()
+        queryset = Solicitacao.objects.order_by()
+        inicio = inicio_periodo(periodo)
+        if inicio is not None:
+            queryset = queryset.filter(created_at__gte=inicio)
         
-        elif tipo_metrica == 'valor_total_mes':
-            total = queryset.filter(
-                status__in=['Aprovado', 'Pedido Finalizado']
-            ).aggregate(
-                total=Sum('valor_final')
-            )['total']
-            return float(total or 0)
-        
-        elif tipo_metrica == 'tempo_medio_aprovacao':
-            aprovadas = queryset.filter(
-                status__in=['Aprovado', 'Reprovado'],
-                data_aprovacao__isnull=False
-            )
-            if aprovadas.exists():
-                tempos = []
-                for sol in aprovadas:
-                    tempo = (sol.data_aprovacao - sol.created_at).days
-                    tempos.append(tempo)
-                return sum(tempos) / len(tempos) if tempos else 0
-            return 0
-        
-        elif tipo_metrica == 'sla_cumprido':
-            total = queryset.count()
-            if total == 0:
-                return 100
-            
-            cumpridas = 0
-            for sol in queryset:
-                if sol.is_sla_cumprido():
-                    cumpridas += 1
-            
-            return round((cumpridas / total) * 100, 2)
-        
-        elif tipo_metrica == 'solicitacoes_por_departamento':
-            return dict(
-                queryset.values('departamento').annotate(
-                    count=Count('id')
-                ).values_list('departamento', 'count')
-            )
-        
-        elif tipo_metrica == 'solicitacoes_por_status':
-            return dict(
-                queryset.values('status').annotate(
-                    count=Count('id')
-                ).values_list('status', 'count')
-            )
-        
-        elif tipo_metrica == 'top_solicitantes':
-            return list(
-                queryset.values('solicitante_nome').annotate(
-                    count=Count('id')
-                ).order_by('-count')[:10].values_list('solicitante_nome', 'count')
-            )
+        # Data da aprovação/reprovação: movimentação de saída de 'Aguardando Aprovação'
+        data_aprovacao = Subquery(
+            Movimentacao.objects.filter(
+                numero_solicitacao=OuterRef('numero_solicitacao_estoque'),
+                etapa_destino__in=['Aprovado', 'Reprovado'],
+            ).order_by('-data_movimentacao').values('data_movimentacao')[:1],
+            output_field=models.DateTimeField(),
+        )
+        totais = queryset.with_sla().annotate(data_aprovacao=data_aprovacao).aggregate(
+            total=Count('pk'),
+            pendentes=Count('pk', filter=~Q(status__in=['Aprovado', 'Reprovado', 'Pedido Finalizado'])),
+            aprovadas=Count('pk', filter=Q(status='Aprovado')),
+            reprovadas=Count('pk', filter=Q(status='Reprovado')),
+            valor_total=Sum('valor_final', filter=Q(status__in=['Aprovado', 'Pedido Finalizado'])),
+            no_prazo=Count('pk', filter=~Q(sla_status=SLA_VENCIDO)),
+            tempo_medio=Avg(
+                DiasEntre('data_aprovacao', 'created_at'),
+                filter=Q(data_aprovacao__isnull=False),
+            ),
+        )
         
-        return {}
+        total = totais['total']
+        valores = {
+            'total_solicitacoes': total,
+            'solicitacoes_pendentes': totais['pendentes'],
+            'solicitacoes_aprovadas': totais['aprovadas'],
+            'solicitacoes_reprovadas': totais['reprovadas'],
+            'valor_total_mes': float(totais['valor_total'] or 0),
+            'tempo_medio_aprovacao': round(float(totais['tempo_medio'] or 0), 2),
+            'sla_cumprido': round((totais['no_prazo'] / total) * 100, 2) if total else 100,
+            'solicitacoes_por_departamento': dict(
+                queryset.values('departamento').annotate(count=Count('pk')).values_list('departamento', 'count')
+            ),
+            'solicitacoes_por_status': dict(
+                queryset.values('status').annotate(count=Count('pk')).values_list('status', 'count')
+            ),
+            'top_solicitantes': [
+                list(linha) for linha in queryset.values('solicitante').annotate(
+                    count=Count('pk')
+                ).order_by('-count', 'solicitante')[:10].values_list('solicitante', 'count')
+            ],
+        }
+        valores['resumo_executivo'] = {tipo: valores[tipo] for tipo in METRICAS_RESUMO}
+        return valores
 
 
 class RelatorioAgendado(models.Model):
@@ -221,9 +257,13 @@ class RelatorioAgendado(models.Model):
 class AlertaSLA(models.Model):
     """
     Alertas de SLA próximos do vencimento ou vencidos
+
+    Gerados pela varredura incremental `scan_sla_alerts` (apps.dashboard.alertas): 'warning' em
+    sla_warning_at, 'danger' em sla_deadline e 'overdue' após a tolerância
+    SLA_ALERTA_VENCIDO_HORAS; no máximo um alerta de cada tipo por solicitação.
     """
     ALERT_TYPES = [
-        ('warning', 'Aviso (80% do SLA)'),
+        ('warning', 'Aviso (próximo do vencimento)'),
         ('danger', 'Perigo (100% do SLA)'),
         ('overdue', 'Vencido'),
     ]
@@ -240,6 +280,11 @@ class AlertaSLA(models.Model):
     notificado = models.BooleanField('Notificado', default=False)
     data_notificacao = models.DateTimeField('Data da Notificação', null=True, blank=True)
     
+    # Reconhecimento pelo usuário (API /api/dashboard/alertas/)
+    reconhecido = models.BooleanField('Reconhecido', default=False)
+    data_reconhecimento = models.DateTimeField('Data do Reconhecimento', null=True, blank=True)
+    reconhecido_por = models.CharField('Reconhecido por', max_length=150, blank=True)
+    
     created_at = models.DateTimeField('Criado em', auto_now_add=True)
     
     class Meta:
@@ -247,6 +292,10 @@ class AlertaSLA(models.Model):
         verbose_name_plural = 'Alertas de SLA'
         ordering = ['-created_at']
         unique_together = ['solicitacao', 'tipo_alerta']
+        indexes = [
+            models.Index(fields=['reconhecido', 'created_at']),
+            models.Index(fields=['notificado']),
+        ]
     
     def __str__(self):
-        return f"Alerta {self.get_tipo_alerta_display()} - Sol. #{self.solicitacao.id}"
+        return f"Alerta {self.get_tipo_alerta_display()} - Sol. #{self.solicitacao_id}"
@@ -0,0 +1,38 @@
+"""
+Serializers para o app de dashboard
+"""
+from rest_framework import serializers
+from .models import AlertaSLA, MetricaDashboard
+
+
+class MetricaDashboardSerializer(serializers.ModelSerializer):
+    """
+    Serializer para métricas pré-calculadas (somente leitura)
+    """
+    tipo_metrica_display = serializers.CharField(source='get_tipo_metrica_display', read_only=True)
+    periodo_display = serializers.CharField(source='get_periodo_display', read_only=True)
+    
+    class Meta:
+        model = MetricaDashboard
+        fields = [
+            'tipo_metrica', 'tipo_metrica_display', 'periodo', 'periodo_display',
+            'valor', 'data_calculo', 'desatualizada'
+        ]
+        read_only_fields = fields
+
+
+class AlertaSLASerializer(serializers.ModelSerializer):
+    """
+    Serializer para alertas de SLA
+    """
+    tipo_alerta_display = serializers.CharField(source='get_tipo_alerta_display', read_only=True)
+    numero_solicitacao = serializers.IntegerField(source='solicitacao.numero_solicitacao_estoque', read_only=True)
+    
+    class Meta:
+        model = AlertaSLA
+        fields = [
+            'id', 'solicitacao', 'numero_solicitacao', 'tipo_alerta', 'tipo_alerta_display',
+            'mensagem', 'notificado', 'data_notificacao', 'reconhecido',
+            'data_reconhecimento', 'reconhecido_por', 'created_at'
+        ]
+        read_only_fields = fields
@@ -0,0 +1,17 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.solicitacoes.models import Movimentacao, Solicitacao
+from .models import MetricaDashboard
+
+
+@receiver(post_save, sender=Solicitacao)
+@receiver(post_delete, sender=Solicitacao)
+@receiver(post_save, sender=Movimentacao)
+@receiver(post_delete, sender=Movimentacao)
+def marcar_metricas_desatualizadas(sender, **kwargs):
+    """
+    Marca as métricas para recálculo pelo `refresh_metrics` (um UPDATE, só quando ainda
+    havia métricas atualizadas)
+    """
+    MetricaDashboard.marcar_desatualizadas()
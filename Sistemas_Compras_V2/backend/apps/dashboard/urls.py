@@ -0,0 +1,17 @@
+"""
+URLs para o app de dashboard
+"""
+from django.urls import path
+from . import views
+
+app_name = 'dashboard'
+
+urlpatterns = [
+    # Métricas pré-calculadas (somente leitura)
+    path('metricas/', views.MetricaDashboardListView.as_view(), name='metricas-list'),
+    path('resumo/', views.resumo_executivo, name='resumo-executivo'),
+    
+    # Alertas de SLA (scan_sla_alerts)
+    path('alertas/', views.AlertaSLAPendenteListView.as_view(), name='alertas-pendentes'),
+    path('alertas/reconhecer/', views.reconhecer_alertas, name='alertas-reconhecer'),
+]
@@ -0,0 +1,78 @@
+"""
+Views para o app de dashboard
+"""
+from rest_framework import generics, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from django_filters.rest_framework import DjangoFilterBackend
+from django.utils import timezone
+
+from .models import AlertaSLA, MetricaDashboard
+from .serializers import AlertaSLASerializer, MetricaDashboardSerializer
+from apps.usuarios.permissions import IsDiretoriaOrAdmin
+
+
+class MetricaDashboardListView(generics.ListAPIView):
+    """
+    View para listar as métricas pré-calculadas (apenas leitura; recálculo via refresh_metrics)
+    """
+    queryset = MetricaDashboard.objects.all()
+    serializer_class = MetricaDashboardSerializer
+    permission_classes = [IsDiretoriaOrAdmin]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['tipo_metrica', 'periodo']
+    pagination_class = None
+
+
+@api_view(['GET'])
+@permission_classes([IsDiretoriaOrAdmin])
+def resumo_executivo(request):
+    """
+    Resumo executivo do período (?periodo=mes): leitura de uma única linha pré-calculada
+    """
+    periodo = request.query_params.get('periodo', 'mes')
+    if periodo not in dict(MetricaDashboard.PERIODO_CHOICES):
+        return Response(
+            {'error': f'Período inválido: {periodo}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    metrica = MetricaDashboard.objects.filter(tipo_metrica='resumo_executivo', periodo=periodo).first()
+    if metrica is None:
+        # Primeira leitura antes do refresh_metrics: calcula e grava o período
+        MetricaDashboard.atualizar_periodo(periodo)
+        metrica = MetricaDashboard.objects.get(tipo_metrica='resumo_executivo', periodo=periodo)
+    
+    return Response(MetricaDashboardSerializer(metrica).data)
+
+
+class AlertaSLAPendenteListView(generics.ListAPIView):
+    """
+    View para listar alertas de SLA ainda não reconhecidos (índice reconhecido, created_at)
+    """
+    queryset = AlertaSLA.objects.filter(reconhecido=False).select_related('solicitacao')
+    serializer_class = AlertaSLASerializer
+    permission_classes = [IsDiretoriaOrAdmin]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['tipo_alerta']
+
+
+@api_view(['POST'])
+@permission_classes([IsDiretoriaOrAdmin])
+def reconhecer_alertas(request):
+    """
+    Reconhece alertas de SLA em lote ({"ids": [...]})
+    """
+    ids = request.data.get('ids') or []
+    if not isinstance(ids, list) or not all(isinstance(pk, int) for pk in ids):
+        return Response(
+            {'error': 'Informe "ids" como lista de inteiros'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    atualizados = AlertaSLA.objects.filter(pk__in=ids, reconhecido=False).update(
+        reconhecido=True,
+        data_reconhecimento=timezone.now(),
+        reconhecido_por=getattr(request.user, 'username', '') or '',
+    )
+    return Response({'reconhecidos': atualizados})
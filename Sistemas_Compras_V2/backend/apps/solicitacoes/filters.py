@@ -0,0 +1,18 @@
+"""
+Filtros da API de solicitações
+"""
+import django_filters
+
+from .models import Solicitacao, SLA_STATUS_CHOICES
+
+
+class SolicitacaoFilter(django_filters.FilterSet):
+    """
+    Filtros da listagem; `sla_status` filtra a anotação de Solicitacao.objects.with_sla()
+    (?sla_status=vencido), portanto no banco
+    """
+    sla_status = django_filters.ChoiceFilter(choices=SLA_STATUS_CHOICES)
+
+    class Meta:
+        model = Solicitacao
+        fields = ['status', 'prioridade', 'departamento', 'solicitante', 'sla_status']
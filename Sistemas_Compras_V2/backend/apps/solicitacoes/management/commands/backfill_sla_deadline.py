@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.solicitacoes.models import Solicitacao
+from apps.solicitacoes.sla import calcular_prazos
+
+
+class Command(BaseCommand):
+    help = 'Calcula sla_deadline/sla_warning_at (dias úteis e feriados) das solicitações existentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--todas',
+            action='store_true',
+            help='Recalcula todas as solicitações (ex.: após alterar FERIADOS), não só as sem prazo',
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=500,
+            help='Quantidade de linhas por UPDATE em lote (padrão: 500)',
+        )
+
+    def handle(self, *args, **options):
+        lote = options['lote']
+        queryset = Solicitacao.objects.only('id', 'carimbo_data_hora', 'sla_dias', 'sla_deadline', 'sla_warning_at')
+        if not options['todas']:
+            queryset = queryset.filter(sla_deadline__isnull=True)
+
+        pendentes = []
+        atualizadas = 0
+        for solicitacao in queryset.order_by('pk').iterator(chunk_size=lote):
+            prazos = calcular_prazos(solicitacao.carimbo_data_hora, solicitacao.sla_dias)
+            if prazos == (solicitacao.sla_deadline, solicitacao.sla_warning_at):
+                continue
+            solicitacao.sla_deadline, solicitacao.sla_warning_at = prazos
+            pendentes.append(solicitacao)
+            if len(pendentes) >= lote:
+                atualizadas += self._gravar(pendentes)
+                pendentes = []
+        atualizadas += self._gravar(pendentes)
+
+        self.stdout.write(self.style.SUCCESS(f"Prazos de SLA atualizados: {atualizadas}"))
+
+    def _gravar(self, solicitacoes):
+        # bulk_update não chama save(): grava só as duas colunas, sem tocar nos demais campos
+        if not solicitacoes:
+            return 0
+        with transaction.atomic():
+            Solicitacao.objects.bulk_update(solicitacoes, ['sla_deadline', 'sla_warning_at'])
+        return len(solicitacoes)
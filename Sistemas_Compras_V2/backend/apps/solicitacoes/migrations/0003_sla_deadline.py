@@ -0,0 +1,27 @@
+# Generated by Django 4.2.16 on 2026-10-19 02:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solicitacoes', '0002_rename_solicitacoe_numero__04ed35_idx_solicitacoe_numero__eb7a5e_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='solicitacao',
+            name='sla_deadline',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Prazo do SLA'),
+        ),
+        migrations.AddField(
+            model_name='solicitacao',
+            name='sla_warning_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Aviso de SLA'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitacao',
+            index=models.Index(fields=['status', 'sla_deadline'], name='solicitacoe_status_01f167_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.16 on 2026-10-19 02:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('solicitacoes', '0003_sla_deadline'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='solicitacao',
+            index=models.Index(fields=['status', 'sla_warning_at'], name='solicitacoe_status_5ce16b_idx'),
+        ),
+    ]
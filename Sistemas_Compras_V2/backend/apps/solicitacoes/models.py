@@ -3,10 +3,135 @@ Modelos para gestão de solicitações do Sistema de Compras V2
 Baseado na estrutura completa do V1 SQLite com todos os 44 campos
 """
 from django.db import models
+from django.db.models import Case, Count, F, Q, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.lookups import GreaterThan, GreaterThanOrEqual
 from django.conf import settings
 from django.utils import timezone
 from decimal import Decimal
 
+from .sla import calcular_prazos
+
+
+# Status em que a contagem de dias para em data_finalizacao (ver Solicitacao.is_finalizada)
+STATUS_FINALIZADOS = ['Pedido Finalizado', 'Reprovado']
+# Demais etapas: usadas como lista (status IN ...) para aproveitar o índice (status, sla_deadline)
+STATUS_EM_ANDAMENTO = [
+    'Solicitação', 'Requisição', 'Suprimentos', 'Em Cotação', 'Pedido de Compras',
+    'Aguardando Aprovação', 'Aprovado', 'Compra feita', 'Aguardando Entrega',
+]
+
+# Valores de sla_status (SolicitacaoQuerySet.with_sla / SolicitacaoListSerializer)
+SLA_OK = 'ok'
+SLA_PROXIMO_VENCIMENTO = 'proximo_vencimento'
+SLA_VENCIDO = 'vencido'
+SLA_STATUS_CHOICES = [
+    (SLA_OK, 'No prazo'),
+    (SLA_PROXIMO_VENCIMENTO, 'Próximo do vencimento'),
+    (SLA_VENCIDO, 'Vencido'),
+]
+
+
+class DiasEntre(models.Func):
+    """
+    Dias inteiros entre duas datas/hora (equivalente SQL de `(fim - inicio).days`)
+    """
+    output_field = models.IntegerField()
+    arity = 2
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # julianday aceita os formatos gravados pelo V1 ('T' ou espaço como separador)
+        return self.as_sql(
+            compiler, connection,
+            template="CAST(FLOOR(julianday(%(expressions)s)) AS INTEGER)",
+            arg_joiner=") - julianday(",
+            **extra_context
+        )
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection,
+            template="FLOOR(EXTRACT(EPOCH FROM (%(expressions)s)) / 86400)::integer",
+            arg_joiner=" - ",
+            **extra_context
+        )
+
+
+class SolicitacaoQuerySet(models.QuerySet):
+    """QuerySet de Solicitacao com os cálculos de SLA feitos no banco"""
+
+    def with_sla(self, agora=None):
+        """
+        Anota `dias_em_andamento` e `sla_status` ('vencido', 'proximo_vencimento' ou 'ok').
+
+        dias_em_andamento: dias desde carimbo_data_hora até data_finalizacao (finalizadas) ou
+        `agora` — mesmo cálculo de Solicitacao.calcular_dias_atendimento. sla_status compara essa
+        mesma data de referência com sla_deadline/sla_warning_at (como is_sla_vencido e
+        is_sla_proximo_vencimento); linhas ainda sem prazo gravado usam a regra por dias corridos.
+        A ordem alfabética dos valores é também a de gravidade: ok < proximo_vencimento < vencido.
+        """
+        agora = agora or timezone.now()
+        fim = Case(
+            When(status__in=STATUS_FINALIZADOS, data_finalizacao__isnull=False, then=F('data_finalizacao')),
+            default=Value(agora, output_field=models.DateTimeField()),
+            output_field=models.DateTimeField(),
+        )
+        sla = Coalesce(F('sla_dias'), 0)
+        com_prazo = Q(sla_deadline__isnull=False)
+        return self.annotate(
+            dias_em_andamento=DiasEntre(fim, 'carimbo_data_hora'),
+        ).annotate(
+            sla_status=Case(
+                When(com_prazo & Q(GreaterThan(fim, F('sla_deadline'))), then=Value(SLA_VENCIDO)),
+                When(com_prazo & Q(GreaterThanOrEqual(fim, F('sla_warning_at'))), then=Value(SLA_PROXIMO_VENCIMENTO)),
+                When(com_prazo, then=Value(SLA_OK)),
+                When(dias_em_andamento__gt=sla, then=Value(SLA_VENCIDO)),
+                When(dias_em_andamento__gte=Greatest(sla - 1, 0), then=Value(SLA_PROXIMO_VENCIMENTO)),
+                default=Value(SLA_OK),
+                output_field=models.CharField(),
+            ),
+        )
+
+    def vencidas(self, agora=None):
+        """Em andamento com prazo vencido (faixa do índice (status, sla_deadline))"""
+        return self.filter(status__in=STATUS_EM_ANDAMENTO, sla_deadline__lt=agora or timezone.now())
+
+    def proximas_do_vencimento(self, agora=None):
+        """Em andamento que já passaram do aviso mas ainda estão no prazo"""
+        agora = agora or timezone.now()
+        return self.filter(
+            status__in=STATUS_EM_ANDAMENTO, sla_deadline__gte=agora, sla_warning_at__lte=agora
+        )
+
+    def resumo_dashboard(self, agora=None):
+        """
+        Totais, contagens por status/prioridade e faixas de SLA numa única consulta agregada
+        (sem carregar as linhas)
+        """
+        agregados = {
+            'total': Count('pk'),
+            'pendentes': Count('pk', filter=~Q(status__in=['Aprovado', 'Reprovado', 'Pedido Finalizado'])),
+            'sla_vencidas': Count('pk', filter=Q(sla_status=SLA_VENCIDO)),
+            'sla_proximo_vencimento': Count('pk', filter=Q(sla_status=SLA_PROXIMO_VENCIMENTO)),
+        }
+        for i, (valor, _) in enumerate(Solicitacao.ETAPA_CHOICES):
+            agregados[f'status_{i}'] = Count('pk', filter=Q(status=valor))
+        for i, (valor, _) in enumerate(Solicitacao.PRIORIDADE_CHOICES):
+            agregados[f'prioridade_{i}'] = Count('pk', filter=Q(prioridade=valor))
+
+        valores = self.with_sla(agora).aggregate(**agregados)
+        por_status = {valor: valores[f'status_{i}'] for i, (valor, _) in enumerate(Solicitacao.ETAPA_CHOICES)}
+        return {
+            'total': valores['total'],
+            'pendentes': valores['pendentes'],
+            'vencidas': valores['sla_vencidas'],
+            'proximo_vencimento': valores['sla_proximo_vencimento'],
+            'por_status': por_status,
+            'por_prioridade': {
+                valor: valores[f'prioridade_{i}'] for i, (valor, _) in enumerate(Solicitacao.PRIORIDADE_CHOICES)
+            },
+        }
+
 
 class Solicitacao(models.Model):
     """
@@ -74,6 +199,9 @@ class Solicitacao(models.Model):
     sla_dias = models.IntegerField('SLA em Dias', default=3)
     dias_atendimento = models.IntegerField('Dias de Atendimento', null=True, blank=True)
     sla_cumprido = models.CharField('SLA Cumprido', max_length=10, blank=True)
+    # Prazos calculados no save() em dias úteis (apps.solicitacoes.sla)
+    sla_deadline = models.DateTimeField('Prazo do SLA', null=True, blank=True)
+    sla_warning_at = models.DateTimeField('Aviso de SLA', null=True, blank=True)
     
     # Observações
     observacoes = models.TextField('Observações', blank=True)
@@ -117,6 +245,8 @@ class Solicitacao(models.Model):
     # Metadados
     created_at = models.DateTimeField('Criado em', auto_now_add=True)
     # Remove updated_at - não existe no V1
+
+    objects = SolicitacaoQuerySet.as_manager()
     
     class Meta:
         verbose_name = 'Solicitação'
@@ -129,6 +259,8 @@ class Solicitacao(models.Model):
             models.Index(fields=['solicitante']),
             models.Index(fields=['departamento']),
             models.Index(fields=['prioridade']),
+            models.Index(fields=['status', 'sla_deadline']),
+            models.Index(fields=['status', 'sla_warning_at']),
         ]
     
     def __str__(self):
@@ -144,6 +276,12 @@ class Solicitacao(models.Model):
             sla_map = settings.COMPRAS_SETTINGS['SLA_PADRAO']
             self.sla_dias = sla_map.get(self.prioridade, 3)
         
+        # Prazos do SLA (dias úteis e feriados)
+        self.sla_deadline, self.sla_warning_at = calcular_prazos(self.carimbo_data_hora, self.sla_dias)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'carimbo_data_hora', 'sla_dias', 'prioridade'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'sla_deadline', 'sla_warning_at'}
+        
         super().save(*args, **kwargs)
     
     @property
@@ -156,14 +294,15 @@ class Solicitacao(models.Model):
         """Verifica se pode mover para próxima etapa"""
         return not self.is_finalizada
     
+    def data_referencia_sla(self):
+        """Data de finalização (finalizadas) ou agora"""
+        if self.is_finalizada and self.data_finalizacao:
+            return self.data_finalizacao
+        return timezone.now()
+    
     def calcular_dias_atendimento(self):
         """Calcula dias de atendimento até agora"""
-        if self.is_finalizada and self.data_finalizacao:
-            data_fim = self.data_finalizacao
-        else:
-            data_fim = timezone.now()
-        
-        delta = data_fim - self.carimbo_data_hora
+        delta = self.data_referencia_sla() - self.carimbo_data_hora
         return delta.days
     
     def verificar_sla_cumprido(self):
@@ -183,13 +322,17 @@ class Solicitacao(models.Model):
     def is_sla_vencido(self):
         """True se o SLA foi excedido"""
         try:
+            if self.sla_deadline:
+                return self.data_referencia_sla() > self.sla_deadline
             return self.get_dias_em_andamento() > self.get_sla_days()
         except Exception:
             return False
     
     def is_sla_proximo_vencimento(self):
-        """True se está a 1 dia do vencimento (e ainda não vencido)"""
+        """True se está a 1 dia (útil) do vencimento (e ainda não vencido)"""
         try:
+            if self.sla_deadline and self.sla_warning_at:
+                return self.data_referencia_sla() >= self.sla_warning_at and not self.is_sla_vencido()
             dias = self.get_dias_em_andamento()
             sla = self.get_sla_days()
             return (dias >= max(sla - 1, 0)) and not self.is_sla_vencido()
@@ -198,6 +341,12 @@ class Solicitacao(models.Model):
     
     def get_sla_percentage_used(self):
         """Percentual de SLA consumido (0-100+)"""
+        if self.sla_deadline and self.carimbo_data_hora:
+            total = (self.sla_deadline - self.carimbo_data_hora).total_seconds()
+            if total <= 0:
+                return 0
+            decorrido = (self.data_referencia_sla() - self.carimbo_data_hora).total_seconds()
+            return max(0, min(100, int(decorrido / total * 100)))
         sla = self.get_sla_days()
         if sla <= 0:
             return 0
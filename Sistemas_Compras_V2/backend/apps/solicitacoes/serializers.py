@@ -51,7 +51,10 @@ class SolicitacaoListSerializer(serializers.ModelSerializer):
         ]
     
     def get_sla_status(self, obj):
-        """Retorna status do SLA"""
+        """Retorna status do SLA (anotação de Solicitacao.objects.with_sla(), quando presente)"""
+        sla_status = getattr(obj, 'sla_status', None)
+        if sla_status is not None:
+            return sla_status
         if obj.is_sla_vencido():
             return 'vencido'
         elif obj.is_sla_proximo_vencimento():
@@ -59,7 +62,10 @@ class SolicitacaoListSerializer(serializers.ModelSerializer):
         return 'ok'
     
     def get_dias_em_andamento(self, obj):
-        """Retorna dias em andamento"""
+        """Retorna dias em andamento (anotação de Solicitacao.objects.with_sla(), quando presente)"""
+        dias = getattr(obj, 'dias_em_andamento', None)
+        if dias is not None:
+            return dias
         return obj.get_dias_em_andamento()
 
 
@@ -107,13 +113,10 @@ class SolicitacaoDetailSerializer(serializers.ModelSerializer):
             return True
         
         # Solicitante pode editar apenas se status for "Solicitação"
-        try:
-            from apps.usuarios.models import Usuario
-            v1 = Usuario.objects.get(username=user.username)
-            if obj.solicitante == v1.nome:
-                return obj.status == 'Solicitação'
-        except Exception:
-            pass
+        from apps.usuarios.middleware import get_perfil_usuario
+        v1_nome = get_perfil_usuario(user).get('nome')
+        if v1_nome and obj.solicitante == v1_nome:
+            return obj.status == 'Solicitação'
         
         # Outros perfis baseado no status
         if user.can_manage_stock():
@@ -203,16 +206,12 @@ class SolicitacaoCreateSerializer(serializers.ModelSerializer):
         ]
     
     def create(self, validated_data):
-        from apps.usuarios.models import Usuario
+        from apps.usuarios.middleware import get_perfil_usuario
         request = self.context.get('request')
         user = request.user if request else None
         v1_nome = None
         if user and getattr(user, 'username', None):
-            try:
-                v1 = Usuario.objects.get(username=user.username)
-                v1_nome = v1.nome
-            except Usuario.DoesNotExist:
-                v1_nome = user.get_full_name() or user.username
+            v1_nome = get_perfil_usuario(user).get('nome') or user.get_full_name() or user.username
         else:
             v1_nome = 'Sistema'
 
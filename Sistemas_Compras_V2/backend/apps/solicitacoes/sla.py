@@ -0,0 +1,66 @@
+"""
+Cálculo dos prazos de SLA das solicitações (dias úteis e feriados)
+
+O prazo (`sla_deadline`) é o horário de criação (no fuso do sistema) somado de `sla_dias`
+dias úteis; o aviso (`sla_warning_at`) fica um dia útil antes do prazo, equivalente à regra
+de "próximo do vencimento" (dias >= sla - 1). Fins de semana e os feriados de
+COMPRAS_SETTINGS['FERIADOS'] não contam; com SLA_DIAS_UTEIS=False os dias são corridos.
+"""
+from datetime import date, timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils import timezone
+
+
+@lru_cache(maxsize=1)
+def _feriados(config):
+    """Separa os feriados fixos ('MM-DD', todo ano) dos de data única ('AAAA-MM-DD')"""
+    anuais, datas = set(), set()
+    for feriado in config:
+        if len(feriado) == 5:
+            anuais.add(feriado)
+        else:
+            datas.add(date.fromisoformat(feriado))
+    return frozenset(anuais), frozenset(datas)
+
+
+def is_dia_util(dia):
+    """True se `dia` (date) não é sábado, domingo nem feriado"""
+    if dia.weekday() >= 5:
+        return False
+    anuais, datas = _feriados(tuple(settings.COMPRAS_SETTINGS.get('FERIADOS', ())))
+    return dia not in datas and dia.strftime('%m-%d') not in anuais
+
+
+def somar_dias_uteis(inicio, dias):
+    """
+    Soma `dias` dias úteis a `inicio` (datetime), mantendo o horário local.
+    Com SLA_DIAS_UTEIS=False soma dias corridos.
+    """
+    if dias <= 0:
+        return inicio
+    if not settings.COMPRAS_SETTINGS.get('SLA_DIAS_UTEIS', True):
+        return inicio + timedelta(days=dias)
+
+    if timezone.is_naive(inicio):
+        inicio = timezone.make_aware(inicio)
+    local = timezone.localtime(inicio)
+    dia = local.date()
+    restantes = dias
+    while restantes:
+        dia += timedelta(days=1)
+        if is_dia_util(dia):
+            restantes -= 1
+    return timezone.make_aware(local.replace(tzinfo=None) + timedelta(days=(dia - local.date()).days))
+
+
+def calcular_prazos(carimbo_data_hora, sla_dias):
+    """Retorna (sla_deadline, sla_warning_at) para a criação e o SLA informados"""
+    if carimbo_data_hora is None:
+        return None, None
+    sla_dias = int(sla_dias or 0)
+    return (
+        somar_dias_uteis(carimbo_data_hora, sla_dias),
+        somar_dias_uteis(carimbo_data_hora, max(sla_dias - 1, 0)),
+    )
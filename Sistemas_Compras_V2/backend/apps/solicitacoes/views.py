@@ -12,12 +12,14 @@ from django.contrib.auth import get_user_model
 from django.utils import timezone
 
 from .models import Solicitacao, CatalogoProduto, Movimentacao
+from .filters import SolicitacaoFilter
 from .serializers import (
     SolicitacaoListSerializer, SolicitacaoDetailSerializer,
     SolicitacaoCreateSerializer, SolicitacaoUpdateSerializer,
     StatusUpdateSerializer, CatalogoProdutoSerializer,
     MovimentacaoSerializer
 )
+from apps.usuarios.middleware import get_perfil_usuario
 from apps.usuarios.permissions import (
     IsSolicitanteOrAdmin, IsEstoqueOrAdmin, IsSuprimentosOrAdmin,
     IsDiretoriaOrAdmin, CanManageSolicitacao
@@ -32,22 +34,18 @@ class SolicitacaoListCreateView(generics.ListCreateAPIView):
     View para listar e criar solicitações
     """
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['status', 'prioridade', 'departamento', 'solicitante']
+    filterset_class = SolicitacaoFilter
     search_fields = ['numero_solicitacao_estoque', 'descricao', 'solicitante']
-    ordering_fields = ['created_at', 'prioridade', 'status', 'valor_estimado']
+    ordering_fields = ['created_at', 'prioridade', 'status', 'valor_estimado', 'sla_status', 'dias_em_andamento']
     ordering = ['-created_at']
     
     def get_queryset(self):
         user = self.request.user
-        queryset = Solicitacao.objects.all()
+        # SLA anotado no banco (um único "agora" por requisição): serializer, filtro e ordenação
+        queryset = Solicitacao.objects.with_sla()
         
-        # Filtros baseados no perfil do usuário
-        try:
-            from apps.usuarios.models import Usuario as V1Usuario
-            v1 = V1Usuario.objects.get(username=getattr(user, 'username', '')) if user and user.is_authenticated else None
-            v1_nome = getattr(v1, 'nome', None)
-        except Exception:
-            v1_nome = None
+        # Filtros baseados no perfil do usuário (perfil V1 memorizado pelo UserProfileMiddleware)
+        v1_nome = get_perfil_usuario(user).get('nome')
 
         if getattr(user, 'is_admin', lambda: False)():
             # Admin vê todas
@@ -265,12 +263,10 @@ class ApprovalView(APIView):
         novo_status = 'Aprovado' if acao == 'aprovar' else 'Reprovado'
         
         # Registra aprovação na lista JSON
-        try:
-            from apps.usuarios.models import Usuario as V1Usuario
-            v1 = V1Usuario.objects.get(username=getattr(request.user, 'username', ''))
-            aprovador_nome = v1.nome
-        except Exception:
-            aprovador_nome = getattr(request.user, 'username', 'sistema')
+        aprovador_nome = (
+            get_perfil_usuario(request.user).get('nome')
+            or getattr(request.user, 'username', 'sistema')
+        )
 
         aprovacao_reg = {
             'acao': acao,
@@ -362,15 +358,7 @@ def dashboard_data(request):
             return False
 
     # Descobrir usuário V1 (quando possível)
-    v1_nome = None
-    v1_perfil = None
-    try:
-        from apps.usuarios.models import Usuario as V1Usuario
-        v1 = V1Usuario.objects.get(username=getattr(user, 'username', ''))
-        v1_nome = getattr(v1, 'nome', None)
-        v1_perfil = getattr(v1, 'perfil', None)
-    except Exception:
-        pass
+    v1_nome = get_perfil_usuario(user).get('nome')
 
     # Base queryset baseado no perfil
     if _has_perm('is_admin'):
@@ -397,43 +385,20 @@ def dashboard_data(request):
         else:
             queryset = Solicitacao.objects.none()
     
-    # Estatísticas
-    total = queryset.count()
-    pendentes = queryset.exclude(status__in=['Aprovado', 'Reprovado', 'Pedido Finalizado']).count()
-    aprovadas = queryset.filter(status='Aprovado').count()
-    reprovadas = queryset.filter(status='Reprovado').count()
-    finalizadas = queryset.filter(status='Pedido Finalizado').count()
-    
-    # SLA (cálculo resiliente)
-    def _call_bool(sol, method_name: str) -> bool:
-        try:
-            m = getattr(sol, method_name, None)
-            if callable(m):
-                return bool(m())
-        except Exception:
-            pass
-        return False
-
-    vencidas = sum(1 for sol in queryset if _call_bool(sol, 'is_sla_vencido'))
-    proximo_vencimento = sum(1 for sol in queryset if _call_bool(sol, 'is_sla_proximo_vencimento'))
-    
-    # Por status
-    status_counts = {}
-    for choice in Solicitacao.ETAPA_CHOICES:
-        status_counts[choice[0]] = queryset.filter(status=choice[0]).count()
-    
-    # Por prioridade
-    prioridade_counts = {}
-    for choice in Solicitacao.PRIORIDADE_CHOICES:
-        prioridade_counts[choice[0]] = queryset.filter(prioridade=choice[0]).count()
+    # Estatísticas: totais, status, prioridade e SLA numa única consulta agregada
+    resumo = queryset.resumo_dashboard()
+    total = resumo['total']
+    vencidas = resumo['vencidas']
+    proximo_vencimento = resumo['proximo_vencimento']
+    status_counts = resumo['por_status']
     
     return Response({
         'resumo': {
             'total': total,
-            'pendentes': pendentes,
-            'aprovadas': aprovadas,
-            'reprovadas': reprovadas,
-            'finalizadas': finalizadas,
+            'pendentes': resumo['pendentes'],
+            'aprovadas': status_counts['Aprovado'],
+            'reprovadas': status_counts['Reprovado'],
+            'finalizadas': status_counts['Pedido Finalizado'],
         },
         'sla': {
             'vencidas': vencidas,
@@ -441,9 +406,9 @@ def dashboard_data(request):
             'ok': total - vencidas - proximo_vencimento,
         },
         'por_status': status_counts,
-        'por_prioridade': prioridade_counts,
+        'por_prioridade': resumo['por_prioridade'],
         'solicitacoes_recentes': SolicitacaoListSerializer(
-            queryset.order_by('-created_at')[:5], 
+            queryset.with_sla().order_by('-created_at')[:5], 
             many=True
         ).data
     })
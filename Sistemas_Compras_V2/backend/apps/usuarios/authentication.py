@@ -2,22 +2,38 @@
 Sistema de autenticação JWT para o Sistema de Compras V2
 """
 from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.models import TokenUser
+from django.utils.functional import cached_property
+from django.conf import settings
+from django.core.cache import cache, caches
 from django.contrib.auth import authenticate
 from django.contrib.auth import get_user_model
-from rest_framework import serializers
+from rest_framework import exceptions, serializers
 from rest_framework.response import Response
 from rest_framework import status
 from apps.auditoria.models import AuditoriaAdmin, HistoricoLogin
+from .middleware import CAMPOS_PERFIL, anexar_metodos_perfil, get_perfil_v1, get_usuario_ativo
+from .models import Usuario as V1Usuario
 import hashlib
+import logging
 
 User = get_user_model()
+logger = logging.getLogger(__name__)
 
 
 class CustomJWTAuthentication(JWTAuthentication):
     """
     Autenticação JWT customizada com logging de auditoria
+
+    O LOGIN via token é registrado uma única vez por token (`jti`) dentro da janela
+    `AUDITORIA_LOGIN_JWT_JANELA` (segundos). A deduplicação consulta primeiro o cache em
+    memória do processo (`caches['local']`), então as requisições seguintes com o mesmo token
+    (ex.: polling do dashboard) não tocam o cache compartilhado nem o banco; só na primeira vez
+    que o processo vê o token é feito o `cache.add` (atômico) no cache padrão, que com Redis
+    evita registros repetidos entre workers. O registro vai para o gravador em lote.
     """
     
     def authenticate(self, request):
@@ -25,16 +41,158 @@ class CustomJWTAuthentication(JWTAuthentication):
         
         if result is not None:
             user, validated_token = result
-            # Log successful authentication
-            AuditoriaAdmin.log_action(
-                usuario=user,
-                acao='LOGIN',
-                descricao=f'Login via JWT token - {user.username}',
-                request=request
-            )
+            # O user do DRF não passa pelo UserProfileMiddleware
+            anexar_metodos_perfil(user)
+            self._registrar_login(request, user, validated_token)
         
         return result
 
+    def _registrar_login(self, request, user, validated_token):
+        """Enfileira o LOGIN na primeira vez que o token é visto dentro da janela"""
+        sessao = validated_token.get(jwt_settings.JTI_CLAIM) or (
+            f"{validated_token.get(jwt_settings.USER_ID_CLAIM)}:{validated_token.get('iat')}"
+        )
+        janela = settings.COMPRAS_SETTINGS.get(
+            'AUDITORIA_LOGIN_JWT_JANELA', int(jwt_settings.ACCESS_TOKEN_LIFETIME.total_seconds())
+        )
+        chave = f'auditoria:login_jwt:{sessao}'
+        local = caches['local']
+        if local.get(chave):
+            return
+        local.set(chave, True, timeout=janela)
+        if not cache.add(chave, True, timeout=janela):
+            return
+        AuditoriaAdmin.log_action_em_lote(
+            usuario=user,
+            acao='LOGIN',
+            descricao=f'Login via JWT token - {user.username}',
+            request=request
+        )
+
+
+# Claim com a versão do perfil V1 gravada no token (ver versao_perfil)
+CLAIM_VERSAO_PERFIL = 'perfil_versao'
+
+
+def versao_perfil(perfil):
+    """
+    Versão do perfil V1: hash curto de nome/perfil/departamento. Qualquer alteração
+    no perfil muda a versão e invalida os tokens emitidos antes dela.
+    """
+    texto = '|'.join(str(perfil.get(campo) or '') for campo in CAMPOS_PERFIL)
+    return hashlib.sha256(texto.encode()).hexdigest()[:16]
+
+
+# Sessões válidas em memória do processo (ver sessoes_validas)
+SESSOES_CACHE_KEY = 'usuarios:sessoes_validas'
+
+
+def sessoes_validas():
+    """
+    O que valida um token com claims de perfil, em memória do processo (caches['local']):
+    versão atual do perfil V1 por username e ids dos Users ativos. Recarregado (2 consultas)
+    a cada PERFIL_CACHE_TIMEOUT segundos ou quando os sinais de Usuario/User o descartam;
+    entre uma recarga e outra a autenticação não consulta o banco nem o cache compartilhado.
+    """
+    local = caches['local']
+    sessoes = local.get(SESSOES_CACHE_KEY)
+    if sessoes is None:
+        versoes = {
+            perfil['username']: versao_perfil(perfil)
+            for perfil in V1Usuario.objects.values('username', *CAMPOS_PERFIL)
+        }
+        ativos = {str(pk) for pk in User.objects.filter(is_active=True).values_list('pk', flat=True)}
+        sessoes = (versoes, ativos)
+        local.set(SESSOES_CACHE_KEY, sessoes, settings.COMPRAS_SETTINGS.get('PERFIL_CACHE_TIMEOUT', 60))
+    return sessoes
+
+
+def invalidar_sessoes_validas():
+    """Descarta as sessões válidas do processo (chamado pelos sinais de Usuario e User)"""
+    caches['local'].delete(SESSOES_CACHE_KEY)
+
+
+class PerfilTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Serializer de token que embute o perfil V1 (nome, perfil, departamento) como claims assinadas
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        perfil = get_perfil_v1(user.username)
+        if perfil:
+            token['username'] = user.username
+            for campo in CAMPOS_PERFIL:
+                token[campo] = perfil.get(campo) or ''
+            token[CLAIM_VERSAO_PERFIL] = versao_perfil(perfil)
+        return token
+
+
+class PerfilTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Renovação de token que recusa usuários desativados ou removidos (is_active em cache)
+    """
+    default_error_messages = {
+        'no_active_account': 'Conta de usuário desativada.'
+    }
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if not get_usuario_ativo(refresh.get(jwt_settings.USER_ID_CLAIM)):
+            raise exceptions.AuthenticationFailed(
+                self.error_messages['no_active_account'], 'no_active_account'
+            )
+        return super().validate(attrs)
+
+
+class PerfilTokenUser(TokenUser):
+    """
+    Usuário montado a partir das claims do token, sem consulta ao banco.
+    Operações que precisam do registro (salvar, trocar senha) não são suportadas:
+    as views correspondentes usam CustomJWTAuthentication.
+    """
+
+    @cached_property
+    def _perfil_v1(self):
+        # Lido por middleware.get_perfil_usuario: as permissões saem das claims
+        return {campo: self.token.get(campo, '') for campo in CAMPOS_PERFIL}
+
+    @property
+    def nome(self):
+        return self.token.get('nome', '')
+
+    @property
+    def first_name(self):
+        return self.nome
+
+    def get_full_name(self):
+        return self.nome
+
+    def get_short_name(self):
+        return self.nome
+
+
+class PerfilJWTAuthentication(CustomJWTAuthentication):
+    """
+    Autenticação JWT sem consultas: o usuário vem das claims assinadas (PerfilTokenUser).
+    A revogação é checada em memória (sessoes_validas): se a versão do perfil na claim não é
+    a atual ou o User foi removido ou desativado, o token é recusado. Alterações feitas por
+    outro worker ou direto no banco pelo app V1 valem em até PERFIL_CACHE_TIMEOUT segundos.
+    Tokens sem as claims de perfil (emitidos antes) seguem o caminho padrão com busca no banco.
+    """
+
+    def get_user(self, validated_token):
+        if CLAIM_VERSAO_PERFIL not in validated_token:
+            return super().get_user(validated_token)
+
+        versoes, ativos = sessoes_validas()
+        if versoes.get(validated_token.get('username', '')) != validated_token[CLAIM_VERSAO_PERFIL]:
+            raise InvalidToken('Perfil do usuário alterado. Faça login novamente.')
+        if str(validated_token.get(jwt_settings.USER_ID_CLAIM)) not in ativos:
+            raise exceptions.AuthenticationFailed('Conta de usuário desativada.', code='user_inactive')
+        return PerfilTokenUser(validated_token)
+
 
 class LoginSerializer(serializers.Serializer):
     """
@@ -47,143 +205,30 @@ class LoginSerializer(serializers.Serializer):
         username = attrs.get('username')
         password = attrs.get('password')
         
-        print(f"Tentativa de login - Username: {username}")
-        print(f"Dados recebidos: {attrs}")
-        
         if username and password:
-            # Primeiro tenta autenticação Django padrão
-            print("Tentando autenticação Django padrão...")
-            user = authenticate(username=username, password=password)
-            
-            if not user:
-                print("Autenticação Django falhou, tentando com hash SHA256 (V1)...")
-                # Se falhar, tenta com hash SHA256 (compatibilidade V1)
-                user = self._authenticate_v1_hash(username, password)
+            # Uma única verificação: ModelBackend (hash do Django, inclusive o hash V1 marcado,
+            # regravado no hasher padrão) e, no primeiro login, V1AuthenticationBackend
+            user = authenticate(request=self.context.get('request'), username=username, password=password)
             
             if user:
-                print(f"Usuário autenticado com sucesso: {user}")
                 if not user.is_active:
-                    print("Conta desativada")
                     raise serializers.ValidationError('Conta de usuário desativada.')
                 
                 attrs['user'] = user
                 return attrs
             else:
-                print("Falha na autenticação: credenciais inválidas")
                 # Log failed login attempt
                 HistoricoLogin.objects.create(
                     username_tentativa=username,
                     status='FAILED',
                     ip_address=self._get_client_ip(),
-                    motivo_falha='Credenciais inválidas'
+                    motivo_falha='Credenciais inválidas',
+                    sessao_id='',  # coluna NOT NULL no schema V1
                 )
                 raise serializers.ValidationError('Credenciais inválidas.')
         else:
-            print("Username ou password não fornecidos")
             raise serializers.ValidationError('Username e password são obrigatórios.')
     
-    def _authenticate_v1_hash(self, username, password):
-        """
-        Autentica usando hash SHA256 do sistema V1 para compatibilidade
-        """
-        try:
-            # Importa o modelo Usuario do V1
-            from apps.usuarios.models import Usuario as V1Usuario
-            
-            print(f"Buscando usuário V1: {username}")
-            # Tenta encontrar o usuário no modelo V1
-            v1_user = V1Usuario.objects.get(username=username)
-            print(f"Usuário V1 encontrado: {v1_user.nome} ({v1_user.perfil})")
-            
-            # Tenta diferentes algoritmos de hash para compatibilidade com V1
-            print(f"Senha informada: {password}")
-            
-            # Cria um dicionário para armazenar todas as tentativas
-            hash_attempts = {}
-            
-            # Tentativa 1: SHA256 com salt "sistema_compras_2024"
-            salt1 = "sistema_compras_2024"
-            password_with_salt1 = f"{password}{salt1}"
-            hash_attempts["senha+salt"] = hashlib.sha256(password_with_salt1.encode()).hexdigest()
-            
-            # Tentativa 2: SHA256 sem salt
-            hash_attempts["senha pura"] = hashlib.sha256(password.encode()).hexdigest()
-            
-            # Tentativa 3: SHA256 com salt invertido
-            password_with_salt3 = f"{salt1}{password}"
-            hash_attempts["salt+senha"] = hashlib.sha256(password_with_salt3.encode()).hexdigest()
-            
-            # Tentativa 4: Teste123 é a senha padrão mencionada nas memórias
-            default_password = "Teste123"
-            hash_attempts["Teste123 puro"] = hashlib.sha256(default_password.encode()).hexdigest()
-            
-            # Tentativa 5: Teste123 com salt
-            password_with_salt5 = f"{default_password}{salt1}"
-            hash_attempts["Teste123+salt"] = hashlib.sha256(password_with_salt5.encode()).hexdigest()
-            
-            # Tentativa 6: Salt invertido com Teste123
-            password_with_salt6 = f"{salt1}{default_password}"
-            hash_attempts["salt+Teste123"] = hashlib.sha256(password_with_salt6.encode()).hexdigest()
-            
-            # Tentativa 7: Outros salts comuns
-            other_salts = ["ziran", "compras", "sistema", "2024", "sistema_compras", "ziran_compras"]
-            for salt in other_salts:
-                hash_attempts[f"Teste123+{salt}"] = hashlib.sha256(f"Teste123{salt}".encode()).hexdigest()
-                hash_attempts[f"{salt}+Teste123"] = hashlib.sha256(f"{salt}Teste123".encode()).hexdigest()
-            
-            # Tentativa 8: Outros algoritmos de hash
-            import base64
-            # MD5
-            hash_attempts["MD5(Teste123)"] = hashlib.md5("Teste123".encode()).hexdigest()
-            # SHA1
-            hash_attempts["SHA1(Teste123)"] = hashlib.sha1("Teste123".encode()).hexdigest()
-            # Base64
-            hash_attempts["Base64(Teste123)"] = base64.b64encode("Teste123".encode()).decode()
-            
-            # Tentativa 9: Teste com a senha "Teste123" em diferentes formatos
-            variations = ["teste123", "TESTE123", "Teste@123", "teste@123", "Teste_123", "teste_123"]
-            for var in variations:
-                hash_attempts[f"SHA256({var})"] = hashlib.sha256(var.encode()).hexdigest()
-            
-            # Exibe todos os hashes tentados
-            print("\nTentativas de hash:")
-            for desc, hash_val in hash_attempts.items():
-                match = "MATCH!" if hash_val == v1_user.senha_hash else ""
-                print(f"- {desc}: {hash_val} {match}")
-            
-            print(f"\nHash armazenado: {v1_user.senha_hash}")
-            
-            # Verifica se algum dos hashes bate com o armazenado
-            matching_hash = None
-            for desc, hash_val in hash_attempts.items():
-                if hash_val == v1_user.senha_hash:
-                    matching_hash = desc
-                    break
-            
-            # Verifica se algum dos hashes bate com o armazenado
-            if matching_hash:
-                print("Hash corresponde! Autenticação bem-sucedida.")
-                # Busca ou cria usuário Django correspondente
-                django_user, created = User.objects.get_or_create(
-                    username=username,
-                    defaults={
-                        'first_name': v1_user.nome,
-                        'is_active': True,
-                        'is_staff': v1_user.perfil == 'Admin',
-                        'is_superuser': v1_user.perfil == 'Admin',
-                    }
-                )
-                return django_user
-            else:
-                print("Hash não corresponde. Autenticação falhou.")
-                
-        except V1Usuario.DoesNotExist:
-            print(f"Usuário V1 não encontrado: {username}")
-        except Exception as e:
-            print(f"Erro ao autenticar com hash V1: {str(e)}")
-        
-        return None
-    
     def _get_client_ip(self):
         """Extrai IP do cliente da requisição"""
         request = self.context.get('request')
@@ -241,7 +286,7 @@ def get_tokens_for_user(user, request=None):
     """
     Gera tokens JWT para um usuário
     """
-    refresh = RefreshToken.for_user(user)
+    refresh = PerfilTokenObtainPairSerializer.get_token(user)
     
     # Log successful login
     try:
@@ -261,9 +306,9 @@ def get_tokens_for_user(user, request=None):
             user_agent=request.META.get('HTTP_USER_AGENT', '') if request else '',
             sessao_id=session_key,
         )
-    except Exception as e:
-        print(f"Erro ao registrar login: {str(e)}")
+    except Exception:
         # Não falhar o login se o registro de auditoria falhar
+        logger.exception("Erro ao registrar login de %s", user.username)
     
     # Log audit action
     AuditoriaAdmin.log_action(
@@ -286,68 +331,3 @@ def _get_client_ip_from_request(request):
     if x_forwarded_for:
         return x_forwarded_for.split(',')[0]
     return request.META.get('REMOTE_ADDR')
-
-
-"""
-Custom authentication backend for V1 database compatibility
-"""
-from django.contrib.auth.backends import BaseBackend
-from django.contrib.auth.models import User
-from apps.usuarios.models import Usuario
-import hashlib
-
-
-class V1AuthenticationBackend(BaseBackend):
-    """
-    Custom authentication backend that works with V1 senha_hash
-    """
-    
-    def authenticate(self, request, username=None, password=None, **kwargs):
-        if username is None or password is None:
-            return None
-        
-        try:
-            # Get V1 user
-            v1_user = Usuario.objects.get(username=username)
-            
-            # Check password against V1 senha_hash
-            if self.check_v1_password(password, v1_user.senha_hash):
-                # Create or get Django User for session management
-                django_user, created = User.objects.get_or_create(
-                    username=username,
-                    defaults={
-                        'first_name': v1_user.nome,
-                        'is_active': True,
-                        'is_staff': v1_user.perfil == 'Admin',
-                        'is_superuser': v1_user.perfil == 'Admin',
-                    }
-                )
-                return django_user
-                
-        except Usuario.DoesNotExist:
-            return None
-        
-        return None
-    
-    def check_v1_password(self, password, senha_hash):
-        """
-        Check password against V1 hash format using SHA256 with salt
-        """
-        # V1 usa SHA256 com salt "sistema_compras_2024"
-        salt = "sistema_compras_2024"
-        password_with_salt = f"{password}{salt}"
-        test_hash = hashlib.sha256(password_with_salt.encode()).hexdigest()
-        
-        # Log para debug
-        print(f"Verificando senha: {password}")
-        print(f"Hash gerado: {test_hash}")
-        print(f"Hash armazenado: {senha_hash}")
-        print(f"Resultado: {test_hash == senha_hash}")
-        
-        return test_hash == senha_hash
-    
-    def get_user(self, user_id):
-        try:
-            return User.objects.get(pk=user_id)
-        except User.DoesNotExist:
-            return None
@@ -1,56 +1,63 @@
 """
 Custom authentication backend for V1 database compatibility
 """
-from django.contrib.auth.backends import BaseBackend
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
-from apps.usuarios.models import Usuario
-import hashlib
+from django.core.exceptions import PermissionDenied
+from apps.usuarios.models import MigracaoSenhaV1, Usuario
+from .hashers import identificar_esquema_v1
 
 
-class V1AuthenticationBackend(BaseBackend):
+class V1AuthenticationBackend(ModelBackend):
     """
     Custom authentication backend that works with V1 senha_hash
+
+    O `senha_hash` do V1 é relido a cada login e comparado com o último migrado
+    (MigracaoSenhaV1). Enquanto não muda, a senha é verificada no User do Django (hasher
+    padrão). No primeiro login, ou depois de uma troca de senha no app V1, a senha informada
+    é verificada contra o hash do V1 no esquema do próprio usuário (identificar_esquema_v1) e
+    só então gravada com o hasher padrão. Usuários do V1 recusados aqui não chegam ao
+    ModelBackend (PermissionDenied), para que uma senha antiga não seja aceita.
     """
-    
+
     def authenticate(self, request, username=None, password=None, **kwargs):
         if username is None or password is None:
             return None
-        
-        try:
-            # Get V1 user
-            v1_user = Usuario.objects.get(username=username)
-            
-            # Check password against V1 senha_hash
-            if self.check_v1_password(password, v1_user.senha_hash):
-                # Create or get Django User for session management
-                django_user, created = User.objects.get_or_create(
+
+        v1_user = Usuario.objects.filter(username=username).first()
+        if v1_user is None:
+            return None
+
+        # Create or get Django User for session management
+        django_user, created = User.objects.get_or_create(
+            username=username,
+            defaults={
+                'first_name': v1_user.nome,
+                'is_active': True,
+                'is_staff': v1_user.perfil == 'Admin',
+                'is_superuser': v1_user.perfil == 'Admin',
+                # Sem senha até a primeira verificação bem-sucedida contra o hash do V1
+                'password': make_password(None),
+            }
+        )
+
+        digest = MigracaoSenhaV1.digest(v1_user.senha_hash)
+        migracao = MigracaoSenhaV1.objects.filter(username=username).first()
+        if migracao and migracao.senha_hash_digest == digest and django_user.has_usable_password():
+            # Senha do V1 inalterada desde a migração
+            valido = django_user.check_password(password)
+        else:
+            esquema = identificar_esquema_v1(password, v1_user.senha_hash)
+            valido = esquema is not None
+            if valido:
+                django_user.set_password(password)
+                django_user.save(update_fields=['password'])
+                MigracaoSenhaV1.objects.update_or_create(
                     username=username,
-                    defaults={
-                        'first_name': v1_user.nome,
-                        'is_active': True,
-                        'is_staff': v1_user.perfil == 'Admin',
-                        'is_superuser': v1_user.perfil == 'Admin',
-                    }
+                    defaults={'senha_hash_digest': digest, 'esquema': esquema},
                 )
-                return django_user
-                
-        except Usuario.DoesNotExist:
-            return None
-        
-        return None
-    
-    def check_v1_password(self, password, senha_hash):
-        """
-        Check password against V1 hash format
-        Adjust this method based on V1's hashing algorithm
-        """
-        # V1: SHA256 com salt "sistema_compras_2024"
-        salt = "sistema_compras_2024"
-        test_hash = hashlib.sha256((password + salt).encode()).hexdigest()
-        return test_hash == (senha_hash or "")
-    
-    def get_user(self, user_id):
-        try:
-            return User.objects.get(pk=user_id)
-        except User.DoesNotExist:
-            return None
+
+        if valido and self.user_can_authenticate(django_user):
+            return django_user
+        raise PermissionDenied
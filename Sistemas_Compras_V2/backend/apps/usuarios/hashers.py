@@ -0,0 +1,88 @@
+"""
+Hashers de senha legados do V1 para o sistema de hashers do Django
+
+`usuarios.senha_hash` (SHA256 hex sem prefixo) existe em dois formatos, que convivem no mesmo
+banco: o dos scripts do V2 e o do app Streamlit do V1. O esquema é identificado por usuário no
+login (identificar_esquema_v1), verificando a senha informada em cada hasher legado; o
+V1AuthenticationBackend grava então a senha com o hasher padrão do Django.
+Os hashers também ficam em PASSWORD_HASHERS para verificar valores já marcados com o prefixo
+do esquema (ex.: "v1_sha256$$<hex>").
+"""
+import hashlib
+
+from django.contrib.auth.hashers import BasePasswordHasher, check_password, identify_hasher, mask_hash
+from django.utils.crypto import constant_time_compare
+from django.utils.translation import gettext_noop as _
+
+
+class V1SHA256PasswordHasher(BasePasswordHasher):
+    """
+    SHA256 de senha + "sistema_compras_2024" (scripts do V2: setup_v2_database, reset_passwords)
+    """
+    algorithm = "v1_sha256"
+    salt_fixo = "sistema_compras_2024"
+
+    def salt(self):
+        return ""
+
+    def digest(self, password):
+        return hashlib.sha256(f"{password}{self.salt_fixo}".encode()).hexdigest()
+
+    def encode(self, password, salt):
+        if salt != "":
+            raise ValueError("salt must be empty.")
+        return f"{self.algorithm}$${self.digest(password)}"
+
+    def decode(self, encoded):
+        algorithm, empty, hash = encoded.split("$", 2)
+        assert algorithm == self.algorithm
+        return {"algorithm": algorithm, "hash": hash, "salt": None}
+
+    def verify(self, password, encoded):
+        return constant_time_compare(encoded, self.encode(password, ""))
+
+    def safe_summary(self, encoded):
+        decoded = self.decode(encoded)
+        return {
+            _("algorithm"): decoded["algorithm"],
+            _("hash"): mask_hash(decoded["hash"]),
+        }
+
+    def harden_runtime(self, password, encoded):
+        pass
+
+
+class V1ZiranSHA256PasswordHasher(V1SHA256PasswordHasher):
+    """
+    SHA256 de "ziran_local_salt_v1" + senha (app Streamlit do V1: app.py/database_local.py)
+    """
+    algorithm = "v1_sha256_ziran"
+    salt_fixo = "ziran_local_salt_v1"
+
+    def digest(self, password):
+        return hashlib.sha256(f"{self.salt_fixo}{password}".encode()).hexdigest()
+
+
+# Formatos do usuarios.senha_hash, na ordem em que são testados
+ESQUEMAS_V1 = (V1SHA256PasswordHasher, V1ZiranSHA256PasswordHasher)
+
+
+def identificar_esquema_v1(password, senha_hash):
+    """
+    Esquema (algorithm do hasher) em que `senha_hash` confere com `password`; None se a senha
+    não confere em nenhum. Valores que já têm prefixo de algoritmo ("algo$...") são verificados
+    pelo hasher do próprio prefixo.
+    """
+    if not senha_hash or password is None:
+        return None
+    if "$" in senha_hash:
+        try:
+            algoritmo = identify_hasher(senha_hash).algorithm
+        except ValueError:
+            return None
+        return algoritmo if check_password(password, senha_hash) else None
+    for classe in ESQUEMAS_V1:
+        hasher = classe()
+        if hasher.verify(password, f"{hasher.algorithm}$${senha_hash}"):
+            return hasher.algorithm
+    return None
@@ -3,8 +3,17 @@ Middleware para adaptar request.user com métodos de perfil do V1
 - Adiciona métodos utilitários esperados pelas views/permissions:
   is_admin(), can_create_solicitation(), can_manage_stock(), can_manage_procurement(), can_approve(), get_profile_permissions()
 - Funciona também para AnonymousUser (retorna permissões falsas)
+- O perfil V1 (nome, perfil, departamento) é resolvido uma vez por requisição (memorizado no
+  próprio objeto user) e mantido no cache do Django entre requisições, chaveado pelo username;
+  os sinais de Usuario (post_save/post_delete) invalidam a entrada. O cache padrão é local ao
+  processo (settings.CACHES): a invalidação alcança os outros workers só com REDIS_URL; sem
+  ele, e para alterações feitas direto no banco pelo app V1 (que não disparam sinais), a
+  mudança aparece quando a entrada expira (COMPRAS_SETTINGS['PERFIL_CACHE_TIMEOUT']).
 """
-from typing import Dict
+from typing import Dict, Optional
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.utils.deprecation import MiddlewareMixin
 
 try:
@@ -14,14 +23,66 @@ except Exception:  # pragma: no cover
 
 from .models import Usuario as V1Usuario
 
+User = get_user_model()
 
-def _get_v1_usuario(username: str):
+# Campos do V1 guardados no cache
+CAMPOS_PERFIL = ('nome', 'perfil', 'departamento')
+
+
+def perfil_cache_key(username: str) -> str:
+    return f"usuarios:perfil_v1:{username}"
+
+
+def get_perfil_v1(username: str) -> Optional[Dict[str, str]]:
+    """Perfil V1 do username (cache entre requisições); None se não existe usuário V1"""
     if not username:
         return None
+    chave = perfil_cache_key(username)
+    perfil = cache.get(chave)
+    if perfil is None:
+        perfil = V1Usuario.objects.filter(username=username).values(*CAMPOS_PERFIL).first() or {}
+        # Usuário inexistente também é guardado ({}), para não repetir a consulta a cada requisição
+        cache.set(chave, perfil, settings.COMPRAS_SETTINGS.get('PERFIL_CACHE_TIMEOUT', 60))
+    return perfil or None
+
+
+def invalidar_perfil_v1(username: str):
+    """Remove o perfil do cache (chamado pelos sinais de Usuario)"""
+    if username:
+        cache.delete(perfil_cache_key(username))
+
+
+def ativo_cache_key(user_id) -> str:
+    return f"usuarios:ativo:{user_id}"
+
+
+def get_usuario_ativo(user_id) -> bool:
+    """is_active do User do Django (cache entre requisições); False se o usuário não existe"""
+    if user_id is None:
+        return False
+    chave = ativo_cache_key(user_id)
+    ativo = cache.get(chave)
+    if ativo is None:
+        ativo = bool(User.objects.filter(pk=user_id).values_list('is_active', flat=True).first())
+        cache.set(chave, ativo, settings.COMPRAS_SETTINGS.get('PERFIL_CACHE_TIMEOUT', 60))
+    return ativo
+
+
+def invalidar_usuario_ativo(user_id):
+    """Remove o is_active do cache (chamado pelos sinais de User)"""
+    if user_id is not None:
+        cache.delete(ativo_cache_key(user_id))
+
+
+def get_perfil_usuario(user) -> Dict[str, str]:
+    """Perfil V1 do user da requisição, resolvido uma única vez por objeto user ({} se não houver)"""
+    if not user or isinstance(user, AnonymousUser) or not getattr(user, "is_authenticated", False):
+        return {}
     try:
-        return V1Usuario.objects.get(username=username)
-    except V1Usuario.DoesNotExist:
-        return None
+        return user._perfil_v1
+    except AttributeError:
+        user._perfil_v1 = get_perfil_v1(getattr(user, "username", "")) or {}
+        return user._perfil_v1
 
 
 def _permissions_from_perfil(perfil: str) -> Dict[str, bool]:
@@ -36,76 +97,36 @@ def _permissions_from_perfil(perfil: str) -> Dict[str, bool]:
     }
 
 
+def anexar_metodos_perfil(user):
+    """
+    Anexa os métodos de perfil ao user (somente os que ainda não existem).
+    Usado pelo middleware (user da sessão) e pela autenticação JWT (user do DRF).
+    """
+    if user is None:
+        return user
+
+    def permissions() -> Dict[str, bool]:
+        return _permissions_from_perfil(get_perfil_usuario(user).get("perfil", ""))
+
+    def metodo(nome: str):
+        return lambda: permissions()[nome]
+
+    for name, func in (
+        ("is_admin", metodo("is_admin")),
+        ("can_create_solicitation", metodo("can_create_solicitation")),
+        ("can_create_solicitacao", metodo("can_create_solicitacao")),  # Alias for compatibility
+        ("can_manage_stock", metodo("can_manage_stock")),
+        ("can_manage_procurement", metodo("can_manage_procurement")),
+        ("can_approve", metodo("can_approve")),
+        ("get_profile_permissions", permissions),
+    ):
+        # callable(): o TokenUser do simplejwt devolve None (claim ausente) para atributos desconhecidos
+        if not callable(getattr(user, name, None)):
+            setattr(user, name, func)
+    return user
+
+
 class UserProfileMiddleware(MiddlewareMixin):
     def process_request(self, request):
-        user = getattr(request, "user", None)
-
-        def is_admin():
-            if not user or isinstance(user, AnonymousUser):
-                return False
-            # Direct check of V1 user's perfil
-            v1 = _get_v1_usuario(getattr(user, "username", ""))
-            if v1 and v1.perfil == "Admin":
-                print(f"User {getattr(user, 'username', '')} has Admin permissions")
-                return True
-            return False
-
-        def can_create_solicitation():
-            if not user or isinstance(user, AnonymousUser):
-                return False
-            # Direct check of V1 user's perfil
-            v1 = _get_v1_usuario(getattr(user, "username", ""))
-            if v1 and v1.perfil in ["Solicitante", "Admin"]:
-                print(f"User {getattr(user, 'username', '')} has Solicitante permissions")
-                return True
-            return False
-
-        def can_manage_stock():
-            if not user or isinstance(user, AnonymousUser):
-                return False
-            v1 = _get_v1_usuario(getattr(user, "username", ""))
-            perms = _permissions_from_perfil(getattr(v1, "perfil", ""))
-            return perms["can_manage_stock"]
-
-        def can_manage_procurement():
-            if not user or isinstance(user, AnonymousUser):
-                return False
-            v1 = _get_v1_usuario(getattr(user, "username", ""))
-            perms = _permissions_from_perfil(getattr(v1, "perfil", ""))
-            return perms["can_manage_procurement"]
-
-        def can_approve():
-            if not user or isinstance(user, AnonymousUser):
-                return False
-            v1 = _get_v1_usuario(getattr(user, "username", ""))
-            perms = _permissions_from_perfil(getattr(v1, "perfil", ""))
-            return perms["can_approve"]
-
-        def get_profile_permissions():
-            if not user or isinstance(user, AnonymousUser):
-                return {
-                    "is_admin": False,
-                    "can_create_solicitation": False,
-                    "can_create_solicitacao": False,  # Alias for compatibility
-                    "can_manage_stock": False,
-                    "can_manage_procurement": False,
-                    "can_approve": False,
-                }
-            v1 = _get_v1_usuario(getattr(user, "username", ""))
-            return _permissions_from_perfil(getattr(v1, "perfil", ""))
-
-        # Anexa métodos ao user dinamicamente (somente se ainda não existem)
-        if user is not None:
-            for name, func in (
-                ("is_admin", is_admin),
-                ("can_create_solicitation", can_create_solicitation),
-                ("can_create_solicitacao", can_create_solicitation),  # Alias for compatibility
-                ("can_manage_stock", can_manage_stock),
-                ("can_manage_procurement", can_manage_procurement),
-                ("can_approve", can_approve),
-                ("get_profile_permissions", get_profile_permissions),
-            ):
-                if not hasattr(user, name):
-                    setattr(user, name, func)
-
+        anexar_metodos_perfil(getattr(request, "user", None))
         return None
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.16 on 2026-10-19 02:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0002_alter_usuario_options_alter_usuario_managers_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MigracaoSenhaV1',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('username', models.CharField(max_length=150, unique=True, verbose_name='Username')),
+                ('senha_hash_digest', models.CharField(max_length=64, verbose_name='SHA256 do senha_hash migrado')),
+                ('esquema', models.CharField(max_length=50, verbose_name='Esquema')),
+                ('migrado_em', models.DateTimeField(auto_now=True, verbose_name='Migrado em')),
+            ],
+            options={
+                'verbose_name': 'Migração de Senha V1',
+                'verbose_name_plural': 'Migrações de Senha V1',
+            },
+        ),
+    ]
@@ -2,6 +2,8 @@
 Modelos para gestão de usuários do Sistema de Compras V2
 Baseado na estrutura do V1 com melhorias para Django
 """
+import hashlib
+
 from django.db import models
 
 
@@ -75,6 +77,29 @@ class Usuario(models.Model):
         return self.perfil == 'Admin'
 
 
+class MigracaoSenhaV1(models.Model):
+    """
+    Último `usuarios.senha_hash` migrado para a senha do User do Django (V1AuthenticationBackend).
+    Se o hash no V1 mudar (senha trocada pelo app V1), a senha é migrada de novo no próximo login.
+    """
+    username = models.CharField('Username', max_length=150, unique=True)  # V1 usa username, não FK
+    senha_hash_digest = models.CharField('SHA256 do senha_hash migrado', max_length=64)
+    esquema = models.CharField('Esquema', max_length=50)
+    migrado_em = models.DateTimeField('Migrado em', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Migração de Senha V1'
+        verbose_name_plural = 'Migrações de Senha V1'
+
+    def __str__(self):
+        return f"{self.username} ({self.esquema})"
+
+    @staticmethod
+    def digest(senha_hash):
+        """SHA256 do senha_hash (o hash do V1 não é copiado)"""
+        return hashlib.sha256((senha_hash or '').encode()).hexdigest()
+
+
 class Sessao(models.Model):
     """
     Modelo para gerenciar sessões persistentes (equivalente ao V1)
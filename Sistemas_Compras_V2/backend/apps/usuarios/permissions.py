@@ -31,12 +31,13 @@ class IsOwnerOrAdmin(permissions.BasePermission):
             return True
         
         # Usuário pode acessar apenas seus próprios dados
+        # (compara pk: request.user pode ser o usuário das claims do token, não o model)
         if hasattr(obj, 'user'):
-            return obj.user == request.user
+            return getattr(obj.user, 'pk', None) == request.user.pk
         
         # Se o objeto é um usuário, verifica se é o próprio usuário
         if hasattr(obj, 'username'):
-            return obj == request.user
+            return obj.pk == request.user.pk
         
         return False
 
@@ -47,32 +48,15 @@ class IsSolicitanteOrAdmin(permissions.BasePermission):
     """
     
     def has_permission(self, request, view):
-        import logging
-        logger = logging.getLogger('django')
-        
-        logger.info(f"Checking permission for user: {getattr(request.user, 'username', 'AnonymousUser')}")
-        
         if not request.user.is_authenticated:
-            logger.warning("User is not authenticated")
             return False
         
         # Check both method names for compatibility
-        can_create_solicitation = getattr(request.user, 'can_create_solicitation', lambda: False)()
-        can_create_solicitacao = getattr(request.user, 'can_create_solicitacao', lambda: False)()
-        is_admin = getattr(request.user, 'is_admin', lambda: False)()
-        
-        logger.info(f"Permission check: can_create_solicitation={can_create_solicitation}, "
-                   f"can_create_solicitacao={can_create_solicitacao}, is_admin={is_admin}")
-        
-        # Try to get V1 user info for debugging
-        try:
-            from apps.usuarios.models import Usuario
-            v1_user = Usuario.objects.get(username=request.user.username)
-            logger.info(f"V1 user found: {v1_user.nome}, perfil={v1_user.perfil}")
-        except Exception as e:
-            logger.warning(f"Could not get V1 user: {str(e)}")
-        
-        return can_create_solicitation or can_create_solicitacao or is_admin
+        return (
+            getattr(request.user, 'can_create_solicitation', lambda: False)()
+            or getattr(request.user, 'can_create_solicitacao', lambda: False)()
+            or getattr(request.user, 'is_admin', lambda: False)()
+        )
 
 
 class IsEstoqueOrAdmin(permissions.BasePermission):
@@ -144,12 +128,8 @@ class CanManageSolicitacao(permissions.BasePermission):
             return getattr(obj, 'status', None) == 'Solicitação'
         else:
             # Fallback: usar mapeamento do usuário V1 para comparar com o campo de exibição 'solicitante'
-            try:
-                from apps.usuarios.models import Usuario as V1Usuario
-                v1 = V1Usuario.objects.get(username=user_username)
-                v1_nome = getattr(v1, 'nome', None)
-            except Exception:
-                v1_nome = None
+            from .middleware import get_perfil_usuario
+            v1_nome = get_perfil_usuario(user).get('nome')
             if v1_nome and getattr(obj, 'solicitante', None) == v1_nome:
                 if request.method in permissions.SAFE_METHODS:
                     return True
@@ -48,26 +48,22 @@ class UsuarioSerializer(serializers.ModelSerializer):
         }
 
     def _get_v1_usuario(self, obj):
-        try:
-            from apps.usuarios.models import Usuario
-            return Usuario.objects.get(username=getattr(obj, 'username', ''))
-        except Exception:
-            return None
+        # Perfil V1 em cache (UserProfileMiddleware); {} se não houver usuário V1
+        from .middleware import get_perfil_v1
+        return get_perfil_v1(getattr(obj, 'username', '')) or {}
 
     def get_nome(self, obj):
         v1 = self._get_v1_usuario(obj)
-        if v1 and getattr(v1, 'nome', None):
-            return v1.nome
+        if v1.get('nome'):
+            return v1['nome']
         # fallback
         return obj.get_full_name() or obj.username
 
     def get_perfil(self, obj):
-        v1 = self._get_v1_usuario(obj)
-        return getattr(v1, 'perfil', None) or ''
+        return self._get_v1_usuario(obj).get('perfil') or ''
 
     def get_departamento(self, obj):
-        v1 = self._get_v1_usuario(obj)
-        return getattr(v1, 'departamento', None) or ''
+        return self._get_v1_usuario(obj).get('departamento') or ''
 
 
 class UsuarioCreateSerializer(serializers.ModelSerializer):
@@ -1,7 +1,11 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 
+from .authentication import invalidar_sessoes_validas
+from .middleware import invalidar_perfil_v1, invalidar_usuario_ativo
+from .models import Usuario as V1Usuario
+
 User = get_user_model()
 
 # Mapeamento de perfis para permissões
@@ -43,3 +47,25 @@ def sync_user_permissions(sender, instance, created, **kwargs):
     if updated:
         # Usar update para evitar loop infinito com o signal
         User.objects.filter(id=instance.id).update(permissions=instance.permissions)
+
+
+@receiver(post_save, sender=V1Usuario)
+@receiver(post_delete, sender=V1Usuario)
+def invalidar_cache_perfil(sender, instance, **kwargs):
+    """
+    Remove do cache o perfil V1 (UserProfileMiddleware) e as sessões válidas do processo
+    (PerfilJWTAuthentication) quando o usuário é alterado ou excluído.
+    """
+    invalidar_perfil_v1(instance.username)
+    invalidar_sessoes_validas()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidar_cache_ativo(sender, instance, **kwargs):
+    """
+    Remove do cache o is_active do usuário (renovação de token) e as sessões válidas do processo
+    (PerfilJWTAuthentication) quando ele é alterado ou excluído.
+    """
+    invalidar_usuario_ativo(instance.pk)
+    invalidar_sessoes_validas()
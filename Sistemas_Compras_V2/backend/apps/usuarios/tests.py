@@ -0,0 +1,160 @@
+"""
+Testes da autenticação dos usuários do V1 (esquemas de senha_hash e migração da senha)
+e da autenticação JWT por claims de perfil
+"""
+import hashlib
+from unittest import mock
+
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.test import TestCase
+from rest_framework import exceptions
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from apps.auditoria.models import AuditoriaAdmin
+
+from .authentication import PerfilJWTAuthentication, PerfilTokenObtainPairSerializer, PerfilTokenUser
+from .hashers import identificar_esquema_v1
+from .models import MigracaoSenhaV1, Usuario
+
+
+def hash_scripts_v2(senha):
+    """Formato gravado pelos scripts do V2 (setup_v2_database, reset_passwords)"""
+    return hashlib.sha256(f"{senha}sistema_compras_2024".encode()).hexdigest()
+
+
+def hash_app_v1(senha):
+    """Formato gravado pelo app Streamlit do V1 (database_local.py)"""
+    return hashlib.sha256(f"ziran_local_salt_v1{senha}".encode()).hexdigest()
+
+
+class IdentificarEsquemaV1Test(TestCase):
+
+    def test_esquema_dos_scripts_v2(self):
+        self.assertEqual(identificar_esquema_v1('Teste123', hash_scripts_v2('Teste123')), 'v1_sha256')
+
+    def test_esquema_do_app_v1(self):
+        self.assertEqual(identificar_esquema_v1('Teste123', hash_app_v1('Teste123')), 'v1_sha256_ziran')
+
+    def test_senha_errada(self):
+        self.assertIsNone(identificar_esquema_v1('errada', hash_scripts_v2('Teste123')))
+        self.assertIsNone(identificar_esquema_v1('errada', hash_app_v1('Teste123')))
+
+    def test_hash_vazio(self):
+        self.assertIsNone(identificar_esquema_v1('Teste123', ''))
+
+
+class V1AuthenticationBackendTest(TestCase):
+
+    def criar_usuario_v1(self, username, senha_hash, perfil='Solicitante'):
+        return Usuario.objects.create(
+            username=username, nome=username.title(), perfil=perfil,
+            departamento='TI', senha_hash=senha_hash
+        )
+
+    def test_login_com_hash_dos_scripts_v2(self):
+        self.criar_usuario_v1('ana', hash_scripts_v2('Senha123'))
+
+        user = authenticate(username='ana', password='Senha123')
+
+        self.assertIsNotNone(user)
+        self.assertEqual(MigracaoSenhaV1.objects.get(username='ana').esquema, 'v1_sha256')
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$'))
+
+    def test_login_com_hash_do_app_v1(self):
+        self.criar_usuario_v1('bruno', hash_app_v1('Senha123'))
+
+        user = authenticate(username='bruno', password='Senha123')
+
+        self.assertIsNotNone(user)
+        self.assertEqual(MigracaoSenhaV1.objects.get(username='bruno').esquema, 'v1_sha256_ziran')
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$'))
+
+    def test_esquemas_convivem_no_mesmo_banco(self):
+        self.criar_usuario_v1('ana', hash_scripts_v2('Senha123'))
+        self.criar_usuario_v1('bruno', hash_app_v1('Outra456'))
+
+        self.assertIsNotNone(authenticate(username='ana', password='Senha123'))
+        self.assertIsNotNone(authenticate(username='bruno', password='Outra456'))
+
+    def test_primeiro_login_com_senha_errada_nao_grava(self):
+        self.criar_usuario_v1('ana', hash_scripts_v2('Senha123'))
+
+        self.assertIsNone(authenticate(username='ana', password='errada'))
+
+        self.assertFalse(User.objects.get(username='ana').has_usable_password())
+        self.assertFalse(MigracaoSenhaV1.objects.filter(username='ana').exists())
+
+    def test_login_seguinte_usa_senha_migrada(self):
+        self.criar_usuario_v1('ana', hash_app_v1('Senha123'))
+        authenticate(username='ana', password='Senha123')
+
+        self.assertIsNotNone(authenticate(username='ana', password='Senha123'))
+        self.assertIsNone(authenticate(username='ana', password='errada'))
+
+    def test_troca_de_senha_no_v1_migra_de_novo(self):
+        usuario = self.criar_usuario_v1('ana', hash_app_v1('Antiga123'))
+        self.assertIsNotNone(authenticate(username='ana', password='Antiga123'))
+
+        # Senha trocada pelo app V1 (grava direto no banco, sem sinais do Django)
+        Usuario.objects.filter(pk=usuario.pk).update(senha_hash=hash_app_v1('Nova456'))
+
+        self.assertIsNone(authenticate(username='ana', password='Antiga123'))
+        self.assertIsNotNone(authenticate(username='ana', password='Nova456'))
+        self.assertEqual(
+            MigracaoSenhaV1.objects.get(username='ana').senha_hash_digest,
+            MigracaoSenhaV1.digest(hash_app_v1('Nova456'))
+        )
+
+    def test_usuario_sem_registro_v1_usa_model_backend(self):
+        User.objects.create_user(username='django', password='Senha123')
+
+        self.assertIsNotNone(authenticate(username='django', password='Senha123'))
+
+
+class PerfilJWTAuthenticationTest(TestCase):
+
+    def setUp(self):
+        for alias in ('default', 'local'):
+            caches[alias].clear()
+        # O LOGIN via token iria para o gravador em lote (thread própria), fora da transação do teste
+        patcher = mock.patch.object(AuditoriaAdmin, 'log_action_em_lote')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.usuario = Usuario.objects.create(
+            username='ana', nome='Ana', perfil='Solicitante', departamento='TI', senha_hash=''
+        )
+        self.user = User.objects.create_user(username='ana', password='Senha123')
+        self.token = PerfilTokenObtainPairSerializer.get_token(self.user).access_token
+
+    def autenticar(self):
+        request = APIRequestFactory().get('/api/solicitacoes/dashboard/',
+                                          HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        return PerfilJWTAuthentication().authenticate(request)
+
+    def test_requisicoes_seguintes_sem_consultas(self):
+        self.autenticar()
+
+        with self.assertNumQueries(0):
+            user, _ = self.autenticar()
+
+        self.assertIsInstance(user, PerfilTokenUser)
+        self.assertEqual(user.nome, 'Ana')
+
+    def test_usuario_desativado_recusado(self):
+        self.autenticar()
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.autenticar()
+
+    def test_perfil_alterado_recusado(self):
+        self.autenticar()
+        self.usuario.perfil = 'Admin'
+        self.usuario.save()
+
+        with self.assertRaises(InvalidToken):
+            self.autenticar()
@@ -9,7 +9,8 @@ from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
 from django.contrib.auth import logout
-from .authentication import LoginSerializer, TokenSerializer, get_tokens_for_user
+from rest_framework.authentication import SessionAuthentication
+from .authentication import CustomJWTAuthentication, LoginSerializer, TokenSerializer, get_tokens_for_user
 from .serializers import UsuarioSerializer, UsuarioCreateSerializer, UsuarioV1Serializer
 from apps.auditoria.models import AuditoriaAdmin, HistoricoLogin
 from .permissions import IsAdminOrReadOnly, IsOwnerOrAdmin
@@ -67,6 +68,8 @@ class UserProfileView(APIView):
     """
     View para obter perfil do usuário logado
     """
+    # Lê e grava o registro do usuário: precisa do User do banco, não do usuário das claims
+    authentication_classes = [CustomJWTAuthentication, SessionAuthentication]
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request):
@@ -168,6 +171,7 @@ class ChangePasswordView(APIView):
     """
     View para alterar senha do usuário
     """
+    authentication_classes = [CustomJWTAuthentication, SessionAuthentication]
     permission_classes = [permissions.IsAuthenticated]
     
     def post(self, request):
@@ -209,13 +213,9 @@ def check_permissions(request):
     Endpoint para verificar permissões do usuário
     """
     user = request.user
-    # Obtém perfil do V1
-    try:
-        from apps.usuarios.models import Usuario as V1Usuario
-        v1 = V1Usuario.objects.get(username=getattr(user, 'username', ''))
-        perfil = v1.perfil
-    except Exception:
-        perfil = ''
+    # Obtém perfil do V1 (memorizado pelo UserProfileMiddleware)
+    from .middleware import get_perfil_usuario
+    perfil = get_perfil_usuario(user).get('perfil', '')
 
     # Permissions dict via middleware (ou fallback)
     perms = None
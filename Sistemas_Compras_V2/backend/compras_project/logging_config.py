@@ -0,0 +1,172 @@
+"""
+Configuração de logging não bloqueante do Sistema de Compras V2
+
+Usada pelo Django via `LOGGING_CONFIG` (settings): aplica o dict `LOGGING` normalmente e depois
+coloca os handlers do logger raiz (arquivo com rotação, console) atrás de uma fila em memória.
+As threads das requisições só fazem `put` na fila (QueueHandler); uma única thread
+(QueueListener) formata e grava. Os loggers nomeados em `LOGGING` definem apenas nível e
+propagam para o raiz.
+
+Também ficam aqui o formatter JSON (uma linha por registro) e o filtro de amostragem dos
+caminhos de DEBUG ruidosos, aplicado antes do enfileiramento.
+"""
+import atexit
+import copy
+import itertools
+import json
+import logging
+import logging.config
+import logging.handlers
+import os
+import queue
+from datetime import datetime, timezone
+
+# Atributos padrão do LogRecord; o que sobrar (extra=...) vai para o JSON
+_ATRIBUTOS_PADRAO = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener = None
+
+
+class JSONFormatter(logging.Formatter):
+    """Formata o registro como uma linha JSON (campos fixos + extras do `extra=`)"""
+
+    def format(self, record):
+        dados = {
+            'timestamp': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'line': record.lineno,
+            'process': record.process,
+            'thread': record.threadName,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            dados['exc_info'] = record.exc_text
+        if record.stack_info:
+            dados['stack_info'] = self.formatStack(record.stack_info)
+        for chave, valor in record.__dict__.items():
+            if chave not in _ATRIBUTOS_PADRAO and not chave.startswith('_'):
+                dados[chave] = valor
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+
+class AmostragemFilter(logging.Filter):
+    """
+    Mantém 1 de cada N registros de nível <= `nivel` dos loggers listados em `taxas`
+    ({prefixo do logger: N}); registros acima de `nivel` e de outros loggers sempre passam.
+    """
+
+    def __init__(self, taxas=None, nivel='DEBUG'):
+        super().__init__()
+        self.taxas = dict(taxas or {})
+        self.nivel = logging.getLevelName(nivel) if isinstance(nivel, str) else nivel
+        self._contadores = {}
+
+    def _taxa(self, nome):
+        melhor, taxa = '', 1
+        for prefixo, n in self.taxas.items():
+            if (nome == prefixo or nome.startswith(prefixo + '.')) and len(prefixo) >= len(melhor):
+                melhor, taxa = prefixo, n
+        return taxa
+
+    def filter(self, record):
+        if record.levelno > self.nivel:
+            return True
+        contador = self._contadores.get(record.name)
+        if contador is None:
+            taxa = self._taxa(record.name)
+            if taxa <= 1:
+                self._contadores[record.name] = contador = False
+            else:
+                contador = self._contadores.setdefault(record.name, (itertools.count(), taxa))
+        if not contador:
+            return True
+        sequencia, taxa = contador
+        return next(sequencia) % taxa == 0
+
+
+class FilaHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que preserva o traceback como texto (exc_text) para os formatters do listener,
+    em vez de achatar tudo na mensagem como o `prepare` padrão.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        # Objetos da requisição (ex.: django.request) não devem atravessar a fila
+        record.__dict__.pop('request', None)
+        return record
+
+
+def parar_fila():
+    """Esvazia a fila e encerra a thread de gravação (atexit / reconfiguração)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def niveis_do_ambiente(padroes, variavel='LOG_LEVELS'):
+    """
+    Níveis por logger: `padroes` ({logger: nível}, 'root' para o raiz) com os ajustes da
+    variável de ambiente no formato "logger=NIVEL,..." (ex.: "apps=DEBUG,django.db.backends=DEBUG").
+    Loggers que não estão em `padroes` são acrescentados.
+    """
+    niveis = dict(padroes)
+    for item in os.environ.get(variavel, '').split(','):
+        if not item.strip():
+            continue
+        nome, sep, nivel = item.partition('=')
+        if not sep or not nome.strip() or not nivel.strip():
+            raise ValueError(f"{variavel}: item inválido {item!r} (formato logger=NIVEL)")
+        niveis[nome.strip()] = nivel.strip().upper()
+    return niveis
+
+
+def configurar_logging(config):
+    """
+    Callable de `LOGGING_CONFIG`: aplica `config` e move os handlers do raiz para trás da fila.
+
+    O filtro `config['fila_filters']` (nomes de filtros do próprio dict) é aplicado no
+    FilaHandler, ou seja, antes do enfileiramento.
+    """
+    global _listener
+    parar_fila()
+
+    logging.config.dictConfig(config)
+    raiz = logging.getLogger()
+    destinos = list(raiz.handlers)
+    if not destinos:
+        return
+
+    fila = queue.SimpleQueue()
+    handler = FilaHandler(fila)
+    for nome in config.get('fila_filters', []):
+        filtro = config['filters'][nome]
+        handler.addFilter(filtro if isinstance(filtro, logging.Filter) else _criar_filtro(filtro))
+    for destino in destinos:
+        raiz.removeHandler(destino)
+    raiz.addHandler(handler)
+
+    _listener = logging.handlers.QueueListener(fila, *destinos, respect_handler_level=True)
+    _listener.start()
+
+
+def _criar_filtro(definicao):
+    definicao = dict(definicao)
+    fabrica = definicao.pop('()')
+    if isinstance(fabrica, str):
+        fabrica = logging.config.BaseConfigurator({}).resolve(fabrica)
+    return fabrica(**definicao)
+
+
+atexit.register(parar_fila)
@@ -6,6 +6,8 @@ import os
 from pathlib import Path
 from datetime import timedelta
 
+from compras_project.logging_config import niveis_do_ambiente
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -37,6 +39,7 @@ INSTALLED_APPS = [
     'apps.solicitacoes',
     'apps.configuracoes',
     'apps.auditoria',
+    'apps.dashboard',
 ]
 
 MIDDLEWARE = [
@@ -88,11 +91,25 @@ if not os.path.exists(db_dir):
 # AUTH_USER_MODEL = 'usuarios.Usuario'
 
 # Authentication backends
+# Backend V1 primeiro: para usuários do V1 ele relê o senha_hash e migra de novo a senha se ela
+# foi trocada no app V1; os demais usuários (sem registro no V1) seguem para o ModelBackend
 AUTHENTICATION_BACKENDS = [
     'apps.usuarios.backends.V1AuthenticationBackend',
     'django.contrib.auth.backends.ModelBackend',
 ]
 
+# Hashers padrão do Django + esquemas legados do V1 (apps.usuarios.hashers); os legados só
+# verificam e são substituídos pelo primeiro da lista no login bem-sucedido
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+    'apps.usuarios.hashers.V1SHA256PasswordHasher',
+    'apps.usuarios.hashers.V1ZiranSHA256PasswordHasher',
+]
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -109,6 +126,28 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Cache do Django (perfil V1, deduplicação da auditoria de login). Padrão: LocMemCache, local a
+# cada processo, sem consultas no caminho quente; a invalidação pelos sinais vale só no worker
+# que a executou e os demais enxergam a mudança quando a entrada expira (PERFIL_CACHE_TIMEOUT).
+# Para invalidar em todos os workers configure REDIS_URL (cache compartilhado no Redis).
+# 'local' é sempre em memória: primeiro nível de verificações feitas a cada requisição
+REDIS_URL = os.environ.get('REDIS_URL', '')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'compras',
+    },
+    'local': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'compras-local',
+    },
+}
+if REDIS_URL:
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    }
+
 # Internationalization
 LANGUAGE_CODE = 'pt-br'
 TIME_ZONE = 'America/Sao_Paulo'
@@ -129,7 +168,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.usuarios.authentication.PerfilJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -161,6 +200,10 @@ SIMPLE_JWT = {
     'AUTH_HEADER_NAME': 'HTTP_AUTHORIZATION',
     'USER_ID_FIELD': 'id',
     'USER_ID_CLAIM': 'user_id',
+    # Perfil V1 (nome, perfil, departamento + versão) embutido nas claims
+    'TOKEN_OBTAIN_SERIALIZER': 'apps.usuarios.authentication.PerfilTokenObtainPairSerializer',
+    # Renovação recusada para usuários desativados
+    'TOKEN_REFRESH_SERIALIZER': 'apps.usuarios.authentication.PerfilTokenRefreshSerializer',
 }
 
 # CORS settings for React frontend
@@ -191,6 +234,14 @@ COMPRAS_SETTINGS = {
         'Normal': 3,
         'Baixa': 5,
     },
+    # Prazos de SLA (sla_deadline/sla_warning_at) em dias úteis; feriados 'MM-DD' (todo ano)
+    # ou 'AAAA-MM-DD' (data única, ex.: Carnaval, Sexta-feira Santa, Corpus Christi)
+    'SLA_DIAS_UTEIS': True,
+    'FERIADOS': [
+        '01-01', '04-21', '05-01', '09-07', '10-12', '11-02', '11-15', '11-20', '12-25',
+        '2025-03-03', '2025-03-04', '2025-04-18', '2025-06-19',
+        '2026-02-16', '2026-02-17', '2026-04-03', '2026-06-04',
+    ],
     'LIMITE_GERENCIA': 5000.0,
     'LIMITE_DIRETORIA': 15000.0,
     'ETAPAS_PROCESSO': [
@@ -224,9 +275,36 @@ COMPRAS_SETTINGS = {
     'UNIDADES_PADRAO': [
         'UN', 'PC', 'CX', 'KG', 'L', 'M', 'M2'
     ],
+    # Alertas de SLA (scan_sla_alerts): 'overdue' quando ainda em andamento N horas após o prazo
+    'SLA_ALERTA_VENCIDO_HORAS': 24,
+    # Idade máxima (s) das métricas pré-calculadas do dashboard (refresh_metrics)
+    'METRICAS_VALIDADE': 3600,
+    # Cache do perfil V1 por username (UserProfileMiddleware), invalidado pelos sinais de Usuario.
+    # Edições feitas pelo app Streamlit do V1 (e, sem REDIS_URL, em outros workers) aparecem em até N segundos
+    'PERFIL_CACHE_TIMEOUT': 60,
+    # Auditoria: LOGIN via JWT registrado uma vez por token (jti) dentro da janela (segundos)
+    'AUDITORIA_LOGIN_JWT_JANELA': 24 * 60 * 60,
+    # Gravador em lote da auditoria (apps.auditoria.writer)
+    'AUDITORIA_LOTE_TAMANHO': 100,
+    'AUDITORIA_LOTE_INTERVALO': 2.0,
 }
 
 # Logging configuration
+# Logging não bloqueante (compras_project/logging_config.py): os handlers do raiz gravam numa
+# thread própria (QueueListener); as requisições só enfileiram o registro em memória
+LOGGING_CONFIG = 'compras_project.logging_config.configurar_logging'
+
+# Níveis por logger; LOG_LEVELS no ambiente ajusta (ex.: LOG_LEVELS="apps=DEBUG,root=WARNING").
+# Os handlers aceitam DEBUG: quem decide o que é gravado é o nível do logger, e os registros
+# DEBUG dos loggers ruidosos passam pela amostragem antes do enfileiramento
+NIVEIS_LOG = niveis_do_ambiente({
+    'root': 'INFO',
+    'django': 'INFO',
+    'django.server': 'INFO',
+    'django.db.backends': 'INFO',
+    'apps': 'INFO',
+})
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -235,23 +313,48 @@ LOGGING = {
             'format': '{levelname} {asctime} {module} {process:d} {thread:d} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'compras_project.logging_config.JSONFormatter',
+        },
     },
+    'filters': {
+        # 1 de cada N registros DEBUG por logger (caminhos ruidosos)
+        'amostragem': {
+            '()': 'compras_project.logging_config.AmostragemFilter',
+            'nivel': 'DEBUG',
+            'taxas': {
+                'django.db.backends': 100,
+                'apps': 10,
+            },
+        },
+    },
+    # Filtros aplicados antes do enfileiramento (thread da requisição)
+    'fila_filters': ['amostragem'],
     'handlers': {
         'file': {
-            'level': 'INFO',
-            'class': 'logging.FileHandler',
+            'level': 'DEBUG',
+            'class': 'logging.handlers.RotatingFileHandler',
             'filename': BASE_DIR / 'logs' / 'django.log',
-            'formatter': 'verbose',
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'encoding': 'utf-8',
+            'formatter': 'json',
         },
         'console': {
-            'level': 'INFO',
+            'level': 'DEBUG',
             'class': 'logging.StreamHandler',
             'formatter': 'verbose',
         },
     },
     'root': {
         'handlers': ['console', 'file'],
-        'level': 'INFO',
+        'level': NIVEIS_LOG['root'],
+    },
+    # Níveis por logger (NIVEIS_LOG); todos propagam para o raiz (sem handlers próprios, logo
+    # também passam pela fila)
+    'loggers': {
+        nome: {'handlers': [], 'level': nivel, 'propagate': True}
+        for nome, nivel in NIVEIS_LOG.items() if nome != 'root'
     },
 }
 
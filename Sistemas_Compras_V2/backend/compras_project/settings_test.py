@@ -0,0 +1,22 @@
+"""
+Django settings para os testes (python manage.py test --settings=compras_project.settings_test)
+
+As migrações foram geradas contra o banco V1 copiado e não montam um banco vazio (a
+solicitacoes 0002 adiciona um IntegerField com default 'Sistema'); o banco de testes é
+criado direto dos models, sem mexer nas migrações já aplicadas em produção.
+"""
+
+from compras_project.settings import *  # noqa: F401,F403
+
+
+class SemMigracoes(dict):
+    """MIGRATION_MODULES que desliga as migrações de todos os apps"""
+
+    def __contains__(self, app_label):
+        return True
+
+    def __getitem__(self, app_label):
+        return None
+
+
+MIGRATION_MODULES = SemMigracoes()
@@ -14,6 +14,7 @@ urlpatterns = [
     path('api/solicitacoes/', include('apps.solicitacoes.urls')),
     path('api/configuracoes/', include('apps.configuracoes.urls')),
     path('api/auditoria/', include('apps.auditoria.urls')),
+    path('api/dashboard/', include('apps.dashboard.urls')),
     
     # Direct catalog endpoint for convenience
     path('api/catalogo/', include('apps.solicitacoes.catalog_urls')),